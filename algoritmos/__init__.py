@@ -3,11 +3,33 @@ from .avara import busqueda_avara
 from .amplitud import busqueda_amplitud
 from .costo_uniforme import busqueda_costo_uniforme
 from .profundidad_sin_ciclos import busqueda_profundidad_sin_ciclos
+from .puntos_clave import busqueda_puntos_clave
+from .ida_estrella import busqueda_ida_estrella
+from .ara_estrella import busqueda_ara_estrella
+from .amplitud_vectorizada import busqueda_amplitud_vectorizada
+
+# Nombre corto de cada algoritmo, usado por las herramientas de línea de comandos
+ALGORITMOS = {
+	"amplitud": busqueda_amplitud,
+	"costo_uniforme": busqueda_costo_uniforme,
+	"profundidad": busqueda_profundidad_sin_ciclos,
+	"avara": busqueda_avara,
+	"a_estrella": busqueda_a_estrella,
+	"puntos_clave": busqueda_puntos_clave,
+	"ida_estrella": busqueda_ida_estrella,
+	"ara_estrella": busqueda_ara_estrella,
+	"amplitud_vectorizada": busqueda_amplitud_vectorizada,
+}
 
 __all__ = [
+	"ALGORITMOS",
 	"busqueda_a_estrella",
 	"busqueda_avara",
 	"busqueda_amplitud",
 	"busqueda_costo_uniforme",
 	"busqueda_profundidad_sin_ciclos",
+	"busqueda_puntos_clave",
+	"busqueda_ida_estrella",
+	"busqueda_ara_estrella",
+	"busqueda_amplitud_vectorizada",
 ]
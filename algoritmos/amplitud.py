@@ -1,34 +1,27 @@
+import functools
 import time
 from collections import deque
-from typing import Tuple, Set, List, Dict
-from algoritmos.astar import empaquetar_estado, generar_estados_vecinos
+from typing import Tuple, Set, Dict, Optional
+from algoritmos.astar import reconstruir_camino
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, mejor_parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+from helpers.mundo import Grid, compilar_mundo
 
 Coordenada = Tuple[int, int]
-# Estado ahora incluye el flag `nave_usada` (bool) como quinto elemento
-Estado = Tuple[Coordenada, Tuple[Tuple[int, int], ...], bool, int, bool]
-
-
-def reconstruir_camino(diccionario_padres: Dict[Estado, Estado], estado_meta: Estado) -> List[Coordenada]:
-    """
-    Reconstruye el camino desde el estado inicial hasta el estado meta.
-    """
-    camino = []
-    estado_actual = estado_meta
-
-    while estado_actual in diccionario_padres:
-        camino.append(estado_actual[0])
-        estado_actual = diccionario_padres[estado_actual]
-
-    camino.append(estado_actual[0])
-    camino.reverse()
-    return camino
+Estado = EstadoCompacto
 
 
 def busqueda_amplitud(
-    mapa: List[List[int]],
+    mapa: Grid,
     posicion_inicial: Coordenada,
     posicion_nave: Coordenada,
-    muestras_iniciales: Set[Coordenada]
+    muestras_iniciales: Set[Coordenada],
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
 ):
     """
     Implementación de búsqueda no informada por amplitud (BFS).
@@ -36,15 +29,26 @@ def busqueda_amplitud(
     Retorna un diccionario con los siguientes campos:
       - exito: True si encontró todas las muestras
       - camino: lista de coordenadas desde el inicio hasta la meta
+      - camino con costo: pares (coordenada, costo acumulado)
       - costo_total: costo acumulado real del camino (suma de costos de movimientos)
       - nodos_expandidos: cantidad de nodos extraídos/analizados
       - profundidad: número de movimientos en el camino
       - tiempo: duración de la ejecución en segundos
       - max_frontera: tamaño máximo alcanzado por la frontera (colade espera)
+
+    Límites y cancelación: ver `Presupuesto`. `observador` recibe los eventos
+    de la búsqueda (ver `Observador`).
     """
     tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
 
-    estado_inicial = empaquetar_estado(posicion_inicial, muestras_iniciales, False, 0, False)
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
+    generar_vecinos = espacio.generar_vecinos
+    if observador is not None:
+        observador.al_iniciar(espacio)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
 
     frontera = deque([estado_inicial])
     en_frontera = {estado_inicial}
@@ -55,39 +59,35 @@ def busqueda_amplitud(
     nodos_expandidos = 0
     max_frontera = 1
 
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costos": len(costos_acumulados), "padres": len(diccionario_padres), "visitados": len(visitados)})
+
     while frontera:
         if len(frontera) > max_frontera:
             max_frontera = len(frontera)
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres)))
 
         estado_actual = frontera.popleft()
         en_frontera.discard(estado_actual)
 
         if estado_actual in visitados:
+            if observador is not None:
+                observador.al_descartar(estado_actual)
             continue
 
         visitados.add(estado_actual)
         nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_actual, costos_acumulados[estado_actual], diccionario_padres.get(estado_actual))
+
+        if espacio.es_meta(estado_actual):
+            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costos_acumulados, espacio)
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera))
 
-        posicion_actual, muestras_restantes_tupla, en_nave, combustible, nave_usada = estado_actual
-        muestras_restantes = set(muestras_restantes_tupla)
-
-        if not muestras_restantes:
-            tiempo_total = time.perf_counter() - tiempo_inicio
-            camino = reconstruir_camino(diccionario_padres, estado_actual)
-            profundidad = len(camino) - 1
-
-            return {
-                "exito": True,
-                "camino": camino,
-                "costo_total": costos_acumulados.get(estado_actual, 0.0),
-                "nodos_expandidos": nodos_expandidos,
-                "profundidad": profundidad,
-                "tiempo": tiempo_total,
-                "max_frontera": max_frontera
-            }
-
-        for estado_vecino, costo_movimiento in generar_estados_vecinos(estado_actual, mapa, posicion_nave):
+        for estado_vecino, costo_movimiento in generar_vecinos(estado_actual):
             nuevo_costo = costos_acumulados[estado_actual] + costo_movimiento
+            if observador is not None:
+                observador.al_generar(estado_vecino, nuevo_costo)
 
             # Si no lo hemos visto antes o encontramos un costo menor, actualizamos
             if estado_vecino not in costos_acumulados or nuevo_costo < costos_acumulados[estado_vecino]:
@@ -99,6 +99,9 @@ def busqueda_amplitud(
             if estado_vecino not in visitados and estado_vecino not in en_frontera:
                 frontera.append(estado_vecino)
                 en_frontera.add(estado_vecino)
+                if observador is not None:
+                    observador.al_insertar(estado_vecino, nuevo_costo)
+            elif observador is not None:
+                observador.al_duplicado(estado_vecino)
 
-    tiempo_total = time.perf_counter() - tiempo_inicio
-    return {"exito": False, "tiempo": tiempo_total, "nodos_expandidos": nodos_expandidos}
+    return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres)))
@@ -0,0 +1,252 @@
+import functools
+import time
+from typing import Tuple, Set, List, Optional
+
+import numpy as np
+
+from algoritmos.amplitud import busqueda_amplitud
+from algoritmos.espacio_estados import EspacioEstados, BITS_COMBUSTIBLE, DESPLAZAMIENTO_COMBUSTIBLE, DESPLAZAMIENTO_CELDA, COMBUSTIBLE_NAVE
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, Parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+from helpers.mundo import Grid, compilar_mundo
+
+Coordenada = Tuple[int, int]
+# Combinaciones posibles de (nave_usada, en_nave, combustible): sin nave, a pie
+# tras usarla, o en la nave con 0..COMBUSTIBLE_NAVE de combustible
+COMBINACIONES_NAVE = 2 + COMBUSTIBLE_NAVE + 1
+# Con más estados posibles que este límite (64 MB de booleanos), los visitados
+# se guardan en arreglos ordenados en lugar de un arreglo indexado por estado
+LIMITE_ARREGLO_VISITADOS = 1 << 26
+# Bits de estado que caben en un int64 sin signo de por medio
+BITS_MAXIMOS = 63
+
+
+class VisitadosDensos:
+    """
+    Estados vistos como un arreglo booleano indexado por un índice denso del
+    estado: (máscara, celda, combinación de nave y combustible).
+    """
+
+    def __init__(self, espacio: EspacioEstados):
+        self.espacio = espacio
+        self.celdas = espacio.mundo.alto * espacio.mundo.ancho
+        self.vistos = np.zeros((1 << len(espacio.muestras)) * self.celdas * COMBINACIONES_NAVE, dtype=bool)
+
+    @staticmethod
+    def tamano(espacio: EspacioEstados) -> int:
+        return (1 << len(espacio.muestras)) * espacio.mundo.alto * espacio.mundo.ancho * COMBINACIONES_NAVE
+
+    def indices(self, estados: np.ndarray) -> np.ndarray:
+        espacio = self.espacio
+        celdas = (estados >> DESPLAZAMIENTO_CELDA) & espacio.mascara_celda
+        combustible = (estados >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+        combinacion = np.where(estados & 1 == 0, 0, np.where(estados & 2 == 0, 1, 2 + combustible))
+        return ((estados >> espacio.desplazamiento_mascara) * self.celdas + celdas) * COMBINACIONES_NAVE + combinacion
+
+    def agregar(self, estados: np.ndarray) -> None:
+        self.vistos[self.indices(estados)] = True
+
+    def contiene(self, estados: np.ndarray) -> np.ndarray:
+        return self.vistos[self.indices(estados)]
+
+
+class VisitadosOrdenados:
+    """
+    Estados vistos como una lista de arreglos ordenados sin repetidos, de
+    tamaños decrecientes: al agregar una capa se fusiona con los últimos
+    mientras no sean al menos el doble de grandes, de modo que cada estado se
+    reordena O(log n) veces y la consulta hace pocas búsquedas binarias.
+    """
+
+    def __init__(self):
+        self.bloques: List[np.ndarray] = []
+
+    def agregar(self, estados: np.ndarray) -> None:
+        bloque = np.unique(estados)
+        while self.bloques and len(self.bloques[-1]) < 2 * len(bloque):
+            bloque = np.union1d(self.bloques.pop(), bloque)
+        self.bloques.append(bloque)
+
+    def contiene(self, estados: np.ndarray) -> np.ndarray:
+        vistos = np.zeros(len(estados), dtype=bool)
+        for bloque in self.bloques:
+            posiciones = np.searchsorted(bloque, estados)
+            posiciones[posiciones == len(bloque)] = 0
+            vistos |= bloque[posiciones] == estados
+        return vistos
+
+
+class Capa:
+    """Estados de una profundidad, con el índice de su padre en la capa anterior y su costo."""
+
+    def __init__(self, estados: np.ndarray, padres: np.ndarray, costos: np.ndarray):
+        self.estados = estados
+        self.padres = padres
+        self.costos = costos
+
+
+def expandir_capa(espacio: EspacioEstados, tablas: dict, estados: np.ndarray, costos: np.ndarray):
+    """
+    Genera con operaciones de arreglo los sucesores de todos los `estados` de
+    una capa, con las mismas reglas que `EspacioEstados.generar_vecinos`.
+    Devuelve (sucesores, índice del padre en `estados`, costo acumulado).
+    """
+    desplazamiento_mascara = espacio.desplazamiento_mascara
+    celdas = (estados >> DESPLAZAMIENTO_CELDA) & espacio.mascara_celda
+    combustible = (estados >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+    nave_usada = estados & 1
+    con_combustible = ((estados & 2) != 0) & (combustible > 0)
+
+    vecinos = tablas["vecinos"][celdas]
+    validos = vecinos >= 0
+    padres = np.nonzero(validos)[0]
+    vecinos = vecinos[validos].astype(np.int64)
+
+    con_combustible = con_combustible[padres]
+    nave_usada = nave_usada[padres]
+    costo_movimiento = np.where(con_combustible, 0.5, tablas["costo_entrada"][vecinos])
+    bits_nave = np.where(con_combustible, ((combustible[padres] - 1) << DESPLAZAMIENTO_COMBUSTIBLE) | 2 | nave_usada, nave_usada)
+    # Al llegar a la nave por primera vez: recarga combustible y la marca como usada
+    if tablas["celda_nave"] >= 0:
+        recoge = (nave_usada == 0) & (vecinos == tablas["celda_nave"])
+        bits_nave = np.where(recoge, (COMBUSTIBLE_NAVE << DESPLAZAMIENTO_COMBUSTIBLE) | 3, bits_nave)
+
+    mascaras = estados[padres] >> desplazamiento_mascara
+    indices = tablas["indice_muestra"][vecinos]
+    recogidas = indices >= 0
+    mascaras[recogidas] &= ~(np.int64(1) << indices[recogidas])
+
+    sucesores = (mascaras << desplazamiento_mascara) | (vecinos << DESPLAZAMIENTO_CELDA) | bits_nave
+    return sucesores, padres, costos[padres] + costo_movimiento
+
+
+def camino_por_capas(espacio: EspacioEstados, capas: List[Capa], indice: int) -> Tuple[List[Coordenada], List[float]]:
+    """Reconstruye el camino hasta el estado `indice` de la última capa siguiendo los padres."""
+    camino, costos = [], []
+    for capa in reversed(capas):
+        camino.append(espacio.posicion(int(capa.estados[indice])))
+        costos.append(float(capa.costos[indice]))
+        indice = int(capa.padres[indice])
+    camino.reverse()
+    costos.reverse()
+    return camino, costos
+
+
+def mejor_parcial_por_capas(espacio: EspacioEstados, capas: List[Capa]) -> Optional[Parcial]:
+    """Como `mejor_parcial`: el estado alcanzado con más muestras recogidas y, a igualdad, el más barato."""
+    mejor = None
+    for profundidad, capa in enumerate(capas):
+        mascaras = capa.estados >> espacio.desplazamiento_mascara
+        restantes = sum((mascaras >> indice) & 1 for indice in range(len(espacio.muestras)))
+        restantes = np.broadcast_to(restantes, mascaras.shape)
+        indice = int(np.lexsort((capa.costos, restantes))[0])
+        clave = (int(restantes[indice]), float(capa.costos[indice]))
+        if mejor is None or clave < mejor[0]:
+            mejor = (clave, profundidad, indice)
+    if mejor is None:
+        return None
+    (restantes, costo), profundidad, indice = mejor
+    camino, _ = camino_por_capas(espacio, capas[:profundidad + 1], indice)
+    return camino, costo, len(espacio.muestras) - restantes
+
+
+def busqueda_amplitud_vectorizada(
+    mapa: Grid,
+    posicion_inicial: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_iniciales: Set[Coordenada],
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
+):
+    """
+    Búsqueda por amplitud síncrona por capas: en lugar de sacar los estados de
+    uno en uno, expande cada capa de profundidad completa con operaciones de
+    NumPy (ver `expandir_capa`) sobre arreglos int64 de estados compactos.
+
+    Los duplicados se eliminan contra los estados ya vistos (`VisitadosDensos`
+    si hay hasta `LIMITE_ARREGLO_VISITADOS` estados posibles,
+    `VisitadosOrdenados` si no) y dentro de la capa con una pasada de ordenación, quedándose
+    con el padre más barato. El resultado es el camino de menor profundidad y,
+    entre los de esa profundidad, el de menor costo; puede diferir en costo del
+    de `busqueda_amplitud`, que se queda con el primer padre que encuentra.
+    Devuelve el mismo diccionario que `busqueda_amplitud`.
+
+    Los límites (ver `Presupuesto`) se comprueban antes de cada capa, así que
+    una capa empezada se termina. `observador` recibe `al_expandir` por cada estado de cada capa,
+    lo que devuelve parte del costo por estado. Si los estados del mundo no
+    caben en 63 bits se usa `busqueda_amplitud`.
+    """
+    tiempo_inicio = time.perf_counter()
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    bits_estado = espacio.desplazamiento_mascara + len(espacio.muestras)
+    if bits_estado > BITS_MAXIMOS:
+        return busqueda_amplitud(
+            mapa, posicion_inicial, posicion_nave, muestras_iniciales,
+            limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion, observador
+        )
+
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+    if observador is not None:
+        observador.al_iniciar(espacio)
+
+    mundo = espacio.mundo
+    tablas = {
+        "vecinos": np.frombuffer(mundo.vecinos, dtype=np.int32).reshape(-1, 4),
+        "costo_entrada": np.frombuffer(mundo.costo_entrada, dtype=np.float64),
+        "indice_muestra": np.frombuffer(mundo.indice_muestra, dtype=np.int32).astype(np.int64),
+        "celda_nave": mundo.celda_nave,
+    }
+    if VisitadosDensos.tamano(espacio) <= LIMITE_ARREGLO_VISITADOS:
+        visitados = VisitadosDensos(espacio)
+    else:
+        visitados = VisitadosOrdenados()
+
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
+    capa = Capa(np.array([estado_inicial], dtype=np.int64), np.array([-1], dtype=np.int64), np.zeros(1))
+    capas = [capa]
+    nodos_expandidos = 0
+    max_frontera = 1
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"capas": len(capas), "estados": sum(len(c.estados) for c in capas)})
+
+    while True:
+        estados = capa.estados
+        visitados.agregar(estados)
+        max_frontera = max(max_frontera, len(estados))
+
+        metas = np.nonzero(estados < espacio.limite_meta)[0]
+        if len(metas):
+            indice = int(metas[np.argmin(capa.costos[metas])])
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_expandir(int(estados[indice]), float(capa.costos[indice]), None if len(capas) == 1 else int(capas[-2].estados[capa.padres[indice]]))
+            camino, costos = camino_por_capas(espacio, capas, indice)
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera))
+
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial_por_capas(espacio, capas)))
+
+        nodos_expandidos += len(estados)
+        if observador is not None:
+            anterior = capas[-2].estados if len(capas) > 1 else None
+            for estado, padre, costo in zip(estados.tolist(), capa.padres.tolist(), capa.costos.tolist()):
+                observador.al_expandir(estado, costo, None if anterior is None else int(anterior[padre]))
+
+        sucesores, padres, costos = expandir_capa(espacio, tablas, estados, capa.costos)
+        nuevos = ~visitados.contiene(sucesores)
+        sucesores, padres, costos = sucesores[nuevos], padres[nuevos], costos[nuevos]
+        if not len(sucesores):
+            return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial_por_capas(espacio, capas)))
+
+        # Un estado por sucesor distinto: el de menor costo (primero tras ordenar por estado y costo)
+        orden = np.lexsort((costos, sucesores))
+        sucesores = sucesores[orden]
+        primeros = np.ones(len(sucesores), dtype=bool)
+        primeros[1:] = sucesores[1:] != sucesores[:-1]
+        seleccion = orden[primeros]
+        capa = Capa(sucesores[primeros], padres[seleccion], costos[seleccion])
+        capas.append(capa)
@@ -0,0 +1,196 @@
+import functools
+import heapq
+import math
+import time
+from typing import Tuple, Set, List, Dict, Callable, Optional
+from algoritmos.astar import construir_heuristica
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, mejor_parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+from helpers.mundo import Grid, compilar_mundo
+
+Coordenada = Tuple[int, int]
+Estado = EstadoCompacto
+
+
+def reproducir_camino(diccionario_padres: Dict[Estado, Estado], estado_meta: Estado, espacio: EspacioEstados):
+    """
+    Reconstruye el camino hasta `estado_meta` y recalcula sus costos paso a paso.
+    Los g guardados pueden haber bajado después de fijar un padre, así que el
+    costo real del camino se obtiene sumando los movimientos.
+    """
+    estados = [estado_meta]
+    while estados[-1] in diccionario_padres:
+        estados.append(diccionario_padres[estados[-1]])
+    estados.reverse()
+
+    camino = [espacio.posicion(estados[0])]
+    costos = [0.0]
+    for anterior, siguiente in zip(estados, estados[1:]):
+        costo_mov = next(c for v, c in espacio.generar_vecinos(anterior) if v == siguiente)
+        camino.append(espacio.posicion(siguiente))
+        costos.append(costos[-1] + costo_mov)
+    return camino, costos
+
+
+def busqueda_ara_estrella(
+    mapa: Grid,
+    posicion_inicio: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_objetivo: Set[Coordenada],
+    modo_heuristica: str = "terreno",
+    peso_inicial: float = 3.0,
+    paso_peso: float = 0.5,
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    al_mejorar: Optional[Callable[[dict], None]] = None,
+    observador: Optional[Observador] = None
+):
+    """
+    A* ponderado de tiempo variable (ARA*).
+
+    Empieza con f = g + peso * h y un peso alto para obtener pronto un primer
+    plan; después baja el peso en `paso_peso` y mejora el plan reutilizando la
+    búsqueda anterior: solo se reabren los estados cuyo g mejoró después de
+    expandirse. Termina al probar el óptimo con peso 1 o al agotar el
+    presupuesto (ver `Presupuesto`); si para entonces ya hay un plan, se
+    devuelve ese plan.
+
+    Cada mejora se registra en `mejoras` (y se pasa a `al_mejorar` si se da) con
+    el costo, el peso, la cota de subóptimo demostrada, los nodos expandidos y el
+    tiempo. La cota es costo / (menor g + h de los estados abiertos o
+    inconsistentes), que acota el costo óptimo por debajo si la heurística es
+    admisible; por eso el modo por defecto es "terreno" (ver
+    `construir_heuristica`).
+
+    Retorna el mismo diccionario que `busqueda_a_estrella` con el mejor plan
+    encontrado, más `mejoras`, `peso` y `cota_suboptimo` (1.0 = óptimo).
+    `observador` recibe los eventos de la búsqueda (ver `Observador`).
+    """
+    tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_objetivo))
+    h = construir_heuristica(espacio, modo_heuristica)
+    estado_inicial = espacio.estado_inicial(posicion_inicio)
+    limite_meta = espacio.limite_meta
+    generar_vecinos = espacio.generar_vecinos
+    insertar, extraer = heapq.heappush, heapq.heappop
+    if observador is not None:
+        observador.al_iniciar(espacio, h)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        h = observador.cronometrar("heuristica", h)
+        insertar = observador.cronometrar("cola", insertar)
+        extraer = observador.cronometrar("cola", extraer)
+
+    costo_g: Dict[Estado, float] = {estado_inicial: 0.0}
+    valores_h: Dict[Estado, float] = {estado_inicial: h(estado_inicial)}
+    diccionario_padres: Dict[Estado, Estado] = {}
+    peso = max(float(peso_inicial), 1.0)
+    abiertos = [(peso * valores_h[estado_inicial], estado_inicial)]
+    cerrados: Set[Estado] = set()
+    inconsistentes: Set[Estado] = set()
+
+    estado_meta = estado_inicial if espacio.es_meta(estado_inicial) else None
+    costo_meta = 0.0 if estado_meta is not None else math.inf
+    mejores = None
+    mejoras: List[dict] = []
+    nodos_expandidos = 0
+    max_frontera = 1
+    motivo = None
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costos": len(costo_g), "heuristica": len(valores_h), "padres": len(diccionario_padres), "cerrados": len(cerrados)})
+
+    while True:
+        # Mejorar el plan con el peso actual
+        while abiertos and abiertos[0][0] < costo_meta:
+            if agotado is not None and (motivo := agotado(nodos_expandidos)):
+                break
+            if len(abiertos) > max_frontera:
+                max_frontera = len(abiertos)
+
+            clave, estado_actual = extraer(abiertos)
+            g_actual = costo_g[estado_actual]
+            if estado_actual in cerrados or clave != g_actual + peso * valores_h[estado_actual]:
+                if observador is not None:
+                    observador.al_descartar(estado_actual)
+                continue  # entrada obsoleta
+            cerrados.add(estado_actual)
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_expandir(estado_actual, g_actual, diccionario_padres.get(estado_actual))
+
+            for estado_vecino, costo_mov in generar_vecinos(estado_actual):
+                nuevo_costo_g = g_actual + costo_mov
+                if observador is not None:
+                    observador.al_generar(estado_vecino, nuevo_costo_g)
+                if nuevo_costo_g >= costo_g.get(estado_vecino, math.inf):
+                    if observador is not None:
+                        observador.al_duplicado(estado_vecino)
+                    continue
+                costo_g[estado_vecino] = nuevo_costo_g
+                diccionario_padres[estado_vecino] = estado_actual
+
+                if estado_vecino < limite_meta:
+                    # Las metas no se expanden: solo actualizan el mejor plan
+                    if nuevo_costo_g < costo_meta:
+                        costo_meta, estado_meta = nuevo_costo_g, estado_vecino
+                    continue
+                if estado_vecino in cerrados:
+                    inconsistentes.add(estado_vecino)
+                    continue
+                if estado_vecino not in valores_h:
+                    valores_h[estado_vecino] = h(estado_vecino)
+                prioridad = nuevo_costo_g + peso * valores_h[estado_vecino]
+                insertar(abiertos, (prioridad, estado_vecino))
+                if observador is not None:
+                    observador.al_insertar(estado_vecino, prioridad)
+
+        # Cota inferior del óptimo: el menor g + h entre los estados sin expandir
+        cota_inferior = costo_meta
+        for _, estado in abiertos:
+            if estado not in cerrados:
+                cota_inferior = min(cota_inferior, costo_g[estado] + valores_h[estado])
+        for estado in inconsistentes:
+            cota_inferior = min(cota_inferior, costo_g[estado] + valores_h[estado])
+
+        if estado_meta is not None and (mejores is None or costo_meta < mejores[1][-1]):
+            mejores = reproducir_camino(diccionario_padres, estado_meta, espacio)
+            costo_meta = mejores[1][-1]
+        if estado_meta is not None:
+            cota = costo_meta / cota_inferior if cota_inferior > 0 else 1.0
+            if not mejoras or costo_meta < mejoras[-1]["costo"] or cota < mejoras[-1]["cota_suboptimo"]:
+                mejora = {
+                    "costo": costo_meta,
+                    "peso": peso,
+                    "cota_suboptimo": cota,
+                    "nodos_expandidos": nodos_expandidos,
+                    "tiempo": time.perf_counter() - tiempo_inicio,
+                }
+                mejoras.append(mejora)
+                if al_mejorar is not None:
+                    al_mejorar(mejora)
+
+        if motivo or peso <= 1.0 or not abiertos and not inconsistentes:
+            break
+
+        # Bajar el peso y reabrir los estados inconsistentes
+        peso = max(1.0, peso - paso_peso)
+        pendientes = {estado for _, estado in abiertos if estado not in cerrados} | inconsistentes
+        abiertos = [(costo_g[estado] + peso * valores_h[estado], estado) for estado in pendientes]
+        heapq.heapify(abiertos)
+        inconsistentes = set()
+        cerrados = set()
+
+    if mejores is None:
+        parcial = mejor_parcial(espacio, costo_g, diccionario_padres)
+        return terminar(resultado_sin_exito(motivo or SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, parcial, mejoras=mejoras))
+
+    camino, costos = mejores
+    return terminar(resultado_exito(
+        camino, costos, nodos_expandidos, tiempo_inicio, max_frontera,
+        mejoras=mejoras, peso=peso, cota_suboptimo=mejoras[-1]["cota_suboptimo"]
+    ))
@@ -1,118 +1,81 @@
-import heapq
+import functools
 import time
-from typing import Tuple, Set, List, Dict
-from helpers.mundo import costo_de_entrada_terreno, dentro_de_limites, es_obstaculo
+from typing import Tuple, Set, Dict, Callable, Optional
+from helpers.mundo import Grid, compilar_mundo
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.heuristica_terreno import HeuristicaTerreno
+from algoritmos.frontera import crear_frontera
+from algoritmos.dominancia import DominanciaCombustible
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, mejor_parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador, FronteraInstrumentada
 
 
 Coordenada = Tuple[int, int]
-Estado = Tuple[Coordenada, Tuple[Tuple[int, int], ...], bool, int, bool]
-# Un estado contiene:
-#   - posicion_actual: (fila, columna)
-#   - muestras_restantes: conjunto ordenado de posiciones
-#   - en_nave: True/False
-#   - combustible: movimientos restantes de la nave
-#   - nave_usada: True si ya se recogió/usó la nave
-
-def heuristica(posicion_actual: Coordenada, posicion_nave: Coordenada, muestras_restantes: Set[Coordenada]) -> float:
+
+# Modos admitidos por `construir_heuristica`
+MODOS_HEURISTICA = ("manhattan", "terreno", "terreno_mst")
+
+
+def heuristica_compacta(estado: EstadoCompacto, espacio: EspacioEstados) -> float:
     """
-    Calcula la heurística h(n) según:
-    h = min(
+    Calcula la heurística h(n) sobre un estado compacto:
+    h = min sobre las muestras restantes de min(
         distancia_manhattan(posicion_actual, muestra),
         distancia_manhattan(posicion_actual, nave) + 0.5 * distancia_manhattan(nave, muestra)
     )
     """
-    if not muestras_restantes:
+    mascara = espacio.mascara(estado)
+    if not mascara:
         return 0.0
 
-    valores_heuristicos = []
-    for muestra in muestras_restantes:
-        distancia_directa = abs(posicion_actual[0] - muestra[0]) + abs(posicion_actual[1] - muestra[1])
-        if posicion_nave:
-            distancia_a_nave = abs(posicion_actual[0] - posicion_nave[0]) + abs(posicion_actual[1] - posicion_nave[1])
-            distancia_nave_a_muestra = abs(posicion_nave[0] - muestra[0]) + abs(posicion_nave[1] - muestra[1])
-            costo_usando_nave = distancia_a_nave + 0.5 * distancia_nave_a_muestra
-            valores_heuristicos.append(min(distancia_directa, costo_usando_nave))
-        else:
-            valores_heuristicos.append(distancia_directa)
-
-    return min(valores_heuristicos)
-
-
-def empaquetar_estado(posicion: Coordenada, muestras: Set[Coordenada], en_nave: bool, combustible: int, nave_usada: bool) -> Estado:
-    """Convierte los datos del estado en una tupla inmutable"""
-    return (posicion, tuple(sorted(muestras)), en_nave, combustible, nave_usada)
+    fila, col = espacio.posicion(estado)
+    posicion_nave = espacio.posicion_nave
+    if posicion_nave:
+        distancia_a_nave = abs(fila - posicion_nave[0]) + abs(col - posicion_nave[1])
 
+    mejor = float("inf")
+    for indice, muestra in enumerate(espacio.muestras):
+        if not mascara >> indice & 1:
+            continue
+        valor = abs(fila - muestra[0]) + abs(col - muestra[1])
+        if posicion_nave:
+            costo_usando_nave = distancia_a_nave + 0.5 * (abs(posicion_nave[0] - muestra[0]) + abs(posicion_nave[1] - muestra[1]))
+            valor = min(valor, costo_usando_nave)
+        mejor = min(mejor, valor)
 
-def desempaquetar_estado(estado: Estado):
-    posicion, muestras_tupla, en_nave, combustible, nave_usada = estado
-    return posicion, set(muestras_tupla), en_nave, combustible, nave_usada
+    return mejor
 
 
-def generar_estados_vecinos(estado_actual: Estado, mapa: List[List[int]], posicion_nave: Coordenada):
+def construir_heuristica(espacio: EspacioEstados, modo: str = "manhattan") -> Callable[[EstadoCompacto], float]:
     """
-    Genera los estados vecinos posibles (arriba, abajo, izquierda, derecha).
-    Aplica las reglas de movimiento:
-      - Si está en la nave y tiene combustible: costo 0.5 por movimiento, -1 combustible
-      - Si no está en la nave: costo según el tipo de terreno (1, 3, 5)
-      - Al llegar a la nave por primera vez: recarga combustible a 20, en_nave=True, y la nave desaparece
-      - Al llegar a una muestra: la elimina de las muestras restantes
+    Devuelve la función h(estado) correspondiente al modo elegido:
+      - "manhattan": la heurística original (`heuristica_compacta`)
+      - "terreno": cotas exactas por campos de distancia, máximo sobre las muestras
+      - "terreno_mst": como "terreno", reforzada con el árbol de expansión mínima
+    Los modos "terreno" son admisibles; su preprocesamiento es lineal en el tamaño
+    del mapa por cada muestra.
     """
-    posicion_actual, muestras_restantes, en_nave, combustible, nave_usada = desempaquetar_estado(estado_actual)
-    fila, col = posicion_actual
-
-    movimientos = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    vecinos = []
+    if modo == "manhattan":
+        return lambda estado: heuristica_compacta(estado, espacio)
+    if modo == "terreno":
+        return HeuristicaTerreno(espacio, "max")
+    if modo == "terreno_mst":
+        return HeuristicaTerreno(espacio, "mst")
+    raise ValueError(f"Modo de heurística desconocido: {modo}")
 
-    for desplazamiento_fila, desplazamiento_columna in movimientos:
-        nueva_fila, nueva_col = fila + desplazamiento_fila, col + desplazamiento_columna
-        nueva_posicion = (nueva_fila, nueva_col)
-
-        if not dentro_de_limites(nueva_posicion) or es_obstaculo(mapa, nueva_posicion):
-            continue
 
-        nueva_nave_usada = nave_usada
-        
-        # Determinar costo y estado de combustible
-        if en_nave and combustible > 0:
-            # Movimiento usando la nave
-            costo_movimiento = 0.5
-            nuevo_combustible = combustible - 1
-            nuevo_en_nave = True
-        else:
-            # Movimiento a pie
-            costo_movimiento = costo_de_entrada_terreno(mapa, nueva_posicion)
-            nuevo_combustible = 0
-            nuevo_en_nave = False
-
-        # Si llegamos a la nave por primera vez, recargar y marcar como usada
-        if mapa[nueva_fila][nueva_col] == 5 and not nave_usada:
-            nuevo_en_nave = True
-            nuevo_combustible = 20
-            nueva_nave_usada = True
-
-        # Si llegamos a una muestra, recogerla
-        nuevas_muestras = set(muestras_restantes)
-        if mapa[nueva_fila][nueva_col] == 6 and (nueva_fila, nueva_col) in nuevas_muestras:
-            nuevas_muestras.remove((nueva_fila, nueva_col))
-
-        nuevo_estado = empaquetar_estado(nueva_posicion, nuevas_muestras, nuevo_en_nave, nuevo_combustible, nueva_nave_usada)
-        vecinos.append((nuevo_estado, costo_movimiento))
-
-    return vecinos
-
-
-def reconstruir_camino(diccionario_padres: Dict[Estado, Estado], estado_final: Estado, costo_g: Dict[Estado, float]):
+def reconstruir_camino(diccionario_padres: Dict[EstadoCompacto, EstadoCompacto], estado_final: EstadoCompacto, costo_g: Dict[EstadoCompacto, float], espacio: EspacioEstados):
     """Reconstruye la trayectoria completa desde el inicio hasta la meta con sus costos"""
     camino = []
     costos = []
     estado = estado_final
     
     while estado in diccionario_padres:
-        camino.append(estado[0])
+        camino.append(espacio.posicion(estado))
         costos.append(costo_g[estado])
         estado = diccionario_padres[estado]
     
-    camino.append(estado[0])
+    camino.append(espacio.posicion(estado))
     costos.append(costo_g[estado])
     
     camino.reverse()
@@ -121,56 +84,109 @@ def reconstruir_camino(diccionario_padres: Dict[Estado, Estado], estado_final: E
     return camino, costos
 
 
-def busqueda_a_estrella(mapa: List[List[int]], posicion_inicio: Coordenada, posicion_nave: Coordenada, muestras_objetivo: Set[Coordenada]):
+def busqueda_a_estrella(
+    mapa: Grid,
+    posicion_inicio: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_objetivo: Set[Coordenada],
+    modo_heuristica: str = "manhattan",
+    frontera: str = "monticulo",
+    poda_dominancia: bool = False,
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None,
+    espacio: Optional[EspacioEstados] = None,
+    heuristica_precalculada: Optional[Callable[[EstadoCompacto], float]] = None
+):
     """
     Implementa el algoritmo A*.
+    Los estados se representan como enteros compactos (ver `EspacioEstados`).
+    `modo_heuristica` elige la heurística (ver `construir_heuristica`) y
+    `frontera` la cola de prioridad ("monticulo" o "cubetas", ver `crear_frontera`).
+    Con `poda_dominancia` se descartan los estados dominados en costo y
+    combustible (ver `DominanciaCombustible`); el resultado incluye entonces
+    `podados_dominancia`.
+    Límites y cancelación: ver `Presupuesto`. `observador` recibe los eventos
+    de la búsqueda (ver `Observador`).
+    `espacio` y `heuristica_precalculada` permiten reutilizar el mundo compilado
+    y la heurística de otra búsqueda sobre el mismo mundo (ver `SesionMundo`);
+    en ese caso `modo_heuristica` se ignora.
     """
     tiempo_inicio = time.perf_counter()
-
-    estado_inicial = empaquetar_estado(posicion_inicio, muestras_objetivo, False, 0, False)
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    if espacio is None:
+        espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_objetivo))
+    h = heuristica_precalculada or construir_heuristica(espacio, modo_heuristica)
+    generar_vecinos = espacio.generar_vecinos
+    nodos_por_explorar = crear_frontera(frontera)
+    if observador is not None:
+        observador.al_iniciar(espacio, h)
+        h = observador.cronometrar("heuristica", h)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        nodos_por_explorar = FronteraInstrumentada(nodos_por_explorar, observador)
+    estado_inicial = espacio.estado_inicial(posicion_inicio)
     costo_g = {estado_inicial: 0.0}
-    heuristica_inicial = heuristica(posicion_inicio, posicion_nave, muestras_objetivo)
-    nodos_por_explorar = [(heuristica_inicial, heuristica_inicial, 0, estado_inicial)]
+    heuristica_inicial = h(estado_inicial)
+    nodos_por_explorar.insertar(estado_inicial, heuristica_inicial, heuristica_inicial, 0)
 
     diccionario_padres = {}
     visitados = set()
     nodos_expandidos = 0
+    max_frontera = 1
+    dominancia = DominanciaCombustible() if poda_dominancia else None
+    extra = {}
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costo_g": len(costo_g), "padres": len(diccionario_padres), "visitados": len(visitados)})
 
     while nodos_por_explorar:
-        f_actual, h_actual, _, estado_actual = heapq.heappop(nodos_por_explorar)
+        if len(nodos_por_explorar) > max_frontera:
+            max_frontera = len(nodos_por_explorar)
+        if dominancia is not None:
+            extra["podados_dominancia"] = dominancia.podados
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costo_g, diccionario_padres), **extra))
+
+        f_actual, estado_actual = nodos_por_explorar.extraer()
 
         if estado_actual in visitados:
+            if observador is not None:
+                observador.al_descartar(estado_actual)
             continue
+        if dominancia is not None:
+            # Un estado dominante pudo expandirse después de insertar este
+            if dominancia.dominado(estado_actual, costo_g[estado_actual]):
+                continue
+            dominancia.registrar(estado_actual, costo_g[estado_actual])
         visitados.add(estado_actual)
         nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_actual, costo_g[estado_actual], diccionario_padres.get(estado_actual))
+
+        if espacio.es_meta(estado_actual):
+            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costo_g, espacio)
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera, **extra))
 
-        posicion_actual, muestras_restantes, en_nave, combustible, nave_usada = desempaquetar_estado(estado_actual)
-
-        if not muestras_restantes:
-            tiempo_total = time.perf_counter() - tiempo_inicio
-            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costo_g)
-            costo_por_camino = list(zip(camino, costos))
-            return {
-                "exito": True,
-                "camino con costo": costo_por_camino,
-                "camino": camino,
-                "costo_total": costo_g[estado_actual],
-                "nodos_expandidos": nodos_expandidos,
-                "profundidad": len(camino) - 1,
-                "tiempo": tiempo_total
-            }
-
-        for estado_vecino, costo_mov in generar_estados_vecinos(estado_actual, mapa, posicion_nave):
+        for estado_vecino, costo_mov in generar_vecinos(estado_actual):
             nuevo_costo_g = costo_g[estado_actual] + costo_mov
+            if observador is not None:
+                observador.al_generar(estado_vecino, nuevo_costo_g)
 
             if estado_vecino not in costo_g or nuevo_costo_g < costo_g[estado_vecino]:
+                if dominancia is not None and dominancia.dominado(estado_vecino, nuevo_costo_g):
+                    if observador is not None:
+                        observador.al_podar(estado_vecino)
+                    continue
                 costo_g[estado_vecino] = nuevo_costo_g
                 diccionario_padres[estado_vecino] = estado_actual
 
-                posicion_vecina, muestras_vecinas, en_nave_vecina, combustible_vecino, nave_usada_vecina = desempaquetar_estado(estado_vecino)
-                heuristica_vecina = heuristica(posicion_vecina, posicion_nave, muestras_vecinas)
-                
+                heuristica_vecina = h(estado_vecino)
 
-                heapq.heappush(nodos_por_explorar, (nuevo_costo_g + heuristica_vecina, heuristica_vecina, nodos_expandidos, estado_vecino))
+                nodos_por_explorar.insertar(estado_vecino, nuevo_costo_g + heuristica_vecina, heuristica_vecina, nodos_expandidos)
+            elif observador is not None:
+                observador.al_duplicado(estado_vecino)
 
-    return {"exito": False}
+    return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costo_g, diccionario_padres), **extra))
@@ -1,123 +1,273 @@
+import functools
 import heapq
 import time
-from typing import Tuple, Set, List, Dict
-from algoritmos.astar import (
-    heuristica,
-    empaquetar_estado,
-    generar_estados_vecinos as generar_vecinos,
-)
+from typing import Tuple, Set, List, Dict, Optional
+from algoritmos.astar import construir_heuristica, reconstruir_camino
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, HAZ_AGOTADO, mejor_parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+from helpers.mundo import Grid, compilar_mundo
 
 Coordenada = Tuple[int, int]
-Estado = Tuple[Coordenada, Tuple[Tuple[int, int], ...], bool, int, bool]
-# Un estado contiene:
-#   - posicion_actual: (fila, columna)
-#   - muestras_restantes: conjunto ordenado de posiciones
-#   - en_nave: True/False
-#   - combustible: movimientos restantes de la nave
-#   - nave_usada: True si ya se recogió/usó la nave
+Estado = EstadoCompacto
+# Un estado es un entero compacto con posición, muestras restantes (máscara),
+# en_nave, combustible y nave_usada (ver `EspacioEstados`).
 
-
-def reconstruir_camino(diccionario_padres: Dict[Estado, Estado], estado_meta: Estado) -> List[Coordenada]:
-    """
-    Reconstruye el camino completo desde el estado inicial hasta el estado meta
-    usando el diccionario de padres (rastro inverso).
-    """
-    camino = []
-    estado_actual = estado_meta
-
-
-    while estado_actual in diccionario_padres:
-        camino.append(estado_actual[0])
-        estado_actual = diccionario_padres[estado_actual]
-
-    camino.append(estado_actual[0])
-    camino.reverse()
-    return camino
+MODOS_HAZ = ("capa", "total")
+# Expansiones máximas de la búsqueda por haz cuando no se indica `limite_nodos`
+LIMITE_NODOS_HAZ = 1_000_000
 
 
 def busqueda_avara(
-    mapa: List[List[int]],
+    mapa: Grid,
     posicion_inicial: Coordenada,
     posicion_nave: Coordenada,
-    muestras_iniciales: Set[Coordenada]
+    muestras_iniciales: Set[Coordenada],
+    modo_heuristica: str = "manhattan",
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None,
+    ancho_haz: Optional[int] = None,
+    modo_haz: str = "capa"
 ):
     """
     Implementa el algoritmo de búsqueda Avara.
-    Utiliza la heurística proporcionada.
+    Utiliza la heurística indicada por `modo_heuristica` (ver `construir_heuristica`).
 
     Retorna un diccionario con la información del resultado:
     - exito: True si encontró todas las muestras
     - camino: lista de coordenadas desde el inicio hasta la meta
+    - camino con costo: pares (coordenada, costo acumulado)
     - costo_total: costo acumulado del camino (solo informativo aquí)
     - nodos_expandidos: cantidad de nodos que se analizaron
     - profundidad: longitud del camino
     - tiempo: duración de la ejecución
     - max_frontera: tamaño máximo alcanzado por la frontera
+
+    Límites y cancelación: ver `Presupuesto`. `observador` recibe los eventos
+    de la búsqueda (ver `Observador`).
+
+    Con `ancho_haz` = K la búsqueda es por haz (ver `busqueda_haz`): la frontera
+    queda acotada por K y las expansiones por `limite_nodos`, a cambio de poder
+    no encontrar un plan que existe (`motivo` "haz_agotado").
     """
+    if ancho_haz is not None:
+        return busqueda_haz(
+            mapa, posicion_inicial, posicion_nave, muestras_iniciales, ancho_haz, modo_haz, modo_heuristica,
+            limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion, observador
+        )
 
     tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
 
 
-    estado_inicial = empaquetar_estado(posicion_inicial, muestras_iniciales, False, 0, False)
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    h = construir_heuristica(espacio, modo_heuristica)
+    generar_vecinos = espacio.generar_vecinos
+    insertar, extraer = heapq.heappush, heapq.heappop
+    if observador is not None:
+        observador.al_iniciar(espacio, h)
+        h = observador.cronometrar("heuristica", h)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        insertar = observador.cronometrar("cola", insertar)
+        extraer = observador.cronometrar("cola", extraer)
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
 
     
     nodos_por_explorar: List[Tuple[float, int, Estado]] = []
     contador_expansiones = 0
 
-    heuristica_inicial = heuristica(posicion_inicial, posicion_nave, muestras_iniciales)
+    heuristica_inicial = h(estado_inicial)
     heapq.heappush(nodos_por_explorar, (heuristica_inicial, contador_expansiones, estado_inicial))
 
     diccionario_padres: Dict[Estado, Estado] = {}
     conjunto_visitados = set()
     nodos_expandidos = 0
     costos_acumulados: Dict[Estado, float] = {estado_inicial: 0.0}
-  
+    max_frontera = 1
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costos": len(costos_acumulados), "padres": len(diccionario_padres), "visitados": len(conjunto_visitados)})
 
-    while nodos_por_explorar:     
+    while nodos_por_explorar:
+        if len(nodos_por_explorar) > max_frontera:
+            max_frontera = len(nodos_por_explorar)
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres)))
 
-        heuristica_actual, _, estado_actual = heapq.heappop(nodos_por_explorar)
+        heuristica_actual, _, estado_actual = extraer(nodos_por_explorar)
 
         if estado_actual in conjunto_visitados:
+            if observador is not None:
+                observador.al_descartar(estado_actual)
             continue
 
         conjunto_visitados.add(estado_actual)
         nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_actual, costos_acumulados[estado_actual], diccionario_padres.get(estado_actual))
 
-        posicion_actual, muestras_restantes_tupla, en_nave, combustible, nave_usada = estado_actual
-        muestras_restantes = set(muestras_restantes_tupla)
+        if espacio.es_meta(estado_actual):
+            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costos_acumulados, espacio)
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera))
 
-        if not muestras_restantes:
-            tiempo_total = time.perf_counter() - tiempo_inicio
-            camino = reconstruir_camino(diccionario_padres, estado_actual)
-            profundidad = len(camino) - 1
-
-            return {
-                "exito": True,
-                "camino": camino,
-                "costo_total": costos_acumulados[estado_actual],
-                "nodos_expandidos": nodos_expandidos,
-                "profundidad": profundidad,
-                "tiempo": tiempo_total
-            }
-
-        for estado_vecino, costo_movimiento in generar_vecinos(estado_actual, mapa, posicion_nave):
+        for estado_vecino, costo_movimiento in generar_vecinos(estado_actual):
             costo_acumulado_nuevo = costos_acumulados[estado_actual] + costo_movimiento
+            if observador is not None:
+                observador.al_generar(estado_vecino, costo_acumulado_nuevo)
 
             # Actualizar si encontramos un camino más barato hacia ese estado
             if estado_vecino not in costos_acumulados or costo_acumulado_nuevo < costos_acumulados[estado_vecino]:
                 costos_acumulados[estado_vecino] = costo_acumulado_nuevo
                 diccionario_padres[estado_vecino] = estado_actual
+            elif observador is not None:
+                observador.al_duplicado(estado_vecino)
 
             # Calcular heurística del vecino (solo se usa h)
-            posicion_vecina, muestras_vecinas, _, _, _ = estado_vecino
-            heuristica_vecina = heuristica(posicion_vecina, posicion_nave, set(muestras_vecinas))
+            heuristica_vecina = h(estado_vecino)
 
             contador_expansiones += 1
-            heapq.heappush(nodos_por_explorar, (heuristica_vecina, contador_expansiones, estado_vecino))
-
-    tiempo_total = time.perf_counter() - tiempo_inicio
-    return {
-        "exito": False,
-        "tiempo": tiempo_total,
-        "nodos_expandidos": nodos_expandidos
-    }
\ No newline at end of file
+            insertar(nodos_por_explorar, (heuristica_vecina, contador_expansiones, estado_vecino))
+            if observador is not None:
+                observador.al_insertar(estado_vecino, heuristica_vecina)
+
+    return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres)))
+
+def busqueda_haz(
+    mapa: Grid,
+    posicion_inicial: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_iniciales: Set[Coordenada],
+    ancho_haz: int,
+    modo_haz: str = "capa",
+    modo_heuristica: str = "manhattan",
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
+):
+    """
+    Búsqueda por haz con la misma heurística y generación de vecinos que la
+    búsqueda Avara:
+
+    - modo "capa": se avanza por profundidades y de cada capa solo se conservan
+      los `ancho_haz` sucesores de menor h (a igualdad, de menor costo)
+    - modo "total": búsqueda avara cuya frontera se recorta a los `ancho_haz`
+      mejores cada vez que llega al doble
+
+    Los duplicados se detectan solo contra el haz actual y los estados ya
+    expandidos: un sucesor que está en el haz solo actualiza su padre si llega
+    por un camino más barato, y uno que el haz descartó antes puede volver a
+    entrar. Solo se guardan costo y padre de los expandidos y del haz, así que
+    la memoria es proporcional a los nodos expandidos más `ancho_haz` por el
+    factor de ramificación; los límites siguen `Presupuesto` y, sin
+    `limite_nodos`, se usa `LIMITE_NODOS_HAZ` expansiones como techo. El plan no es óptimo y, si el haz descarta todos
+    los caminos a la meta, la búsqueda termina sin éxito con `motivo`
+    "haz_agotado". Devuelve el mismo diccionario que `busqueda_avara`, con
+    `ancho_haz`.
+    """
+    if ancho_haz < 1:
+        raise ValueError(f"ancho_haz debe ser al menos 1: {ancho_haz}")
+    if modo_haz not in MODOS_HAZ:
+        raise ValueError(f"Modo de haz desconocido: {modo_haz}")
+    if limite_nodos is None:
+        limite_nodos = LIMITE_NODOS_HAZ
+
+    tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    h = construir_heuristica(espacio, modo_heuristica)
+    generar_vecinos = espacio.generar_vecinos
+    if observador is not None:
+        observador.al_iniciar(espacio, h)
+        h = observador.cronometrar("heuristica", h)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
+
+    # Solo de los estados expandidos y de los que están en el haz
+    diccionario_padres: Dict[Estado, Estado] = {}
+    costos_acumulados: Dict[Estado, float] = {estado_inicial: 0.0}
+    expandidos = set()
+    nodos_expandidos = 0
+    contador = 0
+    # Entradas (h, costo, contador, estado); en modo "capa" es la capa actual
+    frontera: List[Tuple[float, float, int, Estado]] = [(h(estado_inicial), 0.0, 0, estado_inicial)]
+    max_frontera = 1
+    extra = {"ancho_haz": ancho_haz}
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costos": len(costos_acumulados), "padres": len(diccionario_padres), "expandidos": len(expandidos)})
+
+    def descartar(entradas: List[Tuple[float, float, int, Estado]]) -> None:
+        """Olvida los estados que salen del haz sin expandirse, para que puedan volver a generarse."""
+        for _, _, _, estado in entradas:
+            del costos_acumulados[estado]
+            diccionario_padres.pop(estado, None)
+
+    def expandir(estado: Estado) -> Optional[dict]:
+        """Expande `estado`; devuelve el resultado si es meta y deja sus sucesores nuevos en `nuevos`."""
+        nonlocal nodos_expandidos, contador
+        expandidos.add(estado)
+        nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado, costos_acumulados[estado], diccionario_padres.get(estado))
+        if espacio.es_meta(estado):
+            camino, costos = reconstruir_camino(diccionario_padres, estado, costos_acumulados, espacio)
+            return resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera, **extra)
+
+        for estado_vecino, costo_movimiento in generar_vecinos(estado):
+            costo_acumulado_nuevo = costos_acumulados[estado] + costo_movimiento
+            if observador is not None:
+                observador.al_generar(estado_vecino, costo_acumulado_nuevo)
+            if estado_vecino in costos_acumulados:
+                # En el haz o ya expandido: no se inserta otra vez, solo se abarata si sigue en el haz
+                if costo_acumulado_nuevo < costos_acumulados[estado_vecino] and estado_vecino not in expandidos:
+                    costos_acumulados[estado_vecino] = costo_acumulado_nuevo
+                    diccionario_padres[estado_vecino] = estado
+                elif observador is not None:
+                    observador.al_duplicado(estado_vecino)
+                continue
+            costos_acumulados[estado_vecino] = costo_acumulado_nuevo
+            diccionario_padres[estado_vecino] = estado
+            contador += 1
+            nuevos.append((h(estado_vecino), costo_acumulado_nuevo, contador, estado_vecino))
+            if observador is not None:
+                observador.al_insertar(estado_vecino, nuevos[-1][0])
+        return None
+
+    while frontera:
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres), **extra))
+
+        nuevos: List[Tuple[float, float, int, Estado]] = []
+        if modo_haz == "capa":
+            # La capa se expande en orden de h, así que la primera meta es la de menor h
+            for _, _, _, estado in sorted(frontera):
+                resultado = expandir(estado)
+                if resultado is not None:
+                    return terminar(resultado)
+            # El costo guardado puede haber bajado después de crear la entrada
+            nuevos = [(h_vecino, costos_acumulados[estado], orden, estado) for h_vecino, _, orden, estado in nuevos]
+            if len(nuevos) > ancho_haz:
+                nuevos.sort()
+                descartar(nuevos[ancho_haz:])
+                del nuevos[ancho_haz:]
+            frontera = nuevos
+        else:
+            _, _, _, estado = heapq.heappop(frontera)
+            resultado = expandir(estado)
+            if resultado is not None:
+                return terminar(resultado)
+            for entrada in nuevos:
+                heapq.heappush(frontera, entrada)
+            if len(frontera) >= 2 * ancho_haz:
+                frontera.sort()
+                descartar(frontera[ancho_haz:])
+                del frontera[ancho_haz:]
+        max_frontera = max(max_frontera, len(frontera))
+
+    return terminar(resultado_sin_exito(HAZ_AGOTADO, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costos_acumulados, diccionario_padres), **extra))
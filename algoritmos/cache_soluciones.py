@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from algoritmos import ALGORITMOS
+from algoritmos.limites import SIN_SOLUCION, LIMITE_NODOS
+from helpers.mundo import Grid
+
+Coordenada = Tuple[int, int]
+
+# Cambiar al modificar un algoritmo de forma que cambien sus resultados: las
+# entradas guardadas con otra versión dejan de coincidir
+VERSION_CACHE = 1
+# Motivos de fracaso que no dependen del reloj ni de la máquina y se pueden guardar
+MOTIVOS_DETERMINISTAS = (SIN_SOLUCION, LIMITE_NODOS)
+# Opciones con objetos en vivo: una llamada que las use no pasa por la cache
+OPCIONES_NO_CACHEABLES = ("observador", "cancelacion", "al_mejorar", "espacio", "heuristica_precalculada")
+# Claves del resultado con posiciones, que se transforman con la simetría
+CLAVES_POSICIONES = ("camino", "camino_parcial")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS soluciones (
+    clave TEXT PRIMARY KEY,
+    algoritmo TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    tamano INTEGER NOT NULL,
+    creado REAL NOT NULL,
+    usado REAL NOT NULL,
+    usos INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS soluciones_usado ON soluciones (usado);
+"""
+
+
+def simetrias(alto: int, ancho: int) -> List[np.ndarray]:
+    """
+    Las 8 rotaciones y reflexiones de una cuadrícula alto x ancho, cada una como
+    la cuadrícula transformada de índices originales (`fila * ancho + col`):
+    la celda (f, c) del mundo transformado es la celda `indices[f, c]` del original.
+    """
+    indices = np.arange(alto * ancho, dtype=np.int64).reshape(alto, ancho)
+    transformadas = []
+    for giros in range(4):
+        rotada = np.rot90(indices, giros)
+        transformadas.append(rotada)
+        transformadas.append(rotada.T)
+    return transformadas
+
+
+class CacheSoluciones:
+    """
+    Cache persistente de resultados en SQLite, indexada por un hash del
+    contenido del mundo (mapa, inicio, nave, muestras), del algoritmo y de sus
+    opciones.
+
+    - canonizar: el mundo se lleva a la menor (por hash) de sus 8 rotaciones y
+      reflexiones antes de buscar o resolver, de modo que mundos simétricos
+      comparten entrada. El camino se guarda en la orientación canónica y se
+      devuelve transformado a la del mundo consultado. El costo no cambia con
+      la simetría, pero en algoritmos con empates (amplitud, avara,
+      profundidad) el camino puede diferir del que daría la orientación original.
+    - max_entradas / max_bytes: al superarse se eliminan las entradas usadas
+      hace más tiempo (LRU).
+
+    La base usa el modo WAL, así que varios procesos pueden leer y escribir a la
+    vez; cada proceso abre su propia conexión. Solo se guardan los éxitos y los
+    fracasos deterministas (`MOTIVOS_DETERMINISTAS`); un resultado interrumpido
+    por tiempo, memoria o cancelación se vuelve a calcular la próxima vez.
+    """
+
+    def __init__(self, ruta: str, max_entradas: Optional[int] = 100_000, max_bytes: Optional[int] = None, canonizar: bool = False):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.canonizar = canonizar
+        self.aciertos = 0
+        self.fallos = 0
+        self._conexion: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    def conexion(self) -> sqlite3.Connection:
+        # Una conexión SQLite no se puede compartir entre procesos: tras un fork se abre otra
+        if self._conexion is None or self._pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(ESQUEMA)
+            self._conexion, self._pid = conexion, os.getpid()
+        return self._conexion
+
+    def cerrar(self) -> None:
+        if self._conexion is not None and self._pid == os.getpid():
+            self._conexion.close()
+        self._conexion = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    @staticmethod
+    def clave(nombre: str, mapa: Grid, inicio: Coordenada, nave: Optional[Coordenada], muestras: Set[Coordenada], opciones: dict) -> str:
+        """Hash (hexadecimal) del mundo, el algoritmo y las opciones."""
+        mapa = np.ascontiguousarray(mapa, dtype=np.uint8)
+        resumen = hashlib.blake2b(digest_size=20)
+        resumen.update(f"v{VERSION_CACHE}|{nombre}|{mapa.shape}|".encode())
+        resumen.update(mapa.tobytes())
+        descripcion = [list(inicio), list(nave) if nave else None, sorted(list(m) for m in muestras), opciones]
+        resumen.update(json.dumps(descripcion, sort_keys=True, default=repr).encode())
+        return resumen.hexdigest()
+
+    def obtener(self, clave: str) -> Optional[dict]:
+        conexion = self.conexion()
+        fila = conexion.execute("SELECT resultado FROM soluciones WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            return None
+        conexion.execute("UPDATE soluciones SET usado = ?, usos = usos + 1 WHERE clave = ?", (time.time(), clave))
+        return json.loads(fila[0])
+
+    def guardar(self, clave: str, nombre: str, resultado: dict) -> None:
+        datos = json.dumps(resultado, default=sorted)
+        ahora = time.time()
+        conexion = self.conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            conexion.execute(
+                "INSERT OR REPLACE INTO soluciones (clave, algoritmo, resultado, tamano, creado, usado) VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, nombre, datos, len(datos), ahora, ahora),
+            )
+            self._desalojar(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _desalojar(self, conexion: sqlite3.Connection) -> None:
+        """Elimina las entradas menos usadas hasta cumplir `max_entradas` y `max_bytes`."""
+        entradas, total = conexion.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM soluciones").fetchone()
+        sobran = entradas - self.max_entradas if self.max_entradas is not None else 0
+        exceso = total - self.max_bytes if self.max_bytes is not None else 0
+        if sobran <= 0 and exceso <= 0:
+            return
+        eliminar = []
+        for clave, tamano in conexion.execute("SELECT clave, tamano FROM soluciones ORDER BY usado"):
+            if sobran <= 0 and exceso <= 0:
+                break
+            eliminar.append((clave,))
+            sobran -= 1
+            exceso -= tamano
+        conexion.executemany("DELETE FROM soluciones WHERE clave = ?", eliminar)
+
+    def resolver(self, nombre: str, mapa: Grid, inicio: Coordenada, nave: Optional[Coordenada], muestras: Set[Coordenada], **opciones) -> dict:
+        """
+        Igual que `ALGORITMOS[nombre](mapa, inicio, nave, muestras, **opciones)`,
+        pero consulta antes la cache. Un resultado obtenido de la cache lleva
+        `desde_cache = True` y conserva el `tiempo` de la búsqueda original.
+        """
+        algoritmo = ALGORITMOS[nombre]
+        if any(opciones.get(opcion) is not None for opcion in OPCIONES_NO_CACHEABLES):
+            return algoritmo(mapa, inicio, nave, muestras, **opciones)
+
+        mapa = np.asarray(mapa, dtype=np.uint8)
+        ancho = mapa.shape[1]
+        indices = None
+        if self.canonizar:
+            indices, mapa, inicio, nave, muestras, clave = self._canonico(nombre, mapa, inicio, nave, muestras, opciones)
+        else:
+            clave = self.clave(nombre, mapa, inicio, nave, muestras, opciones)
+
+        resultado = self.obtener(clave)
+        if resultado is not None:
+            self.aciertos += 1
+            resultado["desde_cache"] = True
+            restaurar_posiciones(resultado)
+        else:
+            self.fallos += 1
+            resultado = algoritmo(mapa, inicio, nave, muestras, **opciones)
+            if resultado["exito"] or resultado["motivo"] in MOTIVOS_DETERMINISTAS:
+                self.guardar(clave, nombre, resultado)
+
+        if indices is not None:
+            resultado = transformar_resultado(resultado, indices, ancho)
+        return resultado
+
+    def funcion(self, nombre: str) -> Callable[..., dict]:
+        """Función con la firma de `ALGORITMOS[nombre]` que pasa por la cache."""
+        def resolver(mapa, inicio, nave, muestras, **opciones):
+            return self.resolver(nombre, mapa, inicio, nave, muestras, **opciones)
+        resolver.__name__ = f"{ALGORITMOS[nombre].__name__}_en_cache"
+        return resolver
+
+    def _canonico(self, nombre, mapa, inicio, nave, muestras, opciones):
+        """Entre las 8 simetrías del mundo, la de menor clave: (indices, mapa, inicio, nave, muestras, clave)."""
+        alto, ancho = mapa.shape
+        mejor = None
+        for indices in simetrias(alto, ancho):
+            # Posición en el mundo transformado de cada celda original
+            nueva_posicion = np.empty((alto * ancho, 2), dtype=np.int64)
+            nueva_posicion[indices.ravel()] = np.argwhere(np.ones(indices.shape, dtype=bool))
+
+            def mover(pos: Coordenada) -> Coordenada:
+                fila, col = nueva_posicion[pos[0] * ancho + pos[1]]
+                return int(fila), int(col)
+
+            mapa_t = np.ascontiguousarray(mapa.ravel()[indices])
+            inicio_t = mover(inicio)
+            nave_t = mover(nave) if nave else None
+            muestras_t = {mover(muestra) for muestra in muestras}
+            clave = self.clave(nombre, mapa_t, inicio_t, nave_t, muestras_t, opciones)
+            if mejor is None or clave < mejor[-1]:
+                mejor = (indices, mapa_t, inicio_t, nave_t, muestras_t, clave)
+        return mejor
+
+    def estadisticas(self) -> dict:
+        entradas, total = self.conexion().execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM soluciones").fetchone()
+        return {"entradas": entradas, "bytes": total, "aciertos": self.aciertos, "fallos": self.fallos}
+
+    def vaciar(self) -> None:
+        self.conexion().execute("DELETE FROM soluciones")
+
+
+def restaurar_posiciones(resultado: dict) -> None:
+    """JSON guarda las tuplas como listas: devuelve las posiciones a tuplas (se modifica)."""
+    for clave in CLAVES_POSICIONES:
+        if clave in resultado:
+            resultado[clave] = [tuple(pos) for pos in resultado[clave]]
+    if "camino con costo" in resultado:
+        resultado["camino con costo"] = [(tuple(pos), costo) for pos, costo in resultado["camino con costo"]]
+
+
+def transformar_resultado(resultado: dict, indices: np.ndarray, ancho: int) -> dict:
+    """
+    Lleva las posiciones de un resultado del mundo transformado por `indices`
+    (ver `simetrias`) al mundo original de ancho `ancho`.
+    """
+    def original(pos: Coordenada) -> Coordenada:
+        return divmod(int(indices[pos]), ancho)
+
+    resultado = dict(resultado)
+    for clave in CLAVES_POSICIONES:
+        if clave in resultado:
+            resultado[clave] = [original(pos) for pos in resultado[clave]]
+    if "camino con costo" in resultado:
+        resultado["camino con costo"] = [(original(pos), costo) for pos, costo in resultado["camino con costo"]]
+    return resultado
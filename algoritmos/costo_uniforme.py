@@ -1,65 +1,108 @@
-import heapq
+import functools
 import time
-from typing import Tuple, Set, List, Dict
-from algoritmos.astar import empaquetar_estado, generar_estados_vecinos, reconstruir_camino
+from typing import Tuple, Set, Dict, Optional
+from algoritmos.astar import reconstruir_camino
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.frontera import crear_frontera
+from algoritmos.dominancia import DominanciaCombustible
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, mejor_parcial, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador, FronteraInstrumentada
+from helpers.mundo import Grid, compilar_mundo
 
 Coordenada = Tuple[int, int]
-# Estado ahora incluye el flag `nave_usada` (bool) como quinto elemento
-Estado = Tuple[Coordenada, Tuple[Tuple[int, int], ...], bool, int, bool]
+Estado = EstadoCompacto
 
 
 def busqueda_costo_uniforme(
-    mapa: List[List[int]],
+    mapa: Grid,
     posicion_inicial: Coordenada,
     posicion_nave: Coordenada,
-    muestras_iniciales: Set[Coordenada]
+    muestras_iniciales: Set[Coordenada],
+    frontera: str = "monticulo",
+    poda_dominancia: bool = False,
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
 ):
     """
     Implementación del algoritmo de costo uniforme (UCS).
     Similar a A* pero sin heurística (h=0).
+    `frontera` elige la cola de prioridad ("monticulo" o "cubetas", ver `crear_frontera`).
+    Con `poda_dominancia` se descartan los estados dominados en costo y
+    combustible (ver `DominanciaCombustible`); el resultado incluye entonces
+    `podados_dominancia`.
+    Límites y cancelación: ver `Presupuesto`. `observador` recibe los eventos
+    de la búsqueda (ver `Observador`).
     """
     tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
 
-    estado_inicial = empaquetar_estado(posicion_inicial, muestras_iniciales, False, 0, False)
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
     costo_g: Dict[Estado, float] = {estado_inicial: 0.0}
-    nodos_por_explorar = [(0.0, 0, estado_inicial)]
+    generar_vecinos = espacio.generar_vecinos
+    nodos_por_explorar = crear_frontera(frontera)
+    if observador is not None:
+        observador.al_iniciar(espacio)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        nodos_por_explorar = FronteraInstrumentada(nodos_por_explorar, observador)
+    nodos_por_explorar.insertar(estado_inicial, 0.0, 0)
     diccionario_padres: Dict[Estado, Estado] = {}
     visitados = set()
     nodos_expandidos = 0
     contador = 0
+    max_frontera = 1
+    dominancia = DominanciaCombustible() if poda_dominancia else None
+    extra = {}
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"costo_g": len(costo_g), "padres": len(diccionario_padres), "visitados": len(visitados)})
 
     while nodos_por_explorar:
-        costo_actual, _, estado_actual = heapq.heappop(nodos_por_explorar)
+        if len(nodos_por_explorar) > max_frontera:
+            max_frontera = len(nodos_por_explorar)
+        if dominancia is not None:
+            extra["podados_dominancia"] = dominancia.podados
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costo_g, diccionario_padres), **extra))
+
+        costo_actual, estado_actual = nodos_por_explorar.extraer()
 
         if estado_actual in visitados:
+            if observador is not None:
+                observador.al_descartar(estado_actual)
             continue
+        if dominancia is not None:
+            # Un estado dominante pudo expandirse después de insertar este
+            if dominancia.dominado(estado_actual, costo_g[estado_actual]):
+                continue
+            dominancia.registrar(estado_actual, costo_g[estado_actual])
         visitados.add(estado_actual)
         nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_actual, costo_g[estado_actual], diccionario_padres.get(estado_actual))
 
-        posicion_actual, muestras_restantes_tupla, en_nave, combustible, nave_usada = estado_actual
-        muestras_restantes = set(muestras_restantes_tupla)
-
-        if not muestras_restantes:
-            tiempo_total = time.perf_counter() - tiempo_inicio
-            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costo_g)
-            costo_por_camino = list(zip(camino, costos))
-            return {
-                "exito": True,
-                "camino con costo": costo_por_camino,
-                "camino": camino,
-                "costo_total": costo_g[estado_actual],
-                "nodos_expandidos": nodos_expandidos,
-                "profundidad": len(camino) - 1,
-                "tiempo": tiempo_total,
-            }
+        if espacio.es_meta(estado_actual):
+            camino, costos = reconstruir_camino(diccionario_padres, estado_actual, costo_g, espacio)
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera, **extra))
 
-        for estado_vecino, costo_mov in generar_estados_vecinos(estado_actual, mapa, posicion_nave):
+        for estado_vecino, costo_mov in generar_vecinos(estado_actual):
             nuevo_costo = costo_g[estado_actual] + costo_mov
+            if observador is not None:
+                observador.al_generar(estado_vecino, nuevo_costo)
 
             if estado_vecino not in costo_g or nuevo_costo < costo_g[estado_vecino]:
+                if dominancia is not None and dominancia.dominado(estado_vecino, nuevo_costo):
+                    if observador is not None:
+                        observador.al_podar(estado_vecino)
+                    continue
                 costo_g[estado_vecino] = nuevo_costo
                 diccionario_padres[estado_vecino] = estado_actual
                 contador += 1
-                heapq.heappush(nodos_por_explorar, (nuevo_costo, contador, estado_vecino))
+                nodos_por_explorar.insertar(estado_vecino, nuevo_costo, contador)
+            elif observador is not None:
+                observador.al_duplicado(estado_vecino)
 
-    return {"exito": False, "nodos_expandidos": nodos_expandidos, "tiempo": time.perf_counter() - tiempo_inicio}
+    return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, mejor_parcial(espacio, costo_g, diccionario_padres), **extra))
@@ -0,0 +1,48 @@
+from typing import Dict, List, Tuple
+from algoritmos.espacio_estados import EstadoCompacto, BITS_COMBUSTIBLE, DESPLAZAMIENTO_COMBUSTIBLE, DESPLAZAMIENTO_CELDA
+
+
+class DominanciaCombustible:
+    """
+    Poda por dominancia de Pareto sobre (costo, combustible).
+
+    Dos estados con la misma celda, las mismas muestras restantes y el mismo
+    `nave_usada` solo difieren en el combustible efectivo (el combustible si
+    está en la nave, 0 si va a pie). Si uno ya expandido tiene costo menor o
+    igual y combustible mayor o igual, cualquier plan desde el otro se puede
+    repetir desde él sin costar más, así que el otro se descarta.
+
+    Para cada clave se guarda el frente de Pareto de los (g, combustible)
+    expandidos; `podados` cuenta los estados descartados.
+    """
+
+    def __init__(self):
+        self._frentes: Dict[int, List[Tuple[float, int]]] = {}
+        self.podados = 0
+
+    @staticmethod
+    def clave_y_combustible(estado: EstadoCompacto) -> Tuple[int, int]:
+        clave = (estado >> DESPLAZAMIENTO_CELDA) << 1 | (estado & 1)
+        combustible = (estado >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1) if estado & 2 else 0
+        return clave, combustible
+
+    def dominado(self, estado: EstadoCompacto, costo: float) -> bool:
+        """True (y cuenta la poda) si un estado expandido domina a `estado` con costo `costo`."""
+        clave, combustible = self.clave_y_combustible(estado)
+        frente = self._frentes.get(clave)
+        if frente is not None:
+            for costo_previo, combustible_previo in frente:
+                if costo_previo <= costo and combustible_previo >= combustible:
+                    self.podados += 1
+                    return True
+        return False
+
+    def registrar(self, estado: EstadoCompacto, costo: float) -> None:
+        """Añade un estado expandido al frente y quita los que pasa a dominar."""
+        clave, combustible = self.clave_y_combustible(estado)
+        frente = self._frentes.get(clave)
+        if frente is None:
+            self._frentes[clave] = [(costo, combustible)]
+            return
+        frente[:] = [(c, f) for c, f in frente if not (costo <= c and combustible >= f)]
+        frente.append((costo, combustible))
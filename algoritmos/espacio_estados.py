@@ -0,0 +1,122 @@
+from typing import Tuple, Set, List
+from helpers.mundo import MundoCompilado
+
+
+Coordenada = Tuple[int, int]
+# Un estado compacto es un único entero con los campos empaquetados por bits:
+#   - bit 0: nave_usada
+#   - bit 1: en_nave
+#   - bits 2..6: combustible (0..20)
+#   - bits 7..: índice de celda (fila * ancho + columna)
+#   - bits superiores: máscara de muestras restantes (bit i = muestra i pendiente)
+# Con la máscara en los bits altos, un estado es meta si y solo si es menor que
+# `1 << desplazamiento_mascara`.
+EstadoCompacto = int
+
+BITS_COMBUSTIBLE = 5
+DESPLAZAMIENTO_COMBUSTIBLE = 2
+DESPLAZAMIENTO_CELDA = DESPLAZAMIENTO_COMBUSTIBLE + BITS_COMBUSTIBLE
+COMBUSTIBLE_NAVE = 20
+
+
+class EspacioEstados:
+    """
+    Codificación de estados como enteros sobre un `MundoCompilado`.
+
+    Los índices de las muestras se asignan una sola vez por mundo (al compilarlo),
+    de modo que las muestras restantes se representan con una máscara de bits en
+    lugar de una tupla ordenada.
+    """
+
+    def __init__(self, mundo: MundoCompilado):
+        self.mundo = mundo
+        self.ancho = mundo.ancho
+        self.muestras: List[Coordenada] = mundo.muestras
+        self.posicion_nave = mundo.posicion(mundo.celda_nave) if mundo.celda_nave >= 0 else None
+
+        bits_celda = max(1, (mundo.alto * mundo.ancho - 1).bit_length())
+        self.mascara_celda = (1 << bits_celda) - 1
+        self.desplazamiento_mascara = DESPLAZAMIENTO_CELDA + bits_celda
+        self.limite_meta = 1 << self.desplazamiento_mascara
+
+    def empaquetar(self, posicion: Coordenada, muestras: Set[Coordenada], en_nave: bool, combustible: int, nave_usada: bool) -> EstadoCompacto:
+        """Convierte los datos del estado en un entero"""
+        mascara = 0
+        for fila, col in muestras:
+            mascara |= 1 << self.mundo.indice_muestra[fila * self.ancho + col]
+        celda = posicion[0] * self.ancho + posicion[1]
+        return (
+            (mascara << self.desplazamiento_mascara)
+            | (celda << DESPLAZAMIENTO_CELDA)
+            | (combustible << DESPLAZAMIENTO_COMBUSTIBLE)
+            | (int(en_nave) << 1)
+            | int(nave_usada)
+        )
+
+    def desempaquetar(self, estado: EstadoCompacto):
+        """Devuelve (posicion, muestras_restantes, en_nave, combustible, nave_usada)"""
+        mascara = estado >> self.desplazamiento_mascara
+        muestras = {muestra for indice, muestra in enumerate(self.muestras) if mascara >> indice & 1}
+        combustible = (estado >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+        return self.posicion(estado), muestras, bool(estado & 2), combustible, bool(estado & 1)
+
+    def estado_inicial(self, posicion_inicio: Coordenada) -> EstadoCompacto:
+        return self.empaquetar(posicion_inicio, set(self.muestras), False, 0, False)
+
+    def celda(self, estado: EstadoCompacto) -> int:
+        return (estado >> DESPLAZAMIENTO_CELDA) & self.mascara_celda
+
+    def posicion(self, estado: EstadoCompacto) -> Coordenada:
+        return divmod(self.celda(estado), self.ancho)
+
+    def mascara(self, estado: EstadoCompacto) -> int:
+        return estado >> self.desplazamiento_mascara
+
+    def es_meta(self, estado: EstadoCompacto) -> bool:
+        return estado < self.limite_meta
+
+    def muestras_restantes(self, estado: EstadoCompacto) -> int:
+        return (estado >> self.desplazamiento_mascara).bit_count()
+
+    def generar_vecinos(self, estado: EstadoCompacto) -> List[Tuple[EstadoCompacto, float]]:
+        """
+        Sucesores de `estado` con el costo de cada movimiento, según las reglas
+        de movimiento, nave y muestras, leyendo las tablas del mundo compilado.
+        """
+        mundo = self.mundo
+        desplazamiento_mascara = self.desplazamiento_mascara
+        nave_usada = estado & 1
+        combustible = (estado >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+        en_nave_con_combustible = estado & 2 and combustible > 0
+        mascara = estado >> desplazamiento_mascara
+        celda = (estado >> DESPLAZAMIENTO_CELDA) & self.mascara_celda
+        recoge_nave = not nave_usada and mundo.celda_nave >= 0
+
+        if en_nave_con_combustible:
+            bits_en_nave = ((combustible - 1) << DESPLAZAMIENTO_COMBUSTIBLE) | 2 | nave_usada
+
+        vecinos = []
+        base = 4 * celda
+        for vecino in mundo.vecinos[base:base + 4]:
+            if vecino < 0:
+                continue
+
+            if en_nave_con_combustible:
+                costo_movimiento = 0.5
+                bits_nave = bits_en_nave
+            else:
+                costo_movimiento = mundo.costo_entrada[vecino]
+                bits_nave = nave_usada
+
+            # Al llegar a la nave por primera vez: recarga combustible y la marca como usada
+            if recoge_nave and vecino == mundo.celda_nave:
+                bits_nave = (COMBUSTIBLE_NAVE << DESPLAZAMIENTO_COMBUSTIBLE) | 3
+
+            nueva_mascara = mascara
+            indice = mundo.indice_muestra[vecino]
+            if indice >= 0:
+                nueva_mascara &= ~(1 << indice)
+
+            vecinos.append(((nueva_mascara << desplazamiento_mascara) | (vecino << DESPLAZAMIENTO_CELDA) | bits_nave, costo_movimiento))
+
+        return vecinos
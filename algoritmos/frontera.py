@@ -0,0 +1,99 @@
+import heapq
+import math
+from typing import Dict, Hashable, Tuple
+
+
+class FronteraMonticulo:
+    """
+    Frontera basada en `heapq` (comportamiento original).
+
+    No tiene disminución de clave: si un estado mejora se inserta de nuevo y las
+    entradas obsoletas se descartan al extraerlas con la comprobación de visitados.
+    Los valores de `desempate` se comparan en orden tras la prioridad.
+    """
+
+    def __init__(self):
+        self._monticulo = []
+
+    def insertar(self, estado: Hashable, prioridad: float, *desempate) -> None:
+        heapq.heappush(self._monticulo, (prioridad, *desempate, estado))
+
+    def extraer(self) -> Tuple[float, Hashable]:
+        entrada = heapq.heappop(self._monticulo)
+        return entrada[0], entrada[-1]
+
+    def __len__(self) -> int:
+        return len(self._monticulo)
+
+
+class FronteraCubetas:
+    """
+    Cola de cubetas (algoritmo de Dial) sobre unidades enteras de medio costo.
+
+    Todos los costos de movimiento son múltiplos de 0.5, igual que las heurísticas
+    del proyecto, así que la prioridad se guarda como índice entero `2 * prioridad`.
+    Insertar y extraer son O(1) (amortizado) y cada estado aparece como mucho una
+    vez: si se inserta con una prioridad menor se mueve de cubeta, de modo que no
+    quedan entradas obsoletas. Dentro de una cubeta se extrae el último insertado.
+    Los estados con prioridad infinita no pueden llevar a la meta y se ignoran;
+    `desempate` se acepta por compatibilidad y no se usa.
+    """
+
+    def __init__(self):
+        self._cubetas: Dict[int, Dict[Hashable, None]] = {}
+        self._indice: Dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def insertar(self, estado: Hashable, prioridad: float, *desempate) -> None:
+        if prioridad == math.inf:
+            return
+        doble = prioridad + prioridad
+        indice = int(doble)
+        if indice != doble:
+            raise ValueError(f"La prioridad {prioridad} no es múltiplo de 0.5")
+
+        cubetas = self._cubetas
+        anterior = self._indice.get(estado)
+        if anterior is not None:
+            if anterior <= indice:
+                return
+            cubeta = cubetas[anterior]
+            del cubeta[estado]
+            if not cubeta:
+                del cubetas[anterior]
+
+        if indice in cubetas:
+            cubetas[indice][estado] = None
+        else:
+            cubetas[indice] = {estado: None}
+        self._indice[estado] = indice
+        if indice < self._cursor:
+            self._cursor = indice
+
+    def extraer(self) -> Tuple[float, Hashable]:
+        if not self._indice:
+            raise IndexError("extraer de una frontera vacía")
+        while self._cursor not in self._cubetas:
+            self._cursor += 1
+        cubeta = self._cubetas[self._cursor]
+        estado, _ = cubeta.popitem()
+        if not cubeta:
+            del self._cubetas[self._cursor]
+        del self._indice[estado]
+        return self._cursor / 2, estado
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+
+FRONTERAS = {
+    "monticulo": FronteraMonticulo,
+    "cubetas": FronteraCubetas,
+}
+
+
+def crear_frontera(tipo: str = "monticulo"):
+    """Crea una frontera vacía del tipo indicado ("monticulo" o "cubetas")."""
+    if tipo not in FRONTERAS:
+        raise ValueError(f"Tipo de frontera desconocido: {tipo}")
+    return FRONTERAS[tipo]()
@@ -0,0 +1,186 @@
+import heapq
+from array import array
+from collections import deque
+from typing import Dict, List
+from helpers.mundo import MundoCompilado
+from algoritmos.espacio_estados import (
+    EspacioEstados,
+    EstadoCompacto,
+    BITS_COMBUSTIBLE,
+    DESPLAZAMIENTO_COMBUSTIBLE,
+    DESPLAZAMIENTO_CELDA,
+    COMBUSTIBLE_NAVE,
+)
+
+# Valor de los campos de distancia para celdas desde las que no se llega al destino
+INALCANZABLE = 2**31 - 1
+
+
+def campo_distancias_a_pie(mundo: MundoCompilado, celda_destino: int, celda_bloqueada: int = -1) -> array:
+    """
+    Dijkstra inverso desde `celda_destino`: para cada celda, el costo mínimo de
+    llegar caminando hasta el destino (se paga el costo de entrada de cada celda
+    pisada, incluido el destino). Los costos son enteros (1, 3 o 5).
+    Si se indica `celda_bloqueada`, los caminos no pueden atravesarla.
+    """
+    distancias = array("i", [INALCANZABLE]) * (mundo.alto * mundo.ancho)
+    distancias[celda_destino] = 0
+    vecinos = mundo.vecinos
+    costo_entrada = mundo.costo_entrada
+    pendientes = [(0, celda_destino)]
+
+    while pendientes:
+        distancia, celda = heapq.heappop(pendientes)
+        if distancia > distancias[celda]:
+            continue
+        # Quien entra a `celda` desde un vecino paga el costo de entrada de `celda`
+        nueva_distancia = distancia + int(costo_entrada[celda])
+        base = 4 * celda
+        for vecino in vecinos[base:base + 4]:
+            if vecino >= 0 and vecino != celda_bloqueada and nueva_distancia < distancias[vecino]:
+                distancias[vecino] = nueva_distancia
+                heapq.heappush(pendientes, (nueva_distancia, vecino))
+
+    return distancias
+
+
+def campo_pasos(mundo: MundoCompilado, celda_destino: int) -> array:
+    """
+    BFS inverso desde `celda_destino`: número mínimo de movimientos hasta el
+    destino evitando obstáculos. Multiplicado por 0.5 da el costo en nave.
+    """
+    pasos = array("i", [INALCANZABLE]) * (mundo.alto * mundo.ancho)
+    pasos[celda_destino] = 0
+    vecinos = mundo.vecinos
+    pendientes = deque([celda_destino])
+
+    while pendientes:
+        celda = pendientes.popleft()
+        siguiente = pasos[celda] + 1
+        base = 4 * celda
+        for vecino in vecinos[base:base + 4]:
+            if vecino >= 0 and pasos[vecino] == INALCANZABLE:
+                pasos[vecino] = siguiente
+                pendientes.append(vecino)
+
+    return pasos
+
+
+def cota_con_combustible(pasos: int, combustible: int) -> float:
+    """Costo mínimo de recorrer `pasos` movimientos con `combustible` de nave al empezar."""
+    if pasos <= combustible:
+        return 0.5 * pasos
+    return 0.5 * combustible + (pasos - combustible)
+
+
+class HeuristicaTerreno:
+    """
+    Heurística admisible construida con campos de distancia exactos.
+
+    Se calcula una vez por mundo un Dijkstra inverso (costos a pie) y un BFS
+    inverso (costos en nave, 0.5 por movimiento) desde cada muestra y desde la
+    nave. Para cada muestra pendiente se obtiene una cota inferior del costo de
+    alcanzarla desde el estado, teniendo en cuenta el combustible disponible o la
+    posibilidad de recoger la nave.
+
+    Modos:
+      - "max": máximo de las cotas sobre las muestras restantes
+      - "mst": además, la menor cota hasta una muestra más el árbol de expansión
+        mínima entre las muestras restantes (memoizado por máscara); se toma el
+        mayor de ambos valores
+    """
+
+    def __init__(self, espacio: EspacioEstados, modo: str = "max"):
+        if modo not in ("max", "mst"):
+            raise ValueError(f"Modo de heurística desconocido: {modo}")
+        self.espacio = espacio
+        self.modo = modo
+        mundo = espacio.mundo
+        celdas_muestras = [mundo.celda(muestra) for muestra in espacio.muestras]
+
+        self.a_pie: List[array] = [campo_distancias_a_pie(mundo, celda) for celda in celdas_muestras]
+        self.pasos: List[array] = [campo_pasos(mundo, celda) for celda in celdas_muestras]
+
+        self.celda_nave = mundo.celda_nave
+        if self.celda_nave >= 0:
+            self.a_pie_nave = campo_distancias_a_pie(mundo, self.celda_nave)
+            # Cota de ir de la nave (recién recogida) a cada muestra
+            self.desde_nave = [
+                cota_con_combustible(pasos[self.celda_nave], COMBUSTIBLE_NAVE)
+                if pasos[self.celda_nave] != INALCANZABLE else float("inf")
+                for pasos in self.pasos
+            ]
+
+        # Cotas entre pares de muestras: a pie (el menor de los dos sentidos) y con la nave disponible
+        cantidad = len(celdas_muestras)
+        self.entre_muestras_a_pie = [
+            [min(self.a_pie[j][celdas_muestras[i]], self.a_pie[i][celdas_muestras[j]]) for j in range(cantidad)]
+            for i in range(cantidad)
+        ]
+        self.entre_muestras_nave = [[0.5 * self.pasos[j][celdas_muestras[i]] for j in range(cantidad)] for i in range(cantidad)]
+        self._arboles: Dict[tuple, float] = {}
+
+    def cota_muestra(self, indice: int, celda: int, combustible_util: int, nave_disponible: bool) -> float:
+        """Cota inferior del costo de llegar a la muestra `indice` desde `celda`."""
+        if combustible_util > 0:
+            pasos = self.pasos[indice][celda]
+            if pasos == INALCANZABLE:
+                return float("inf")
+            return cota_con_combustible(pasos, combustible_util)
+
+        cota = self.a_pie[indice][celda]
+        cota = float("inf") if cota == INALCANZABLE else float(cota)
+        if nave_disponible:
+            a_nave = self.a_pie_nave[celda]
+            if a_nave != INALCANZABLE:
+                cota = min(cota, a_nave + self.desde_nave[indice])
+        return cota
+
+    def arbol_minimo(self, mascara: int, con_nave: bool) -> float:
+        """Peso del árbol de expansión mínima (Prim) entre las muestras de `mascara`."""
+        clave = (mascara, con_nave)
+        if clave in self._arboles:
+            return self._arboles[clave]
+
+        pesos = self.entre_muestras_nave if con_nave else self.entre_muestras_a_pie
+        indices = [i for i in range(len(self.pasos)) if mascara >> i & 1]
+        total = 0.0
+        if indices:
+            mejor = {i: pesos[indices[0]][i] for i in indices[1:]}
+            while mejor:
+                siguiente = min(mejor, key=mejor.get)
+                total += mejor.pop(siguiente)
+                for i in mejor:
+                    if pesos[siguiente][i] < mejor[i]:
+                        mejor[i] = pesos[siguiente][i]
+
+        self._arboles[clave] = total
+        return total
+
+    def __call__(self, estado: EstadoCompacto) -> float:
+        espacio = self.espacio
+        mascara = estado >> espacio.desplazamiento_mascara
+        if not mascara:
+            return 0.0
+
+        celda = (estado >> DESPLAZAMIENTO_CELDA) & espacio.mascara_celda
+        combustible = (estado >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+        combustible_util = combustible if estado & 2 else 0
+        nave_disponible = not estado & 1 and self.celda_nave >= 0
+
+        mayor = 0.0
+        menor = float("inf")
+        indice = 0
+        restantes = mascara
+        while restantes:
+            if restantes & 1:
+                cota = self.cota_muestra(indice, celda, combustible_util, nave_disponible)
+                mayor = max(mayor, cota)
+                menor = min(menor, cota)
+            restantes >>= 1
+            indice += 1
+
+        if self.modo == "mst" and menor != float("inf"):
+            con_nave = combustible_util > 0 or nave_disponible
+            mayor = max(mayor, menor + self.arbol_minimo(mascara, con_nave))
+        return mayor
@@ -0,0 +1,170 @@
+import functools
+import math
+import time
+from typing import Tuple, Set, List, Dict, Iterator, Optional
+from helpers.mundo import Grid, compilar_mundo
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.astar import construir_heuristica
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+
+Coordenada = Tuple[int, int]
+
+
+def busqueda_ida_estrella(
+    mapa: Grid,
+    posicion_inicio: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_objetivo: Set[Coordenada],
+    modo_heuristica: str = "terreno",
+    tamano_tabla: Optional[int] = 200_000,
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
+):
+    """
+    A* por profundización iterativa (IDA*).
+
+    Repite búsquedas en profundidad acotadas por f = g + h; cada iteración sube la
+    cota al menor f que la superó en la anterior, así que la primera meta
+    encontrada es óptima si la heurística es admisible. Por eso el modo por
+    defecto es "terreno": la heurística "manhattan" original sobrestima dentro de
+    la nave (cada movimiento cuesta 0.5) y no garantiza el óptimo. Solo se guarda el camino actual, con memoria lineal
+    en la profundidad de la solución.
+
+    `tamano_tabla` limita una tabla de transposición opcional (estado -> menor g
+    con que se alcanzó): evita reexplorar estados alcanzados por un camino igual o
+    más caro, que en una cuadrícula son la mayoría. Al llenarse deja de admitir
+    estados nuevos; con None o 0 la búsqueda es un IDA* puro.
+
+    Retorna el mismo diccionario que `busqueda_a_estrella`, más `iteraciones`;
+    `nodos_expandidos` suma todas las iteraciones y `max_frontera` es la mayor
+    profundidad alcanzada.
+
+    Límites y cancelación: ver `Presupuesto`; el plan parcial es el primer
+    camino que recogió más muestras. `observador` recibe los eventos de la
+    búsqueda (ver `Observador`).
+    """
+    tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_objetivo))
+    h = construir_heuristica(espacio, modo_heuristica)
+    estado_inicial = espacio.estado_inicial(posicion_inicio)
+    generar_vecinos = espacio.generar_vecinos
+    if observador is not None:
+        observador.al_iniciar(espacio, h)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        h = observador.cronometrar("heuristica", h)
+
+    # Para cada estado: (menor g, iteración en que se registró)
+    tabla: Dict[EstadoCompacto, Tuple[float, int]] = {}
+    capacidad = tamano_tabla or 0
+    nodos_expandidos = 0
+    max_frontera = 1
+    iteraciones = 0
+    umbral = h(estado_inicial)
+    # Mejor plan parcial: estados del primer camino que dejó menos muestras pendientes
+    menos_restantes = espacio.muestras_restantes(estado_inicial)
+    mejor_camino, mejor_costo = [estado_inicial], 0.0
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"tabla": len(tabla)})
+
+    def sin_exito(motivo: str) -> dict:
+        camino = [espacio.posicion(estado) for estado in mejor_camino]
+        parcial = (camino, mejor_costo, len(espacio.muestras) - menos_restantes)
+        return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, parcial, iteraciones=iteraciones))
+
+    def ordenados(estado: EstadoCompacto) -> Iterator[Tuple[EstadoCompacto, float, float]]:
+        # Primero los vecinos más prometedores: acelera la última iteración
+        vecinos = [(h(v), v, c) for v, c in generar_vecinos(estado)]
+        vecinos.sort(key=lambda entrada: entrada[0])
+        return iter([(v, c, hv) for hv, v, c in vecinos])
+
+    while umbral != math.inf:
+        iteraciones += 1
+        siguiente_umbral = math.inf
+
+        if espacio.es_meta(estado_inicial):
+            estados, costos = [estado_inicial], [0.0]
+            break
+
+        estados: List[EstadoCompacto] = [estado_inicial]
+        costos: List[float] = [0.0]
+        iteradores = [ordenados(estado_inicial)]
+        en_camino = {estado_inicial}
+        nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_inicial, 0.0, None)
+        encontrada = False
+
+        while iteradores:
+            if agotado is not None and (motivo := agotado(nodos_expandidos)):
+                return sin_exito(motivo)
+
+            entrada = next(iteradores[-1], None)
+            if entrada is None:
+                iteradores.pop()
+                costos.pop()
+                en_camino.discard(estados.pop())
+                continue
+
+            estado_vecino, costo_mov, h_vecino = entrada
+            g = costos[-1] + costo_mov
+            if observador is not None:
+                observador.al_generar(estado_vecino, g)
+            if estado_vecino in en_camino:
+                if observador is not None:
+                    observador.al_duplicado(estado_vecino)
+                continue
+            f = g + h_vecino
+            if f > umbral:
+                if f < siguiente_umbral:
+                    siguiente_umbral = f
+                continue
+
+            if capacidad:
+                previo = tabla.get(estado_vecino)
+                if previo is not None:
+                    g_previo, iteracion_previa = previo
+                    # En la misma iteración basta con igualar; entre iteraciones la
+                    # visita anterior tenía menos cota y hay que repetirla si g no empeora
+                    if g > g_previo or (g == g_previo and iteracion_previa == iteraciones):
+                        if observador is not None:
+                            observador.al_duplicado(estado_vecino)
+                        continue
+                    tabla[estado_vecino] = (g, iteraciones)
+                elif len(tabla) < capacidad:
+                    tabla[estado_vecino] = (g, iteraciones)
+
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_insertar(estado_vecino, f)
+                observador.al_expandir(estado_vecino, g, estados[-1])
+            estados.append(estado_vecino)
+            costos.append(g)
+            restantes = espacio.muestras_restantes(estado_vecino)
+            if restantes < menos_restantes:
+                menos_restantes = restantes
+                mejor_camino, mejor_costo = list(estados), g
+            if len(estados) > max_frontera:
+                max_frontera = len(estados)
+
+            if espacio.es_meta(estado_vecino):
+                encontrada = True
+                break
+
+            iteradores.append(ordenados(estado_vecino))
+            en_camino.add(estado_vecino)
+
+        if encontrada:
+            break
+        umbral = siguiente_umbral
+    else:
+        return sin_exito(SIN_SOLUCION)
+
+    camino = [espacio.posicion(estado) for estado in estados]
+    return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera, iteraciones=iteraciones))
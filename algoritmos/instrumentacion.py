@@ -0,0 +1,173 @@
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class Observador:
+    """
+    Interfaz de instrumentación que aceptan todas las funciones `busqueda_*`
+    mediante el parámetro `observador`. Los métodos no hacen nada; se
+    sobrescriben los que interesen.
+
+    Sin observador (None) las búsquedas solo pagan una comparación por evento.
+    Con él, `cronometrar` envuelve la generación de sucesores, la heurística y
+    la cola para medir el tiempo de cada fase.
+    """
+
+    def al_iniciar(self, espacio, heuristica: Optional[Callable] = None) -> None:
+        """
+        La búsqueda empieza sobre `espacio` (un `EspacioEstados`) con la
+        heurística dada, si usa alguna. Solo lo llaman las búsquedas cuyos
+        estados son estados compactos (todas salvo `busqueda_puntos_clave`).
+        """
+
+    def al_expandir(self, estado: Hashable, costo: float, padre: Optional[Hashable]) -> None:
+        """Se va a expandir `estado`, alcanzado con costo `costo` desde `padre` (None en el inicio)."""
+
+    def al_generar(self, estado: Hashable, costo: float) -> None:
+        """Se generó el sucesor `estado` con costo acumulado `costo`."""
+
+    def al_insertar(self, estado: Hashable, prioridad: float) -> None:
+        """`estado` entra en la frontera con la prioridad dada."""
+
+    def al_duplicado(self, estado: Hashable) -> None:
+        """Un sucesor generado ya se conocía con igual o menor costo y se ignora."""
+
+    def al_descartar(self, estado: Hashable) -> None:
+        """Se extrajo de la frontera una entrada obsoleta (estado ya expandido)."""
+
+    def al_podar(self, estado: Hashable) -> None:
+        """Un sucesor generado no entra en la frontera por estar dominado (ver `DominanciaCombustible`)."""
+
+    def al_terminar(self, resultado: dict, tamanos: Dict[str, int]) -> None:
+        """
+        Fin de la búsqueda; `tamanos` da el tamaño final de cada tabla interna
+        (el máximo alcanzado en las que se vacían durante la búsqueda).
+        """
+
+    def cronometrar(self, fase: str, funcion: Callable) -> Callable:
+        """Devuelve `funcion` envuelta para acumular su tiempo en `fase` (o tal cual)."""
+        return funcion
+
+
+class FronteraInstrumentada:
+    """Envuelve una frontera (ver `crear_frontera`) para avisar al observador y medir la fase "cola"."""
+
+    def __init__(self, frontera, observador: Observador):
+        self._frontera = frontera
+        self._observador = observador
+        self._insertar = observador.cronometrar("cola", frontera.insertar)
+        self.extraer = observador.cronometrar("cola", frontera.extraer)
+
+    def insertar(self, estado: Hashable, prioridad: float, *desempate) -> None:
+        self._observador.al_insertar(estado, prioridad)
+        self._insertar(estado, prioridad, *desempate)
+
+    def __len__(self) -> int:
+        return len(self._frontera)
+
+
+class Contadores(Observador):
+    """
+    Observador con contadores baratos: expandidos, generados, insertados,
+    duplicados, podados por dominancia, extracciones obsoletas, tamaño máximo de la frontera y de las
+    tablas internas y, con `medir_tiempos`, segundos por fase ("generacion",
+    "heuristica", "cola").
+    """
+
+    def __init__(self, medir_tiempos: bool = True):
+        self.medir_tiempos = medir_tiempos
+        self.expandidos = 0
+        self.generados = 0
+        self.insertados = 0
+        self.duplicados = 0
+        self.podados = 0
+        self.extracciones_obsoletas = 0
+        self.max_frontera = 0
+        self.tamanos: Dict[str, int] = {}
+        self.tiempos: Dict[str, float] = defaultdict(float)
+
+    def al_expandir(self, estado, costo, padre):
+        self.expandidos += 1
+
+    def al_generar(self, estado, costo):
+        self.generados += 1
+
+    def al_insertar(self, estado, prioridad):
+        self.insertados += 1
+
+    def al_duplicado(self, estado):
+        self.duplicados += 1
+
+    def al_podar(self, estado):
+        self.podados += 1
+
+    def al_descartar(self, estado):
+        self.extracciones_obsoletas += 1
+
+    def al_terminar(self, resultado, tamanos):
+        self.max_frontera = resultado.get("max_frontera") or 0
+        self.tamanos = dict(tamanos)
+
+    def cronometrar(self, fase, funcion):
+        if not self.medir_tiempos:
+            return funcion
+        tiempos = self.tiempos
+        reloj = time.perf_counter
+
+        def medida(*argumentos):
+            inicio = reloj()
+            try:
+                return funcion(*argumentos)
+            finally:
+                tiempos[fase] += reloj() - inicio
+        return medida
+
+    def resumen(self) -> dict:
+        return {
+            "expandidos": self.expandidos,
+            "generados": self.generados,
+            "insertados": self.insertados,
+            "duplicados": self.duplicados,
+            "podados": self.podados,
+            "extracciones_obsoletas": self.extracciones_obsoletas,
+            "max_frontera": self.max_frontera,
+            "tamanos": dict(self.tamanos),
+            "tiempos": dict(self.tiempos),
+        }
+
+
+def perfilar(funcion: Callable[..., dict], *argumentos, modo: str = "cprofile", lineas: int = 25, **opciones) -> Tuple[dict, str]:
+    """
+    Ejecuta `funcion(*argumentos, **opciones)` bajo cProfile ("cprofile") o
+    tracemalloc ("tracemalloc") y devuelve (resultado, informe en texto).
+    """
+    # Los perfiladores se importan solo al usarlos: no forman parte del arranque de `algoritmos`
+    if modo == "cprofile":
+        import cProfile
+        import io
+        import pstats
+        perfil = cProfile.Profile()
+        resultado = perfil.runcall(funcion, *argumentos, **opciones)
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas)
+        return resultado, salida.getvalue()
+
+    if modo == "tracemalloc":
+        import tracemalloc
+        ya_activo = tracemalloc.is_tracing()
+        if not ya_activo:
+            tracemalloc.start()
+        antes = tracemalloc.take_snapshot()
+        try:
+            resultado = funcion(*argumentos, **opciones)
+            _, pico = tracemalloc.get_traced_memory()
+            despues = tracemalloc.take_snapshot()
+        finally:
+            if not ya_activo:
+                tracemalloc.stop()
+        diferencias = despues.compare_to(antes, "lineno")[:lineas]
+        informe = [f"Memoria pico: {pico / 1024:.1f} KiB"] + [str(diferencia) for diferencia in diferencias]
+        return resultado, "\n".join(informe)
+
+    raise ValueError(f"Modo de perfilado desconocido: {modo}")
@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+import time
+from typing import Callable, Tuple, List, Dict, Optional
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.instrumentacion import Observador
+
+Coordenada = Tuple[int, int]
+# Mejor plan parcial: (camino, costo, muestras recogidas)
+Parcial = Tuple[List[Coordenada], float, int]
+
+# Motivos por los que una búsqueda termina sin éxito
+SIN_SOLUCION = "sin_solucion"
+LIMITE_NODOS = "limite_nodos"
+TIEMPO_AGOTADO = "tiempo_agotado"
+MEMORIA_AGOTADA = "memoria_agotada"
+CANCELADO = "cancelado"
+# La búsqueda por haz descartó todos los caminos (puede haber solución)
+HAZ_AGOTADO = "haz_agotado"
+
+
+class TokenCancelacion:
+    """
+    Señal de cancelación cooperativa: otro hilo llama a `cancelar()` y la
+    búsqueda que lo recibió se detiene en su siguiente comprobación.
+    """
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self) -> None:
+        self._evento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+
+def memoria_residente_mb() -> float:
+    """
+    Memoria residente actual del proceso en MB. Sin /proc (macOS, BSD) solo se
+    conoce el pico del proceso (`ru_maxrss`, en bytes en macOS y en KB en el
+    resto), que nunca baja.
+    """
+    try:
+        with open("/proc/self/statm") as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+class Presupuesto:
+    """
+    Límites de una búsqueda: nodos expandidos, segundos de reloj, crecimiento de
+    la memoria residente (MB) desde el inicio y token de cancelación.
+
+    Todas las búsquedas aceptan `limite_nodos`, `tiempo_limite` (segundos),
+    `limite_memoria_mb` y `cancelacion` y los comprueban con un Presupuesto.
+    Si alguno se agota, la búsqueda se detiene antes de tiempo y devuelve
+    `resultado_sin_exito` con el `motivo` (LIMITE_NODOS, TIEMPO_AGOTADO,
+    MEMORIA_AGOTADA o CANCELADO) y, si la búsqueda lo conoce, el mejor plan
+    parcial hasta ese momento.
+
+    `agotado(nodos)` se llama una vez por expansión y devuelve el motivo de
+    parada o None. El límite de nodos se comprueba siempre; el resto, que es más
+    caro, solo cada `intervalo` llamadas (y en la primera).
+
+    Donde solo se conoce el pico de memoria (ver `memoria_residente_mb`), el
+    límite cuenta lo que el pico crece durante la búsqueda: la memoria que
+    búsquedas anteriores del mismo proceso ya liberaron no se descuenta, así
+    que el límite nunca salta antes de tiempo pero puede saltar tarde.
+    """
+
+    def __init__(
+        self,
+        limite_nodos: Optional[int] = None,
+        tiempo_limite: Optional[float] = None,
+        limite_memoria_mb: Optional[float] = None,
+        cancelacion: Optional[TokenCancelacion] = None,
+        intervalo: int = 256
+    ):
+        self.limite_nodos = limite_nodos
+        self.tiempo_limite = tiempo_limite
+        self.limite_memoria_mb = limite_memoria_mb
+        self.cancelacion = cancelacion
+        self.activo = any(limite is not None for limite in (limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion))
+        self._mascara = intervalo - 1 if intervalo & (intervalo - 1) == 0 else 0
+        self._llamadas = -1
+        self._inicio = time.perf_counter()
+        self._memoria_inicial = memoria_residente_mb() if limite_memoria_mb is not None else 0.0
+
+    def agotado(self, nodos_expandidos: int) -> Optional[str]:
+        if self.limite_nodos is not None and nodos_expandidos >= self.limite_nodos:
+            return LIMITE_NODOS
+        self._llamadas += 1
+        if self._llamadas & self._mascara:
+            return None
+        if self.cancelacion is not None and self.cancelacion.cancelado:
+            return CANCELADO
+        if self.tiempo_limite is not None and time.perf_counter() - self._inicio >= self.tiempo_limite:
+            return TIEMPO_AGOTADO
+        if self.limite_memoria_mb is not None and memoria_residente_mb() - self._memoria_inicial >= self.limite_memoria_mb:
+            return MEMORIA_AGOTADA
+        return None
+
+
+def mejor_parcial(espacio: EspacioEstados, costos: Dict[EstadoCompacto, float], diccionario_padres: Dict[EstadoCompacto, EstadoCompacto]) -> Optional[Parcial]:
+    """
+    Entre los estados alcanzados, el que recogió más muestras (y, a igualdad, el
+    más barato), con su camino reconstruido por los padres.
+    """
+    if not costos:
+        return None
+    estado = min(costos, key=lambda e: (espacio.muestras_restantes(e), costos[e]))
+    costo = costos[estado]
+    recogidas = len(espacio.muestras) - espacio.muestras_restantes(estado)
+    camino = [espacio.posicion(estado)]
+    while estado in diccionario_padres:
+        estado = diccionario_padres[estado]
+        camino.append(espacio.posicion(estado))
+    camino.reverse()
+    return camino, costo, recogidas
+
+
+def resultado_exito(camino: List[Coordenada], costos: List[float], nodos_expandidos: int, tiempo_inicio: float, max_frontera: Optional[int], **extra) -> dict:
+    """
+    Diccionario común de una búsqueda que llegó a la meta. `costos` son los
+    costos acumulados de cada posición de `camino`.
+    """
+    resultado = {
+        "exito": True,
+        "camino con costo": list(zip(camino, costos)),
+        "camino": camino,
+        "costo_total": costos[-1],
+        "nodos_expandidos": nodos_expandidos,
+        "profundidad": len(camino) - 1,
+        "tiempo": time.perf_counter() - tiempo_inicio,
+        "max_frontera": max_frontera,
+    }
+    resultado.update(extra)
+    return resultado
+
+
+def resultado_sin_exito(motivo: str, nodos_expandidos: int, tiempo_inicio: float, max_frontera: Optional[int], parcial: Optional[Parcial] = None, **extra) -> dict:
+    """
+    Diccionario de una búsqueda que terminó sin llegar a la meta: `motivo` (sin
+    solución, haz agotado o un límite de `Presupuesto`) y las estadísticas hasta
+    ese momento. Con `parcial`, el plan que recogió más muestras se informa en
+    `camino_parcial`, `costo_parcial` y `muestras_recogidas`.
+    """
+    resultado = {
+        "exito": False,
+        "motivo": motivo,
+        "nodos_expandidos": nodos_expandidos,
+        "tiempo": time.perf_counter() - tiempo_inicio,
+        "max_frontera": max_frontera,
+    }
+    if parcial is not None:
+        camino, costo, recogidas = parcial
+        resultado["camino_parcial"] = camino
+        resultado["costo_parcial"] = costo
+        resultado["muestras_recogidas"] = recogidas
+    resultado.update(extra)
+    return resultado
+
+
+def finalizar_busqueda(observador: Optional[Observador], tamanos: Callable[[], Dict[str, int]], resultado: dict) -> dict:
+    """
+    Paso final común de las búsquedas: avisa a `observador`, si lo hay, con los
+    tamaños de las tablas internas (`tamanos()` solo se evalúa entonces) y
+    devuelve `resultado`. Cada búsqueda lo fija al empezar con
+    `functools.partial(finalizar_busqueda, observador, tamanos)`.
+    """
+    if observador is not None:
+        observador.al_terminar(resultado, tamanos())
+    return resultado
@@ -0,0 +1,343 @@
+import heapq
+import math
+import time
+from typing import Tuple, Set, List, Dict, Optional
+
+import numpy as np
+
+from helpers.mundo import (
+    Grid,
+    compilar_mundo,
+    CASILLA_LIBRE,
+    CASILLA_OBSTACULO,
+    CASILLA_ROCA,
+    CASILLA_VOLCAN,
+    COSTOS_TERRENO,
+    MOVIMIENTOS,
+)
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto, BITS_COMBUSTIBLE, DESPLAZAMIENTO_COMBUSTIBLE
+from algoritmos.heuristica_terreno import HeuristicaTerreno
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, resultado_exito, resultado_sin_exito
+
+Coordenada = Tuple[int, int]
+Estado = EstadoCompacto
+# Clave LPA* (min(g, rhs) + h, min(g, rhs)) más un desempate que pone la meta
+# virtual detrás de los estados meta con la misma clave: la arista que los une
+# cuesta 0, y sin él la búsqueda pararía con un estado meta aún inconsistente
+Clave = Tuple[float, float, int]
+
+# Nodo artificial al que llegan todos los estados meta con costo 0
+META_VIRTUAL = -1
+TERRENOS = (CASILLA_LIBRE, CASILLA_OBSTACULO, CASILLA_ROCA, CASILLA_VOLCAN)
+
+
+class PlanificadorIncremental:
+    """
+    Planificador LPA* para un mundo que cambia durante la misión.
+
+    Mantiene entre llamadas los g, los rhs (mejor g según los predecesores), la
+    cola de estados inconsistentes y las aristas ya generadas en ambos sentidos.
+    `actualizar_celda` y `retirar_muestra` solo marcan como inconsistentes los
+    estados cuyas aristas cambiaron; el siguiente `planificar` repara a partir
+    de ellos en lugar de repetir la búsqueda.
+
+    Como la meta es un conjunto de estados (todas las muestras recogidas, con
+    cualquier posición y combustible), se añade una meta virtual a la que llega
+    cada estado meta con costo 0; un estado meta no se expande.
+
+    La heurística es la de `HeuristicaTerreno` (modo "max") restringida a las
+    muestras pendientes: la mayor cota de llegar a cada una según el
+    combustible y la nave disponibles. Es consistente, y lo sigue siendo si un
+    cambio solo encarece el mapa (nuevos obstáculos, terreno más caro); cuando
+    un cambio lo abarata, sus campos se recalculan y la cola se reordena.
+    El inicio es fijo; si el astronauta avanza, se crea un planificador nuevo
+    desde su posición.
+
+    Ejemplo:
+        planificador = PlanificadorIncremental(mapa, inicio, nave, muestras)
+        resultado = planificador.planificar()
+        planificador.actualizar_celda((3, 4), CASILLA_OBSTACULO)
+        resultado = planificador.planificar()
+    """
+
+    def __init__(self, mapa: Grid, posicion_inicio: Coordenada, posicion_nave: Coordenada, muestras_objetivo: Set[Coordenada]):
+        # Copia propia del mapa: las actualizaciones no deben modificar el del llamador
+        self.mundo = compilar_mundo(np.array(mapa, dtype=np.uint8), posicion_nave, muestras_objetivo)
+        self.espacio = EspacioEstados(self.mundo)
+        self.posicion_inicio = posicion_inicio
+        self.inicio = self.espacio.estado_inicial(posicion_inicio)
+        self.activas = (1 << len(self.mundo.muestras)) - 1
+        self._calcular_cotas()
+
+        self.g: Dict[Estado, float] = {}
+        self.rhs: Dict[Estado, float] = {self.inicio: 0.0}
+        self.sucesores: Dict[Estado, Dict[Estado, float]] = {}
+        self.predecesores: Dict[Estado, Dict[Estado, float]] = {}
+        # Estados expandidos en cada celda (para encontrar las aristas que cambia una celda)
+        self.por_celda: Dict[int, Set[Estado]] = {}
+        # Estados conocidos por máscara de muestras (para encontrar metas nuevas al retirar una muestra)
+        self.por_mascara: Dict[int, List[Estado]] = {}
+        self.metas: Set[Estado] = set()
+        self.cola: List[Tuple[float, float, int, Estado]] = []
+        self.en_cola: Dict[Estado, Clave] = {}
+        self.nodos_totales = 0
+
+        self._registrar(self.inicio)
+        self._encolar(self.inicio)
+
+    # --- Heurística y claves ---
+
+    def _calcular_cotas(self) -> None:
+        """Cotas de `HeuristicaTerreno` (campos hacia cada muestra y la nave) sobre el mapa actual."""
+        self.cotas = HeuristicaTerreno(self.espacio, "max")
+
+    def heuristica(self, estado: Estado) -> float:
+        if estado == META_VIRTUAL:
+            return 0.0
+        mascara = self.espacio.mascara(estado) & self.activas
+        if not mascara:
+            return 0.0
+        celda = self.espacio.celda(estado)
+        if self.mundo.mapa.flat[celda] == CASILLA_OBSTACULO:
+            # Estado que quedó bajo un obstáculo: su g puede seguir siendo finito
+            # hasta que se procese, así que no puede tener heurística infinita
+            return 0.0
+        combustible = (estado >> DESPLAZAMIENTO_COMBUSTIBLE) & ((1 << BITS_COMBUSTIBLE) - 1)
+        combustible_util = combustible if estado & 2 else 0
+        nave_disponible = not estado & 1 and self.mundo.celda_nave >= 0
+        cota_muestra = self.cotas.cota_muestra
+        mayor = 0.0
+        indice = 0
+        while mascara:
+            if mascara & 1:
+                mayor = max(mayor, cota_muestra(indice, celda, combustible_util, nave_disponible))
+            mascara >>= 1
+            indice += 1
+        return mayor
+
+    def clave(self, estado: Estado) -> Clave:
+        mejor = min(self.g.get(estado, math.inf), self.rhs.get(estado, math.inf))
+        return (mejor + self.heuristica(estado), mejor, int(estado == META_VIRTUAL))
+
+    def _encolar(self, estado: Estado) -> None:
+        clave = self.clave(estado)
+        self.en_cola[estado] = clave
+        heapq.heappush(self.cola, (*clave, estado))
+
+    def _reordenar_cola(self) -> None:
+        """Recalcula todas las claves tras un cambio de la heurística."""
+        self.en_cola = {estado: self.clave(estado) for estado in self.en_cola}
+        self.cola = [(*clave, estado) for estado, clave in self.en_cola.items()]
+        heapq.heapify(self.cola)
+
+    # --- Grafo ---
+
+    def es_meta(self, estado: Estado) -> bool:
+        return not self.espacio.mascara(estado) & self.activas
+
+    def _registrar(self, estado: Estado) -> None:
+        """Primera vez que se ve `estado`: se indexa por máscara y, si es meta, se anota."""
+        self.por_mascara.setdefault(self.espacio.mascara(estado), []).append(estado)
+        if self.es_meta(estado):
+            self.metas.add(estado)
+
+    def _generar(self, estado: Estado) -> Dict[Estado, float]:
+        # Un estado meta solo lleva a la meta virtual
+        if self.es_meta(estado):
+            return {}
+        return dict(self.espacio.generar_vecinos(estado))
+
+    def _expandir(self, estado: Estado) -> Dict[Estado, float]:
+        """Sucesores de `estado`, generados y anotados en ambos sentidos la primera vez."""
+        sucesores = self.sucesores.get(estado)
+        if sucesores is None:
+            sucesores = self.sucesores[estado] = self._generar(estado)
+            self.por_celda.setdefault(self.espacio.celda(estado), set()).add(estado)
+            for sucesor, costo in sucesores.items():
+                if sucesor not in self.predecesores:
+                    self.predecesores[sucesor] = {}
+                    self._registrar(sucesor)
+                self.predecesores[sucesor][estado] = costo
+        return sucesores
+
+    def _regenerar(self, estado: Estado) -> Set[Estado]:
+        """Vuelve a generar los sucesores de un estado expandido y devuelve los afectados."""
+        anteriores = self.sucesores[estado]
+        nuevos = self._generar(estado)
+        afectados = set()
+        for sucesor in anteriores.keys() | nuevos.keys():
+            costo = nuevos.get(sucesor)
+            if costo == anteriores.get(sucesor):
+                continue
+            afectados.add(sucesor)
+            if costo is None:
+                del self.predecesores[sucesor][estado]
+                continue
+            if sucesor not in self.predecesores:
+                self.predecesores[sucesor] = {}
+                self._registrar(sucesor)
+            self.predecesores[sucesor][estado] = costo
+        self.sucesores[estado] = nuevos
+        return afectados
+
+    # --- LPA* ---
+
+    def _actualizar_estado(self, estado: Estado) -> None:
+        if estado == META_VIRTUAL:
+            self.rhs[estado] = min((self.g.get(meta, math.inf) for meta in self.metas), default=math.inf)
+        elif estado != self.inicio:
+            predecesores = self.predecesores.get(estado, {})
+            g = self.g
+            self.rhs[estado] = min((g.get(p, math.inf) + costo for p, costo in predecesores.items()), default=math.inf)
+        if self.g.get(estado, math.inf) != self.rhs.get(estado, math.inf):
+            self._encolar(estado)
+        else:
+            self.en_cola.pop(estado, None)
+
+    def _propagar(self, estado: Estado) -> None:
+        """Actualiza los sucesores de `estado` (la meta virtual, si es meta) tras cambiar su g."""
+        if estado in self.metas:
+            self._actualizar_estado(META_VIRTUAL)
+        else:
+            for sucesor in self._expandir(estado):
+                self._actualizar_estado(sucesor)
+
+    def _calcular(self, presupuesto: Presupuesto) -> Tuple[int, Optional[str]]:
+        """
+        Bucle principal de LPA*; devuelve los estados expandidos y el motivo si
+        el presupuesto se agotó antes de terminar (la cola queda lista para seguir).
+        """
+        expandidos = 0
+        agotado = presupuesto.agotado if presupuesto.activo else None
+        cola, en_cola, g, rhs = self.cola, self.en_cola, self.g, self.rhs
+        while cola:
+            if agotado is not None and (motivo := agotado(expandidos)):
+                return expandidos, motivo
+            *clave, estado = cola[0]
+            if en_cola.get(estado) != tuple(clave):
+                heapq.heappop(cola)  # entrada obsoleta
+                continue
+            if tuple(clave) >= self.clave(META_VIRTUAL) and rhs.get(META_VIRTUAL, math.inf) == g.get(META_VIRTUAL, math.inf):
+                break
+            heapq.heappop(cola)
+            del en_cola[estado]
+            expandidos += 1
+
+            if g.get(estado, math.inf) > rhs.get(estado, math.inf):
+                g[estado] = rhs[estado]
+                if estado != META_VIRTUAL:
+                    self._propagar(estado)
+            else:
+                g[estado] = math.inf
+                self._actualizar_estado(estado)
+                if estado != META_VIRTUAL:
+                    self._propagar(estado)
+        return expandidos, None
+
+    def _camino(self) -> Tuple[List[Coordenada], List[float]]:
+        """Sigue los predecesores óptimos desde la mejor meta hasta el inicio."""
+        g = self.g
+        estado = min(self.metas, key=lambda meta: g.get(meta, math.inf))
+        estados = [estado]
+        while estado != self.inicio:
+            estado = min(self.predecesores[estado].items(), key=lambda par: g.get(par[0], math.inf) + par[1])[0]
+            estados.append(estado)
+        estados.reverse()
+
+        camino = [self.espacio.posicion(estados[0])]
+        costos = [0.0]
+        for anterior, siguiente in zip(estados, estados[1:]):
+            camino.append(self.espacio.posicion(siguiente))
+            costos.append(costos[-1] + self.sucesores[anterior][siguiente])
+        return camino, costos
+
+    def planificar(
+        self,
+        limite_nodos: Optional[int] = None,
+        tiempo_limite: Optional[float] = None,
+        limite_memoria_mb: Optional[float] = None,
+        cancelacion: Optional[TokenCancelacion] = None
+    ) -> dict:
+        """
+        Repara la búsqueda tras los cambios pendientes y devuelve el plan óptimo
+        con el mismo diccionario que `busqueda_a_estrella`. `nodos_expandidos`
+        cuenta solo los de esta llamada; `nodos_totales`, todos los acumulados.
+        Los límites se aplican a esta llamada (ver `Presupuesto`); si se agotan,
+        la siguiente llamada continúa la reparación donde quedó.
+        """
+        tiempo_inicio = time.perf_counter()
+        presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+        expandidos, motivo = self._calcular(presupuesto)
+        self.nodos_totales += expandidos
+        extra = {"nodos_totales": self.nodos_totales}
+        if motivo is not None:
+            return resultado_sin_exito(motivo, expandidos, tiempo_inicio, len(self.en_cola), **extra)
+        if self.g.get(META_VIRTUAL, math.inf) == math.inf:
+            return resultado_sin_exito(SIN_SOLUCION, expandidos, tiempo_inicio, len(self.en_cola), **extra)
+        camino, costos = self._camino()
+        return resultado_exito(camino, costos, expandidos, tiempo_inicio, len(self.en_cola), **extra)
+
+    # --- Cambios del mundo ---
+
+    def actualizar_celda(self, posicion: Coordenada, valor: int) -> None:
+        """
+        Cambia el terreno de una celda (libre, obstáculo, roca o volcán). Solo se
+        regeneran las aristas de los estados expandidos en la celda y en sus
+        cuatro vecinas, que son las únicas que dependen de ella.
+        """
+        if valor not in TERRENOS:
+            raise ValueError(f"Valor de terreno no admitido: {valor}")
+        mundo = self.mundo
+        celda = mundo.celda(posicion)
+        indice = mundo.indice_muestra[celda]
+        if celda == mundo.celda_nave or indice >= 0 and self.activas >> indice & 1:
+            raise ValueError(f"La celda {posicion} tiene la nave o una muestra pendiente")
+        if valor == CASILLA_OBSTACULO and posicion == self.posicion_inicio:
+            raise ValueError("No se puede bloquear la celda de inicio")
+        anterior = mundo.mapa[posicion]
+        if anterior == valor:
+            return
+        abarata = anterior == CASILLA_OBSTACULO or valor != CASILLA_OBSTACULO and COSTOS_TERRENO[valor] < COSTOS_TERRENO[anterior]
+        mundo.actualizar_celda(posicion, valor)
+
+        fila, col = posicion
+        celdas = [celda]
+        for desplazamiento_fila, desplazamiento_columna in MOVIMIENTOS:
+            vecina_fila, vecina_col = fila + desplazamiento_fila, col + desplazamiento_columna
+            if 0 <= vecina_fila < mundo.alto and 0 <= vecina_col < mundo.ancho:
+                celdas.append(vecina_fila * mundo.ancho + vecina_col)
+
+        afectados = set()
+        for celda_afectada in celdas:
+            for estado in self.por_celda.get(celda_afectada, ()):
+                afectados |= self._regenerar(estado)
+        for estado in afectados:
+            self._actualizar_estado(estado)
+        if abarata:
+            # Las cotas anteriores podrían sobrestimar: se recalculan con el mapa nuevo
+            self._calcular_cotas()
+            self._reordenar_cola()
+
+    def retirar_muestra(self, posicion: Coordenada) -> None:
+        """
+        Otra unidad recogió la muestra de `posicion`: deja de ser necesaria. Los
+        estados conocidos que solo la tenían pendiente pasan a ser metas; la
+        heurística baja, así que se recalculan las claves de la cola.
+        """
+        indice = self.mundo.indice_muestra[self.mundo.celda(posicion)]
+        if indice < 0 or not self.activas >> indice & 1:
+            raise ValueError(f"No hay una muestra pendiente en {posicion}")
+        anteriores = self.activas
+        self.activas &= ~(1 << indice)
+
+        afectados = set()
+        for mascara, estados in self.por_mascara.items():
+            if mascara & anteriores and not mascara & self.activas:
+                for estado in estados:
+                    self.metas.add(estado)
+                    if estado in self.sucesores:
+                        afectados |= self._regenerar(estado)
+        for estado in afectados:
+            self._actualizar_estado(estado)
+        self._actualizar_estado(META_VIRTUAL)
+        self._reordenar_cola()
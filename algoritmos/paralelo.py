@@ -0,0 +1,179 @@
+import functools
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Hashable, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from algoritmos import ALGORITMOS
+from helpers.mundo import leer_mundo_binario
+
+# Mundo en forma compacta para enviarlo a otro proceso:
+# (alto, ancho, bytes del mapa uint8, inicio, nave, muestras ordenadas), o la
+# ruta del archivo si el mundo se cargó de un archivo binario
+MundoEmpaquetado = Union[Tuple[int, int, bytes, tuple, Optional[tuple], tuple], str]
+# Un trabajo es (identificador, mundo, nombre del algoritmo en ALGORITMOS, opciones)
+Trabajo = Tuple[Hashable, dict, str, dict]
+
+
+# Cache de soluciones de cada proceso trabajador (ver `CacheSoluciones`), por ruta
+_caches = {}
+
+
+class TiempoAgotado(Exception):
+    """El trabajo superó su tiempo límite dentro del proceso trabajador."""
+
+
+def empaquetar_mundo(mundo: dict) -> MundoEmpaquetado:
+    """
+    Convierte un mundo de `leer_mundo_desde_archivo` en bytes y tuplas (barato
+    de serializar). Un mundo cargado con `leer_mundo_binario` se envía solo por
+    su ruta: cada trabajador lo abre con un memmap y comparten las páginas.
+    """
+    if isinstance(mundo["mapa"], np.memmap) and mundo.get("ruta"):
+        return mundo["ruta"]
+    mapa = np.ascontiguousarray(mundo["mapa"], dtype=np.uint8)
+    alto, ancho = mapa.shape
+    return (alto, ancho, mapa.tobytes(), tuple(mundo["inicio"]), mundo["nave"], tuple(sorted(mundo["muestras"])))
+
+
+def desempaquetar_mundo(empaquetado: MundoEmpaquetado) -> dict:
+    if isinstance(empaquetado, str):
+        return leer_mundo_binario(empaquetado)
+    alto, ancho, datos, inicio, nave, muestras = empaquetado
+    mapa = np.frombuffer(datos, dtype=np.uint8).reshape(alto, ancho)
+    return {"mapa": mapa, "inicio": inicio, "nave": nave, "muestras": set(muestras)}
+
+
+def _inicializar_trabajador(limite_memoria_mb: Optional[int]) -> None:
+    if limite_memoria_mb:
+        import resource
+        limite = limite_memoria_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _interrumpir(signum, frame):
+    raise TiempoAgotado()
+
+
+def _resolver_trabajo(identificador: Hashable, empaquetado: MundoEmpaquetado, algoritmo: str, opciones: dict, tiempo_limite: Optional[float], ruta_cache: Optional[str] = None, preanalisis: bool = False) -> dict:
+    """
+    Se ejecuta en el proceso trabajador: resuelve un único (mundo, algoritmo).
+    Cualquier excepción del trabajo se devuelve como `error` (su repr) en lugar
+    de propagarse, para no interrumpir el resto del lote.
+    """
+    respuesta = {"id": identificador, "algoritmo": algoritmo, "pid": os.getpid()}
+    usa_alarma = tiempo_limite is not None and hasattr(signal, "setitimer")
+    inicio = time.perf_counter()
+    try:
+        mundo = desempaquetar_mundo(empaquetado)
+        funcion = ALGORITMOS[algoritmo]
+        if ruta_cache is not None:
+            from algoritmos.cache_soluciones import CacheSoluciones
+            if ruta_cache not in _caches:
+                _caches[ruta_cache] = CacheSoluciones(ruta_cache)
+            funcion = _caches[ruta_cache].funcion(algoritmo)
+        if preanalisis:
+            from algoritmos.preanalisis import resolver_con_preanalisis
+            funcion = functools.partial(resolver_con_preanalisis, funcion)
+        if usa_alarma:
+            signal.signal(signal.SIGALRM, _interrumpir)
+            signal.setitimer(signal.ITIMER_REAL, tiempo_limite)
+        inicio = time.perf_counter()
+        respuesta["resultado"] = funcion(mundo["mapa"], mundo["inicio"], mundo["nave"], mundo["muestras"], **opciones)
+    except TiempoAgotado:
+        respuesta["error"] = "tiempo_agotado"
+    except MemoryError:
+        respuesta["error"] = "memoria_agotada"
+    except Exception as excepcion:
+        respuesta["error"] = repr(excepcion)
+    finally:
+        if usa_alarma:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    respuesta["tiempo"] = time.perf_counter() - inicio
+    return respuesta
+
+
+def resolver_en_paralelo(
+    trabajos: Iterable[Trabajo],
+    procesos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    tareas_por_proceso: Optional[int] = 100,
+    limite_memoria_mb: Optional[int] = None,
+    ruta_cache: Optional[str] = None,
+    preanalisis: bool = False,
+) -> Iterator[dict]:
+    """
+    Reparte trabajos (identificador, mundo, algoritmo, opciones) entre procesos y
+    devuelve los resultados a medida que terminan, no en el orden de entrada.
+
+    - procesos: número de procesos trabajadores (por defecto, uno por CPU)
+    - tiempo_limite: segundos por trabajo; al superarse se interrumpe con una
+      alarma dentro del trabajador y se informa `error = "tiempo_agotado"`
+    - tareas_por_proceso: cada trabajador se reemplaza tras este número de
+      trabajos, liberando la memoria que haya acumulado
+    - limite_memoria_mb: límite de memoria virtual por trabajador (RLIMIT_AS);
+      al superarlo el trabajo informa `error = "memoria_agotada"`
+    - ruta_cache: base SQLite compartida por los trabajadores (ver
+      `CacheSoluciones`); los trabajos ya resueltos se leen de ella
+    - preanalisis: cada trabajo se resuelve a través de
+      `resolver_con_preanalisis`
+
+    Los mundos se envían empaquetados (ver `empaquetar_mundo`) y solo se mantienen
+    en vuelo unos pocos trabajos por proceso, de modo que la entrada puede ser un
+    generador arbitrariamente largo. Cada resultado es un diccionario con `id`,
+    `algoritmo`, `tiempo` y `resultado` o `error` (`repr` de la excepción si el
+    trabajo falló). Si un trabajador muere (por
+    ejemplo, por el OOM killer), los trabajos en vuelo se informan con
+    `error = "proceso_terminado"` y se crea un nuevo grupo de procesos.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    pendientes = iter(trabajos)
+    en_vuelo = {}
+
+    def crear_ejecutor():
+        return ProcessPoolExecutor(
+            max_workers=procesos,
+            max_tasks_per_child=tareas_por_proceso,
+            initializer=_inicializar_trabajador,
+            initargs=(limite_memoria_mb,),
+        )
+
+    def enviar(ejecutor):
+        while len(en_vuelo) < 2 * procesos:
+            trabajo = next(pendientes, None)
+            if trabajo is None:
+                return
+            identificador, mundo, algoritmo, opciones = trabajo
+            futuro = ejecutor.submit(_resolver_trabajo, identificador, empaquetar_mundo(mundo), algoritmo, opciones or {}, tiempo_limite, ruta_cache, preanalisis)
+            en_vuelo[futuro] = (identificador, algoritmo)
+
+    ejecutor = crear_ejecutor()
+    try:
+        enviar(ejecutor)
+        while en_vuelo:
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            roto = False
+            for futuro in terminados:
+                identificador, algoritmo = en_vuelo.pop(futuro)
+                try:
+                    respuesta = futuro.result()
+                except BrokenProcessPool:
+                    roto = True
+                    respuesta = {"id": identificador, "algoritmo": algoritmo, "error": "proceso_terminado"}
+                except Exception as excepcion:
+                    # Por ejemplo, un resultado que no se pudo serializar de vuelta
+                    respuesta = {"id": identificador, "algoritmo": algoritmo, "error": repr(excepcion)}
+                yield respuesta
+            if roto:
+                for futuro, (identificador, algoritmo) in list(en_vuelo.items()):
+                    yield {"id": identificador, "algoritmo": algoritmo, "error": "proceso_terminado"}
+                en_vuelo.clear()
+                ejecutor.shutdown(wait=False, cancel_futures=True)
+                ejecutor = crear_ejecutor()
+            enviar(ejecutor)
+    finally:
+        ejecutor.shutdown(wait=False, cancel_futures=True)
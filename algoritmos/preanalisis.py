@@ -0,0 +1,131 @@
+import time
+from collections import deque
+from typing import Callable, Set, Tuple
+
+import numpy as np
+
+from helpers.mundo import Grid, CASILLA_OBSTACULO, celdas_alcanzables
+from algoritmos.limites import SIN_SOLUCION, resultado_sin_exito
+
+Coordenada = Tuple[int, int]
+
+
+def podar_callejones(transitable: list, alto: int, ancho: int, claves: Set[int]) -> int:
+    """
+    Elimina de `transitable` (lista plana de booleanos, se modifica) las celdas
+    sin salida que no son puntos clave: una celda con un solo vecino transitable
+    solo se puede visitar entrando y saliendo por el mismo sitio, lo que nunca
+    acorta un plan. Al quitarla, su vecino puede quedar también sin salida, así
+    que la poda avanza por los pasillos ciegos hasta el primer cruce.
+    Devuelve el número de celdas eliminadas.
+    """
+    def vecinos(celda: int):
+        fila, col = divmod(celda, ancho)
+        if fila > 0:
+            yield celda - ancho
+        if fila < alto - 1:
+            yield celda + ancho
+        if col > 0:
+            yield celda - 1
+        if col < ancho - 1:
+            yield celda + 1
+
+    grado = [0] * (alto * ancho)
+    pendientes = deque()
+    for celda in range(alto * ancho):
+        if transitable[celda]:
+            grado[celda] = sum(1 for vecino in vecinos(celda) if transitable[vecino])
+            if grado[celda] <= 1 and celda not in claves:
+                pendientes.append(celda)
+
+    podadas = 0
+    while pendientes:
+        celda = pendientes.popleft()
+        if not transitable[celda]:
+            continue
+        transitable[celda] = False
+        podadas += 1
+        for vecino in vecinos(celda):
+            if transitable[vecino]:
+                grado[vecino] -= 1
+                if grado[vecino] <= 1 and vecino not in claves:
+                    pendientes.append(vecino)
+    return podadas
+
+
+def preanalizar_mundo(mapa: Grid, posicion_inicial: Coordenada, posicion_nave: Coordenada, muestras: Set[Coordenada]) -> dict:
+    """
+    Etapa previa a los algoritmos de búsqueda:
+
+    1. Un relleno por inundación desde el inicio determina la componente conexa
+       del astronauta; si alguna muestra queda fuera, el mundo no tiene solución.
+    2. La nave fuera de la componente no se puede recoger y se descarta.
+    3. Las celdas fuera de la componente y los callejones sin salida que no
+       contienen muestras ni nave (ver `podar_callejones`) se convierten en
+       obstáculos. Ningún plan óptimo pasa por ellas, así que el costo óptimo
+       no cambia y el grafo de estados se reduce.
+
+    Devuelve un diccionario con el mundo reducido (`mapa`, `inicio`, `nave`,
+    `muestras`) y el diagnóstico: `factible`, `muestras_inalcanzables`,
+    `nave_descartada` y `celdas_podadas`.
+    """
+    alto, ancho = mapa.shape
+    alcanzable = celdas_alcanzables(mapa, posicion_inicial)
+    inalcanzables = {muestra for muestra in muestras if not alcanzable[muestra]}
+    nave_descartada = posicion_nave is not None and not alcanzable[posicion_nave]
+    nave = None if nave_descartada else posicion_nave
+
+    resultado = {
+        "mapa": mapa,
+        "inicio": posicion_inicial,
+        "nave": nave,
+        "muestras": set(muestras),
+        "factible": not inalcanzables,
+        "muestras_inalcanzables": inalcanzables,
+        "nave_descartada": nave_descartada,
+        "celdas_podadas": 0,
+    }
+    if inalcanzables:
+        return resultado
+
+    claves = {fila * ancho + col for fila, col in muestras} | {posicion_inicial[0] * ancho + posicion_inicial[1]}
+    if nave is not None:
+        claves.add(nave[0] * ancho + nave[1])
+    transitable = alcanzable.ravel().tolist()
+    podar_callejones(transitable, alto, ancho, claves)
+
+    reducido = mapa.copy()
+    reducido[~np.array(transitable, dtype=bool).reshape(alto, ancho)] = CASILLA_OBSTACULO
+    resultado["mapa"] = reducido
+    resultado["celdas_podadas"] = int((reducido != mapa).sum())
+    return resultado
+
+
+def resolver_con_preanalisis(
+    algoritmo: Callable[..., dict],
+    mapa: Grid,
+    posicion_inicial: Coordenada,
+    posicion_nave: Coordenada,
+    muestras: Set[Coordenada],
+    **opciones
+) -> dict:
+    """
+    Ejecuta `preanalizar_mundo` y, si el mundo es factible, pasa el mundo
+    reducido a `algoritmo` (cualquier `busqueda_*`). Un mundo con muestras
+    inalcanzables se rechaza sin expandir ningún nodo (`motivo = "sin_solucion"`).
+    El diagnóstico se añade al resultado en `preanalisis` y `tiempo` incluye
+    el del preanálisis.
+    """
+    tiempo_inicio = time.perf_counter()
+    reducido = preanalizar_mundo(mapa, posicion_inicial, posicion_nave, muestras)
+    diagnostico = {
+        clave: reducido[clave]
+        for clave in ("factible", "muestras_inalcanzables", "nave_descartada", "celdas_podadas")
+    }
+    if not reducido["factible"]:
+        return resultado_sin_exito(SIN_SOLUCION, 0, tiempo_inicio, 0, preanalisis=diagnostico)
+
+    resultado = algoritmo(reducido["mapa"], reducido["inicio"], reducido["nave"], reducido["muestras"], **opciones)
+    resultado["preanalisis"] = diagnostico
+    resultado["tiempo"] = time.perf_counter() - tiempo_inicio
+    return resultado
@@ -1,73 +1,124 @@
+import functools
 import time
-from typing import Tuple, Set, List, Dict
-from algoritmos.astar import empaquetar_estado, generar_estados_vecinos
+from typing import Tuple, Set, List, Iterator, Optional
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+from helpers.mundo import Grid, compilar_mundo
 
 Coordenada = Tuple[int, int]
-# Estado ahora incluye el flag `nave_usada` (bool) como quinto elemento
-Estado = Tuple[Coordenada, Tuple[Tuple[int, int], ...], bool, int, bool]
-
-
-def reconstruir_camino(diccionario_padres: Dict[Estado, Estado], estado_meta: Estado) -> List[Coordenada]:
-    camino = []
-    estado_actual = estado_meta
-    while estado_actual in diccionario_padres:
-        camino.append(estado_actual[0])
-        estado_actual = diccionario_padres[estado_actual]
-    camino.append(estado_actual[0])
-    camino.reverse()
-    return camino
+Estado = EstadoCompacto
 
 
 def busqueda_profundidad_sin_ciclos(
-    mapa: List[List[int]],
+    mapa: Grid,
     posicion_inicial: Coordenada,
     posicion_nave: Coordenada,
     muestras_iniciales: Set[Coordenada],
-    profundidad_maxima: int = 10000
+    profundidad_maxima: int = 10000,
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
 ):
     """
     Búsqueda en profundidad que evita ciclos (no reingresa en nodos del camino actual).
     Devuelve la primera solución encontrada.
+
+    La pila guarda, por cada nivel del camino actual, el estado, el iterador de
+    sus vecinos pendientes y el costo acumulado. Un único conjunto `en_camino` se
+    actualiza al avanzar y se deshace al retroceder, de modo que la memoria es
+    proporcional a la profundidad. Los vecinos se recorren del último al primero,
+    el mismo orden en que se visitaban al apilarlos todos de una vez.
+
+    Límites y cancelación: ver `Presupuesto`; el plan parcial es el primer
+    camino que recogió más muestras. `observador` recibe los eventos de la
+    búsqueda (ver `Observador`).
     """
     tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    espacio = EspacioEstados(compilar_mundo(mapa, posicion_nave, muestras_iniciales))
+    estado_inicial = espacio.estado_inicial(posicion_inicial)
+    nodos_expandidos = 1
+    generar_vecinos = espacio.generar_vecinos
+    if observador is not None:
+        observador.al_iniciar(espacio)
+        generar_vecinos = observador.cronometrar("generacion", generar_vecinos)
+        observador.al_expandir(estado_inicial, 0.0, None)
+
+    terminar = functools.partial(finalizar_busqueda, observador, lambda: {"en_camino": max_en_camino})
+
+    en_camino = {estado_inicial}
+    max_en_camino = 1
+    if espacio.es_meta(estado_inicial):
+        return terminar(resultado_exito([posicion_inicial], [0.0], nodos_expandidos, tiempo_inicio, 1))
 
-    estado_inicial = empaquetar_estado(posicion_inicial, muestras_iniciales, False, 0, False)
+    def pendientes(estado: Estado) -> Iterator[Tuple[Estado, float]]:
+        return reversed(generar_vecinos(estado))
 
-    pila = [(estado_inicial, {estado_inicial})]  # (estado, conjunto_de_estados_en_camino)
-    diccionario_padres: Dict[Estado, Estado] = {}
-    nodos_expandidos = 0
+    estados: List[Estado] = [estado_inicial]
+    iteradores: List[Iterator[Tuple[Estado, float]]] = [pendientes(estado_inicial)]
+    costos: List[float] = [0.0]
+    max_frontera = 1
+    # Mejor plan parcial: estados del primer camino que dejó menos muestras pendientes
+    menos_restantes = espacio.muestras_restantes(estado_inicial)
+    mejor_camino, mejor_costo = [estado_inicial], 0.0
+
+    def parcial():
+        camino = [espacio.posicion(estado) for estado in mejor_camino]
+        return camino, mejor_costo, len(espacio.muestras) - menos_restantes
+
+    while iteradores:
+        if agotado is not None and (motivo := agotado(nodos_expandidos)):
+            return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, max_frontera, parcial()))
+
+        siguiente = next(iteradores[-1], None)
+        if siguiente is None:
+            # Sin vecinos pendientes: retroceder
+            iteradores.pop()
+            costos.pop()
+            en_camino.discard(estados.pop())
+            continue
+
+        estado_vecino, costo_mov = siguiente
+        costo = costos[-1] + costo_mov
+        if observador is not None:
+            observador.al_generar(estado_vecino, costo)
+        if estado_vecino in en_camino:
+            if observador is not None:
+                observador.al_duplicado(estado_vecino)
+            continue  # evita ciclos en el camino actual
 
-    while pila:
-        estado_actual, camino_actual = pila.pop()
         nodos_expandidos += 1
+        if observador is not None:
+            observador.al_expandir(estado_vecino, costo, estados[-1])
+        restantes = espacio.muestras_restantes(estado_vecino)
+        if restantes < menos_restantes:
+            menos_restantes = restantes
+            mejor_camino, mejor_costo = estados + [estado_vecino], costo
 
-        posicion_actual, muestras_restantes_tupla, en_nave, combustible, nave_usada = estado_actual
-        muestras_restantes = set(muestras_restantes_tupla)
-
-        if not muestras_restantes:
-            tiempo_total = time.perf_counter() - tiempo_inicio
-            camino = reconstruir_camino(diccionario_padres, estado_actual)
-            return {
-                "exito": True,
-                "camino": camino,
-                "costo_total": 0.0,  # No calculamos sumatoria real en esta versión
-                "nodos_expandidos": nodos_expandidos,
-                "profundidad": len(camino) - 1,
-                "tiempo": tiempo_total,
-            }
+        if espacio.es_meta(estado_vecino):
+            estados.append(estado_vecino)
+            costos.append(costo)
+            camino = [espacio.posicion(estado) for estado in estados]
+            return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, max_frontera))
 
         # Evitar expandir si profundidad excede límite
-        if len(camino_actual) > profundidad_maxima:
+        if len(estados) >= profundidad_maxima:
             continue
 
-        for estado_vecino, costo_mov in generar_estados_vecinos(estado_actual, mapa, posicion_nave):
-            if estado_vecino in camino_actual:
-                continue  # evita ciclos en el camino actual
-
-            # Guardar padre y empujar con nuevo conjunto de estados en camino
-            diccionario_padres[estado_vecino] = estado_actual
-            nuevo_camino_actual = set(camino_actual)
-            nuevo_camino_actual.add(estado_vecino)
-            pila.append((estado_vecino, nuevo_camino_actual))
+        estados.append(estado_vecino)
+        iteradores.append(pendientes(estado_vecino))
+        costos.append(costo)
+        en_camino.add(estado_vecino)
+        if len(en_camino) > max_en_camino:
+            max_en_camino = len(en_camino)
+        if observador is not None:
+            observador.al_insertar(estado_vecino, costo)
+        if len(estados) > max_frontera:
+            max_frontera = len(estados)
 
-    return {"exito": False, "nodos_expandidos": nodos_expandidos, "tiempo": time.perf_counter() - tiempo_inicio}
+    return terminar(resultado_sin_exito(SIN_SOLUCION, nodos_expandidos, tiempo_inicio, max_frontera, parcial()))
@@ -0,0 +1,283 @@
+import functools
+import time
+from array import array
+from typing import Tuple, Set, List, Dict, Optional
+from helpers.mundo import Grid, MundoCompilado, compilar_mundo
+from algoritmos.espacio_estados import EspacioEstados, COMBUSTIBLE_NAVE
+from algoritmos.heuristica_terreno import campo_distancias_a_pie, campo_pasos, INALCANZABLE
+from algoritmos.limites import Presupuesto, TokenCancelacion, SIN_SOLUCION, resultado_exito, resultado_sin_exito, finalizar_busqueda
+from algoritmos.instrumentacion import Observador
+
+Coordenada = Tuple[int, int]
+# Una entrada de la programación dinámica se identifica por (tabla, recogidas, clave):
+#   - "A": antes de recoger la nave; clave = nodo actual
+#   - "F": con la nave recogida y combustible > 0; clave = (nodo, combustible)
+#   - "B": con la nave recogida y sin combustible; clave = nodo actual
+# Los nodos 0..k-1 son las muestras, k es el inicio y k+1 la nave.
+Entrada = Tuple[str, int, object]
+
+
+def capas_de_movimientos(mundo: MundoCompilado, celda_origen: int, movimientos: int) -> List[Dict[int, int]]:
+    """
+    Búsqueda local acotada alrededor de `celda_origen`: capas[i] contiene las
+    celdas alcanzables con exactamente i movimientos, cada una con la celda de la
+    capa anterior desde la que se llega.
+    """
+    capas = [{celda_origen: -1}]
+    for _ in range(movimientos):
+        capa: Dict[int, int] = {}
+        for celda in capas[-1]:
+            base = 4 * celda
+            for vecino in mundo.vecinos[base:base + 4]:
+                if vecino >= 0 and vecino not in capa:
+                    capa[vecino] = celda
+        capas.append(capa)
+    return capas
+
+
+def descender(mundo: MundoCompilado, campo: array, celda: int, por_pasos: bool = False) -> List[int]:
+    """
+    Sigue un campo de distancias inverso desde `celda` hasta su destino (valor 0).
+    Devuelve las celdas recorridas sin incluir la de partida.
+    """
+    celdas = []
+    while campo[celda] != 0:
+        base = 4 * celda
+        for vecino in mundo.vecinos[base:base + 4]:
+            if vecino < 0 or campo[vecino] == INALCANZABLE:
+                continue
+            costo = 1 if por_pasos else int(mundo.costo_entrada[vecino])
+            if campo[vecino] + costo == campo[celda]:
+                break
+        celda = vecino
+        celdas.append(celda)
+    return celdas
+
+
+def busqueda_puntos_clave(
+    mapa: Grid,
+    posicion_inicial: Coordenada,
+    posicion_nave: Coordenada,
+    muestras_iniciales: Set[Coordenada],
+    limite_nodos: Optional[int] = None,
+    tiempo_limite: Optional[float] = None,
+    limite_memoria_mb: Optional[float] = None,
+    cancelacion: Optional[TokenCancelacion] = None,
+    observador: Optional[Observador] = None
+):
+    """
+    Solucionador exacto sobre puntos clave (inicio, nave y muestras).
+
+    1. Calcula campos de distancia exactos (Dijkstra/BFS inversos) hacia cada
+       muestra y hacia la nave.
+    2. Recorre con programación dinámica de Held–Karp los órdenes de visita,
+       distinguiendo la fase a pie previa a la nave, la fase con combustible y
+       la fase a pie posterior. Antes de recoger la nave los tramos la evitan,
+       pues pisarla la recoge.
+    3. Cuando el combustible no alcanza para llegar a la siguiente muestra, una
+       búsqueda local acotada enumera las celdas donde se agota el combustible.
+    4. Une los tramos en un camino de celdas y lo reproduce con `EspacioEstados`
+       para obtener los costos paso a paso.
+
+    El costo de cada tramo es una cota inferior de cualquier camino real entre los
+    mismos eventos, así que el resultado es óptimo. El número de entradas de la
+    programación dinámica crece como 2^k, por lo que está pensado para mundos con
+    pocas muestras (hasta ~15).
+
+    Retorna el mismo diccionario que `busqueda_a_estrella`; `nodos_expandidos`
+    cuenta las entradas de la programación dinámica expandidas.
+
+    Límites y cancelación: ver `Presupuesto`; se comprueban por entrada
+    expandida (no durante el cálculo de los campos) y el plan parcial es la
+    entrada más barata entre las que recogieron más muestras.
+
+    Con `observador` (ver `Observador`) cada entrada expandida produce
+    `al_expandir` y cada tramo relajado `al_generar` seguido de `al_insertar` o
+    `al_duplicado`, según mejore o no la entrada de destino.
+    """
+    tiempo_inicio = time.perf_counter()
+    presupuesto = Presupuesto(limite_nodos, tiempo_limite, limite_memoria_mb, cancelacion)
+    agotado = presupuesto.agotado if presupuesto.activo else None
+
+    mundo = compilar_mundo(mapa, posicion_nave, muestras_iniciales)
+    espacio = EspacioEstados(mundo)
+    k = len(mundo.muestras)
+    INICIO, NAVE = k, k + 1
+    celda_nave = mundo.celda_nave
+    hay_nave = celda_nave >= 0
+    celdas = [mundo.celda(muestra) for muestra in mundo.muestras] + [mundo.celda(posicion_inicial), celda_nave]
+
+    # Campos a pie hacia cada muestra: sin pasar por la nave (fase previa) y libres (fase posterior)
+    campos_libres = [campo_distancias_a_pie(mundo, celdas[t]) for t in range(k)]
+    if hay_nave:
+        campos_sin_nave = [campo_distancias_a_pie(mundo, celdas[t], celda_nave) for t in range(k)]
+        campo_nave = campo_distancias_a_pie(mundo, celda_nave)
+        campos_pasos = [campo_pasos(mundo, celdas[t]) for t in range(k)]
+    else:
+        campos_sin_nave = campos_libres
+
+    # Resultado de la búsqueda local por (celda, combustible): capas y mejor celda de
+    # agotamiento del combustible para cada muestra
+    alcances: Dict[Tuple[int, int], Tuple[List[Dict[int, int]], List[Tuple[int, int]]]] = {}
+
+    def alcance(celda: int, combustible: int):
+        clave = (celda, combustible)
+        if clave not in alcances:
+            capas = capas_de_movimientos(mundo, celda, combustible)
+            mejores = []
+            for t in range(k):
+                campo = campos_libres[t]
+                mejores.append(min(((campo[x], x) for x in capas[-1]), default=(INALCANZABLE, -1)))
+            alcances[clave] = (capas, mejores)
+        return alcances[clave]
+
+    total = 1 << k
+    tablas: Dict[str, List[Optional[dict]]] = {"A": [None] * total, "F": [None] * total, "B": [None] * total}
+
+    def relajar(tabla: str, recogidas: int, clave, costo: float, padre: Entrada):
+        nivel = tablas[tabla][recogidas]
+        if nivel is None:
+            nivel = tablas[tabla][recogidas] = {}
+        actual = nivel.get(clave)
+        if observador is not None:
+            observador.al_generar((tabla, recogidas, clave), costo)
+        if actual is None or costo < actual[0]:
+            nivel[clave] = (costo, padre)
+            if observador is not None:
+                observador.al_insertar((tabla, recogidas, clave), costo)
+        elif observador is not None:
+            observador.al_duplicado((tabla, recogidas, clave))
+
+    def tamanos() -> Dict[str, int]:
+        por_tabla = {
+            tabla: sum(len(nivel) for nivel in niveles if nivel)
+            for tabla, niveles in tablas.items()
+        }
+        por_tabla["alcances"] = len(alcances)
+        return por_tabla
+
+    terminar = functools.partial(finalizar_busqueda, observador, tamanos)
+
+    def reconstruir(entrada: Entrada) -> Tuple[List[Coordenada], List[float]]:
+        """Camino de celdas y costos acumulados desde el inicio hasta `entrada`."""
+        entradas: List[Entrada] = []
+        while entrada is not None:
+            entradas.append(entrada)
+            tabla, recogidas, clave = entrada
+            entrada = tablas[tabla][recogidas][clave][1]
+        entradas.reverse()
+
+        secuencia = [celdas[INICIO]]
+        for (tabla_previa, _, clave_previa), (tabla, _, clave) in zip(entradas, entradas[1:]):
+            origen = secuencia[-1]
+            destino = clave[0] if tabla == "F" else clave
+            if tabla_previa == "A":
+                campo = campo_nave if destino == NAVE else campos_sin_nave[destino]
+                secuencia.extend(descender(mundo, campo, origen))
+            elif tabla_previa == "B":
+                secuencia.extend(descender(mundo, campos_libres[destino], origen))
+            else:
+                combustible = clave_previa[1]
+                if campos_pasos[destino][origen] <= combustible:
+                    secuencia.extend(descender(mundo, campos_pasos[destino], origen, por_pasos=True))
+                else:
+                    capas, mejores = alcance(origen, combustible)
+                    celda = mejores[destino][1]
+                    tramo = []
+                    for capa in reversed(capas[1:]):
+                        tramo.append(celda)
+                        celda = capa[celda]
+                    secuencia.extend(reversed(tramo))
+                    secuencia.extend(descender(mundo, campos_libres[destino], secuencia[-1]))
+
+        # Reproducir el camino con las reglas de movimiento para obtener los costos reales
+        estado = espacio.estado_inicial(posicion_inicial)
+        camino = [posicion_inicial]
+        costos = [0.0]
+        for celda in secuencia[1:]:
+            if espacio.es_meta(estado):
+                break
+            estado, costo_mov = next((v, c) for v, c in espacio.generar_vecinos(estado) if espacio.celda(v) == celda)
+            camino.append(mundo.posicion(celda))
+            costos.append(costos[-1] + costo_mov)
+        return camino, costos
+
+    def detenido(motivo: str) -> dict:
+        """Resultado sin éxito con la entrada más barata de las que más muestras recogieron."""
+        candidatas = [
+            (-recogidas.bit_count(), costo, (tabla, recogidas, clave))
+            for tabla in ("A", "F", "B")
+            for recogidas, nivel in enumerate(tablas[tabla]) if nivel
+            for clave, (costo, _) in nivel.items()
+        ]
+        menos_pendientes, _, entrada = min(candidatas)
+        camino, costos = reconstruir(entrada)
+        return terminar(resultado_sin_exito(motivo, nodos_expandidos, tiempo_inicio, None, (camino, costos[-1], -menos_pendientes)))
+
+    relajar("A", 0, INICIO, 0.0, None)
+    nodos_expandidos = 0
+
+    # Cada tramo recoge una muestra (salvo el de la nave, que mantiene `recogidas`),
+    # así que recorrer `recogidas` en orden numérico respeta las dependencias.
+    for recogidas in range(total):
+        pendientes = [t for t in range(k) if not recogidas >> t & 1]
+
+        for u, (g, anterior) in list((tablas["A"][recogidas] or {}).items()):
+            if agotado is not None and (motivo := agotado(nodos_expandidos)):
+                return detenido(motivo)
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_expandir(("A", recogidas, u), g, anterior)
+            origen = celdas[u]
+            for t in pendientes:
+                w = campos_sin_nave[t][origen]
+                if w != INALCANZABLE:
+                    relajar("A", recogidas | 1 << t, t, g + w, ("A", recogidas, u))
+            if hay_nave and campo_nave[origen] != INALCANZABLE:
+                relajar("F", recogidas, (NAVE, COMBUSTIBLE_NAVE), g + campo_nave[origen], ("A", recogidas, u))
+
+        for (u, combustible), (g, anterior) in (tablas["F"][recogidas] or {}).items():
+            if agotado is not None and (motivo := agotado(nodos_expandidos)):
+                return detenido(motivo)
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_expandir(("F", recogidas, (u, combustible)), g, anterior)
+            origen = celdas[u]
+            for t in pendientes:
+                pasos = campos_pasos[t][origen]
+                if pasos == INALCANZABLE:
+                    continue
+                padre = ("F", recogidas, (u, combustible))
+                if pasos <= combustible:
+                    restante = combustible - pasos
+                    if restante:
+                        relajar("F", recogidas | 1 << t, (t, restante), g + 0.5 * pasos, padre)
+                    else:
+                        relajar("B", recogidas | 1 << t, t, g + 0.5 * pasos, padre)
+                else:
+                    mejor, _ = alcance(origen, combustible)[1][t]
+                    if mejor != INALCANZABLE:
+                        relajar("B", recogidas | 1 << t, t, g + 0.5 * combustible + mejor, padre)
+
+        for u, (g, anterior) in (tablas["B"][recogidas] or {}).items():
+            if agotado is not None and (motivo := agotado(nodos_expandidos)):
+                return detenido(motivo)
+            nodos_expandidos += 1
+            if observador is not None:
+                observador.al_expandir(("B", recogidas, u), g, anterior)
+            origen = celdas[u]
+            for t in pendientes:
+                w = campos_libres[t][origen]
+                if w != INALCANZABLE:
+                    relajar("B", recogidas | 1 << t, t, g + w, ("B", recogidas, u))
+
+    finales = [
+        (costo, (tabla, total - 1, clave))
+        for tabla in ("A", "F", "B")
+        for clave, (costo, _) in (tablas[tabla][total - 1] or {}).items()
+    ]
+    if not finales:
+        return detenido(SIN_SOLUCION)
+
+    camino, costos = reconstruir(min(finales)[1])
+    return terminar(resultado_exito(camino, costos, nodos_expandidos, tiempo_inicio, None))
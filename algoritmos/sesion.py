@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from helpers.mundo import Grid, compilar_mundo, dentro_de_limites, es_obstaculo
+from algoritmos.astar import busqueda_a_estrella, construir_heuristica
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto
+
+Coordenada = Tuple[int, int]
+
+
+class HeuristicaMemoizada:
+    """
+    Heurística con los valores ya calculados guardados por estado. Las
+    búsquedas desde inicios distintos en un mismo mundo recorren en gran parte
+    los mismos estados, así que cada valor se calcula una vez por sesión. Al
+    llegar a `max_memo` valores se dejan de guardar otros nuevos.
+    """
+
+    def __init__(self, heuristica: Callable[[EstadoCompacto], float], max_memo: Optional[int] = None):
+        self.heuristica = heuristica
+        self.max_memo = max_memo
+        self.valores: Dict[EstadoCompacto, float] = {}
+
+    def __call__(self, estado: EstadoCompacto) -> float:
+        valor = self.valores.get(estado)
+        if valor is None:
+            valor = self.heuristica(estado)
+            if self.max_memo is None or len(self.valores) < self.max_memo:
+                self.valores[estado] = valor
+        return valor
+
+
+class SesionMundo:
+    """
+    Sesión de consultas sobre un mismo mundo (mapa, nave y muestras) desde
+    distintos puntos de inicio, por ejemplo al repartir una flota.
+
+    El mundo se compila una sola vez y la heurística de cada modo (con sus
+    campos de distancia desde cada muestra y desde la nave, y los árboles
+    mínimos memoizados) se construye la primera vez que se pide y se reutiliza
+    en todas las consultas siguientes, junto con los valores ya calculados
+    (ver `HeuristicaMemoizada`, hasta `max_memo` por modo). Las tablas solo se
+    leen o crecen con valores fijos, así que varias consultas pueden
+    ejecutarse a la vez en hilos.
+
+    Ejemplo:
+        sesion = SesionMundo(mapa, nave, muestras, modo_heuristica="terreno")
+        resultado = sesion.plan((0, 0))
+        resultados = sesion.planificar_lote([(0, 0), (5, 3), (9, 9)], hilos=4)
+    """
+
+    def __init__(self, mapa: Grid, posicion_nave: Optional[Coordenada], muestras_objetivo: Set[Coordenada], modo_heuristica: str = "terreno", max_memo: Optional[int] = 2_000_000):
+        # Copia propia: la sesión no debe ver cambios posteriores del mapa del llamador
+        self.mapa = np.array(mapa, dtype=np.uint8)
+        self.posicion_nave = posicion_nave
+        self.muestras = set(muestras_objetivo)
+        self.modo_heuristica = modo_heuristica
+        self.max_memo = max_memo
+        self.espacio = EspacioEstados(compilar_mundo(self.mapa, posicion_nave, self.muestras))
+        self._heuristicas: Dict[str, Callable[[EstadoCompacto], float]] = {}
+        self._candado = threading.Lock()
+
+    def heuristica(self, modo: Optional[str] = None) -> Callable[[EstadoCompacto], float]:
+        """Heurística del modo indicado (el de la sesión por defecto), construida una sola vez."""
+        modo = modo or self.modo_heuristica
+        h = self._heuristicas.get(modo)
+        if h is None:
+            with self._candado:
+                h = self._heuristicas.get(modo)
+                if h is None:
+                    h = self._heuristicas[modo] = HeuristicaMemoizada(construir_heuristica(self.espacio, modo), self.max_memo)
+        return h
+
+    def plan(self, posicion_inicio: Coordenada, modo_heuristica: Optional[str] = None, **opciones) -> dict:
+        """
+        Plan óptimo desde `posicion_inicio`, con el mismo resultado que
+        `busqueda_a_estrella(mapa, posicion_inicio, nave, muestras, ...)`.
+        Las `opciones` se pasan a `busqueda_a_estrella` (frontera, límites,
+        observador...).
+        """
+        if not dentro_de_limites(self.mapa, posicion_inicio) or es_obstaculo(self.mapa, posicion_inicio):
+            raise ValueError(f"Posición de inicio no válida: {posicion_inicio}")
+        return busqueda_a_estrella(
+            self.mapa, posicion_inicio, self.posicion_nave, self.muestras,
+            espacio=self.espacio, heuristica_precalculada=self.heuristica(modo_heuristica), **opciones
+        )
+
+    def planificar_lote(self, inicios: Iterable[Coordenada], hilos: Optional[int] = None, **opciones) -> List[dict]:
+        """
+        Resuelve `plan(inicio)` para cada inicio y devuelve los resultados en el
+        mismo orden. Con `hilos` las consultas se reparten en un grupo de
+        hilos que comparten las tablas de la sesión.
+
+        Las búsquedas son código Python puro, así que con el GIL los hilos no
+        aceleran el cálculo; sirven para atender consultas concurrentes (o
+        escalan en un intérprete sin GIL). Para usar varios núcleos con el GIL,
+        ver `resolver_en_paralelo`.
+        """
+        inicios = list(inicios)
+        # Las tablas se construyen antes de repartir, no dentro de cada hilo
+        self.heuristica(opciones.get("modo_heuristica"))
+        if not hilos or hilos <= 1:
+            return [self.plan(inicio, **opciones) for inicio in inicios]
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            return list(ejecutor.map(lambda inicio: self.plan(inicio, **opciones), inicios))
@@ -0,0 +1,151 @@
+"""
+Traza binaria de expansiones.
+
+Un `GrabadorTraza` es un `Observador` que escribe cada expansión como un
+registro de ancho fijo en un archivo, sin guardar nada en memoria salvo un
+búfer. El archivo empieza con un encabezado (firma, versión, tamaño de
+registro, alto y ancho del mapa) seguido de los registros:
+
+    orden (u32) | estado (u64) | padre (u64) | fila (u16) | columna (u16) | g (f32) | h (f32)
+
+Ejemplo:
+    with GrabadorTraza("a_estrella.traza") as grabador:
+        busqueda_a_estrella(mapa, inicio, nave, muestras, observador=grabador)
+    calor = mapa_calor("a_estrella.traza")
+
+La lectura (`bloques_traza`, `mapa_calor`) usa un memmap de NumPy y recorre el
+archivo por bloques, así que trazas de decenas de millones de expansiones no se
+cargan enteras en memoria.
+"""
+import math
+import struct
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from algoritmos.espacio_estados import EspacioEstados, EstadoCompacto, DESPLAZAMIENTO_CELDA
+from algoritmos.instrumentacion import Observador
+
+FIRMA = b"SATR"
+VERSION = 1
+# Encabezado: firma, versión, bytes por registro, alto y ancho del mapa
+ENCABEZADO = struct.Struct("<4sHHII")
+# Registro: orden de expansión, estado, padre, fila, columna, g, h
+REGISTRO = struct.Struct("<IQQHHff")
+TIPO_REGISTRO = np.dtype([
+    ("orden", "<u4"),
+    ("estado", "<u8"),
+    ("padre", "<u8"),
+    ("fila", "<u2"),
+    ("col", "<u2"),
+    ("g", "<f4"),
+    ("h", "<f4"),
+])
+# Valor del campo `padre` en el estado inicial
+SIN_PADRE = (1 << 64) - 1
+
+
+class GrabadorTraza(Observador):
+    """
+    Observador que vuelca cada expansión a `ruta` (ver el formato arriba).
+
+    Los registros se acumulan en un búfer de `registros_por_bloque` entradas y
+    se escriben al llenarse; el archivo se cierra en `al_terminar` o al salir
+    del bloque `with`. Con `calcular_h` se evalúa la heurística de la búsqueda
+    en cada expansión (las búsquedas sin heurística graban NaN).
+
+    Solo admite búsquedas sobre estados compactos de hasta 64 bits (todas salvo
+    `busqueda_puntos_clave`).
+    """
+
+    def __init__(self, ruta: str, registros_por_bloque: int = 65536, calcular_h: bool = True):
+        self.ruta = ruta
+        self.registros = 0
+        self.calcular_h = calcular_h
+        self._bufer = bytearray(REGISTRO.size * registros_por_bloque)
+        self._usado = 0
+        self._archivo = None
+        self._espacio: Optional[EspacioEstados] = None
+        self._heuristica: Optional[Callable] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def al_iniciar(self, espacio, heuristica=None):
+        bits = espacio.desplazamiento_mascara + len(espacio.muestras)
+        if bits > 64:
+            raise ValueError(f"Los estados de este mundo ocupan {bits} bits; la traza admite hasta 64")
+        self._espacio = espacio
+        self._heuristica = heuristica if self.calcular_h else None
+        self._archivo = open(self.ruta, "wb")
+        self._archivo.write(ENCABEZADO.pack(FIRMA, VERSION, REGISTRO.size, espacio.mundo.alto, espacio.mundo.ancho))
+
+    def al_expandir(self, estado: EstadoCompacto, costo: float, padre: Optional[EstadoCompacto]):
+        espacio = self._espacio
+        if espacio is None:
+            raise ValueError("GrabadorTraza necesita una búsqueda sobre estados compactos")
+        fila, col = divmod((estado >> DESPLAZAMIENTO_CELDA) & espacio.mascara_celda, espacio.ancho)
+        h = self._heuristica(estado) if self._heuristica is not None else math.nan
+        REGISTRO.pack_into(
+            self._bufer, self._usado,
+            self.registros & 0xFFFFFFFF, estado, SIN_PADRE if padre is None else padre, fila, col, costo, h
+        )
+        self.registros += 1
+        self._usado += REGISTRO.size
+        if self._usado == len(self._bufer):
+            self._vaciar()
+
+    def al_terminar(self, resultado, tamanos):
+        self.cerrar()
+
+    def _vaciar(self) -> None:
+        self._archivo.write(memoryview(self._bufer)[:self._usado])
+        self._usado = 0
+
+    def cerrar(self) -> None:
+        if self._archivo is not None:
+            self._vaciar()
+            self._archivo.close()
+            self._archivo = None
+
+
+def leer_encabezado(ruta: str) -> dict:
+    """Devuelve `alto`, `ancho` y número de `registros` de una traza."""
+    with open(ruta, "rb") as archivo:
+        datos = archivo.read(ENCABEZADO.size)
+        archivo.seek(0, 2)
+        tamano = archivo.tell()
+    if len(datos) < ENCABEZADO.size:
+        raise ValueError(f"{ruta} no es una traza: archivo truncado")
+    firma, version, tamano_registro, alto, ancho = ENCABEZADO.unpack(datos)
+    if firma != FIRMA or version != VERSION or tamano_registro != REGISTRO.size:
+        raise ValueError(f"{ruta} no es una traza compatible (firma {firma!r}, versión {version})")
+    return {"alto": alto, "ancho": ancho, "registros": (tamano - ENCABEZADO.size) // REGISTRO.size}
+
+
+def bloques_traza(ruta: str, tamano_bloque: int = 1 << 20) -> Iterator[np.ndarray]:
+    """
+    Recorre los registros de una traza en orden, en bloques de hasta
+    `tamano_bloque` registros (arreglos estructurados con los campos de
+    `TIPO_REGISTRO`). Los bloques son vistas de un memmap de solo lectura.
+    """
+    registros = leer_encabezado(ruta)["registros"]
+    if registros == 0:
+        return
+    datos = np.memmap(ruta, dtype=TIPO_REGISTRO, mode="r", offset=ENCABEZADO.size, shape=(registros,))
+    for inicio in range(0, registros, tamano_bloque):
+        yield datos[inicio:inicio + tamano_bloque]
+
+
+def mapa_calor(ruta: str, tamano_bloque: int = 1 << 20) -> np.ndarray:
+    """Número de expansiones por celda, como arreglo (alto, ancho) de uint64."""
+    encabezado = leer_encabezado(ruta)
+    alto, ancho = encabezado["alto"], encabezado["ancho"]
+    conteo = np.zeros(alto * ancho, dtype=np.uint64)
+    for bloque in bloques_traza(ruta, tamano_bloque):
+        celdas = bloque["fila"].astype(np.int64) * ancho + bloque["col"]
+        conteo += np.bincount(celdas, minlength=alto * ancho).astype(np.uint64)
+    return conteo.reshape(alto, ancho)
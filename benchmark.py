@@ -0,0 +1,259 @@
+"""
+Ejecución no interactiva de los algoritmos sobre una carpeta de mundos.
+
+Ejemplos:
+    python benchmark.py
+    python benchmark.py --algoritmos a_estrella,costo_uniforme --repeticiones 5 --formato json
+    python benchmark.py --algoritmos "a_estrella:modo_heuristica=terreno,costo_uniforme:frontera=cubetas"
+    python benchmark.py --guardar-linea-base linea_base.json
+    python benchmark.py --linea-base linea_base.json --umbral 0.2
+    python benchmark.py --mundos mundos_generados --procesos 8 --tiempo-limite 60
+    python benchmark.py --cache soluciones.sqlite --repeticiones 1
+
+Con --cache, las ejecuciones servidas desde la cache no se cronometran: se
+cuentan en la columna aciertos_cache.
+
+Con --linea-base el proceso termina con código 1 si algún par (mundo, algoritmo)
+es más lento que la línea base por encima del umbral.
+"""
+import argparse
+import ast
+import csv
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from helpers.mundo import leer_mundo_desde_archivo, EXTENSION_BINARIA
+from algoritmos import ALGORITMOS
+from algoritmos.cache_soluciones import CacheSoluciones
+from algoritmos.paralelo import resolver_en_paralelo
+from algoritmos.preanalisis import resolver_con_preanalisis
+
+COLUMNAS = [
+    "mundo",
+    "algoritmo",
+    "exito",
+    "costo_total",
+    "nodos_expandidos",
+    "max_frontera",
+    "tiempo_min",
+    "tiempo_mediana",
+    "nodos_por_segundo",
+    "memoria_pico_kb",
+    "repeticiones",
+    "aciertos_cache",
+]
+
+
+def interpretar_algoritmo(especificacion: str) -> Tuple[str, str, dict]:
+    """
+    Convierte "nombre" o "nombre:clave=valor:clave=valor" en (etiqueta, nombre, opciones).
+    Los valores se interpretan como literales de Python cuando es posible.
+    """
+    nombre, *pares = especificacion.split(":")
+    if nombre not in ALGORITMOS:
+        raise SystemExit(f"Algoritmo desconocido: {nombre} (disponibles: {', '.join(ALGORITMOS)})")
+    opciones = {}
+    for par in pares:
+        clave, _, valor = par.partition("=")
+        try:
+            opciones[clave] = ast.literal_eval(valor)
+        except (ValueError, SyntaxError):
+            opciones[clave] = valor
+    return especificacion, nombre, opciones
+
+
+def medir(funcion: Callable, mundo: dict, opciones: dict, repeticiones: int, medir_memoria: bool) -> dict:
+    """
+    Ejecuta un algoritmo `repeticiones` veces sobre un mundo y resume las métricas.
+    Con una cache de soluciones, las ejecuciones servidas desde la cache no
+    cuentan en los tiempos ni en la memoria: se informan en `aciertos_cache`.
+    """
+    argumentos = (mundo["mapa"], mundo["inicio"], mundo["nave"], mundo["muestras"])
+    tiempos = []
+    aciertos = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos, **opciones)
+        if resultado.get("desde_cache"):
+            aciertos += 1
+        else:
+            tiempos.append(time.perf_counter() - inicio)
+
+    memoria_pico_kb = None
+    if medir_memoria:
+        # Ejecución aparte: tracemalloc ralentiza la búsqueda y no debe afectar los tiempos
+        tracemalloc.start()
+        desde_cache = funcion(*argumentos, **opciones).get("desde_cache")
+        if not desde_cache:
+            memoria_pico_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    return resumir(resultado, tiempos, memoria_pico_kb, aciertos)
+
+
+def resumir(resultado: dict, tiempos: List[float], memoria_pico_kb=None, aciertos_cache: int = 0) -> dict:
+    """Métricas de una fila; `tiempos` son solo los de ejecuciones que no salieron de la cache."""
+    tiempo_min = min(tiempos) if tiempos else None
+    nodos = resultado.get("nodos_expandidos")
+    return {
+        "exito": bool(resultado.get("exito", False)),
+        "costo_total": resultado.get("costo_total"),
+        "nodos_expandidos": nodos,
+        "max_frontera": resultado.get("max_frontera"),
+        "tiempo_min": tiempo_min,
+        "tiempo_mediana": statistics.median(tiempos) if tiempos else None,
+        "nodos_por_segundo": round(nodos / tiempo_min) if nodos and tiempo_min else None,
+        "memoria_pico_kb": memoria_pico_kb,
+        "repeticiones": len(tiempos),
+        "aciertos_cache": aciertos_cache,
+    }
+
+
+def ejecutar(carpeta: str, especificaciones: List[str], repeticiones: int, medir_memoria: bool, preanalisis: bool = False, ruta_cache: str = None) -> List[dict]:
+    algoritmos = [interpretar_algoritmo(e) for e in especificaciones]
+    cache = CacheSoluciones(ruta_cache) if ruta_cache else None
+    archivos = sorted(f for f in os.listdir(carpeta) if f.endswith((".txt", EXTENSION_BINARIA)))
+    filas = []
+    for archivo in archivos:
+        mundo = leer_mundo_desde_archivo(os.path.join(carpeta, archivo))
+        for etiqueta, nombre, opciones in algoritmos:
+            funcion = cache.funcion(nombre) if cache is not None else ALGORITMOS[nombre]
+            if preanalisis:
+                funcion = functools.partial(resolver_con_preanalisis, funcion)
+            fila = {"mundo": archivo, "algoritmo": etiqueta}
+            fila.update(medir(funcion, mundo, opciones, repeticiones, medir_memoria))
+            filas.append(fila)
+            estado = "cache" if fila["tiempo_min"] is None else f"{fila['tiempo_min']:.4f}s"
+            print(f"{archivo:<20} {etiqueta:<30} {estado}", file=sys.stderr)
+    return filas
+
+
+def ejecutar_en_paralelo(carpeta: str, especificaciones: List[str], repeticiones: int, procesos: int, tiempo_limite, ruta_cache: str = None, preanalisis: bool = False) -> List[dict]:
+    """
+    Igual que `ejecutar`, pero reparte cada repetición de cada (mundo, algoritmo)
+    entre procesos. Los tiempos se miden dentro de cada trabajador; la memoria
+    pico no se mide en este modo.
+    """
+    algoritmos = [interpretar_algoritmo(e) for e in especificaciones]
+    archivos = sorted(f for f in os.listdir(carpeta) if f.endswith((".txt", EXTENSION_BINARIA)))
+
+    def trabajos():
+        for archivo in archivos:
+            mundo = leer_mundo_desde_archivo(os.path.join(carpeta, archivo))
+            for etiqueta, nombre, opciones in algoritmos:
+                for _ in range(repeticiones):
+                    yield (archivo, etiqueta), mundo, nombre, opciones
+
+    acumulados: Dict[Tuple[str, str], List[dict]] = {}
+    for respuesta in resolver_en_paralelo(trabajos(), procesos=procesos, tiempo_limite=tiempo_limite, ruta_cache=ruta_cache, preanalisis=preanalisis):
+        acumulados.setdefault(respuesta["id"], []).append(respuesta)
+        if "error" in respuesta:
+            estado = respuesta["error"]
+        elif respuesta["resultado"].get("desde_cache"):
+            estado = "cache"
+        else:
+            estado = f"{respuesta['tiempo']:.4f}s"
+        print(f"{respuesta['id'][0]:<20} {respuesta['id'][1]:<30} {estado}", file=sys.stderr)
+
+    filas = []
+    for archivo in archivos:
+        for etiqueta, _, _ in algoritmos:
+            respuestas = acumulados.get((archivo, etiqueta), [])
+            correctas = [r for r in respuestas if "resultado" in r]
+            fila = {"mundo": archivo, "algoritmo": etiqueta}
+            if correctas:
+                medidas = [r["tiempo"] for r in correctas if not r["resultado"].get("desde_cache")]
+                fila.update(resumir(correctas[-1]["resultado"], medidas, aciertos_cache=len(correctas) - len(medidas)))
+            else:
+                fila.update({"exito": False, "repeticiones": 0})
+            filas.append(fila)
+    return filas
+
+
+def comparar_con_linea_base(filas: List[dict], linea_base: List[dict], umbral: float, tolerancia: float) -> List[str]:
+    """
+    Devuelve la descripción de cada regresión: tiempo mínimo mayor que el de la
+    línea base en más de `umbral` (relativo) y de `tolerancia` segundos (absoluto).
+    """
+    anteriores: Dict[Tuple[str, str], dict] = {(f["mundo"], f["algoritmo"]): f for f in linea_base}
+    regresiones = []
+    for fila in filas:
+        anterior = anteriores.get((fila["mundo"], fila["algoritmo"]))
+        if anterior is None or fila.get("tiempo_min") is None or anterior.get("tiempo_min") is None:
+            continue
+        actual, base = fila["tiempo_min"], anterior["tiempo_min"]
+        if actual > base * (1 + umbral) and actual - base > tolerancia:
+            regresiones.append(
+                f"{fila['mundo']} / {fila['algoritmo']}: {base:.4f}s -> {actual:.4f}s (+{(actual / base - 1) * 100:.0f}%)"
+            )
+    return regresiones
+
+
+def escribir(filas: List[dict], formato: str, salida) -> None:
+    if formato == "json":
+        json.dump(filas, salida, indent=2)
+        salida.write("\n")
+    else:
+        escritor = csv.DictWriter(salida, fieldnames=COLUMNAS, restval="")
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+
+def main(argumentos=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de los algoritmos de Smart Astronaut")
+    parser.add_argument("--mundos", default="mundos", help="carpeta con los archivos de mundo (.txt o .bin)")
+    parser.add_argument(
+        "--algoritmos",
+        default=",".join(ALGORITMOS),
+        help="lista separada por comas; admite opciones como a_estrella:modo_heuristica=terreno",
+    )
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--formato", choices=("csv", "json"), default="csv")
+    parser.add_argument("--salida", help="archivo de salida (por defecto, la salida estándar)")
+    parser.add_argument("--sin-memoria", action="store_true", help="no medir la memoria pico con tracemalloc")
+    parser.add_argument("--preanalisis", action="store_true", help="reduce cada mundo con el preanálisis antes de resolverlo")
+    parser.add_argument("--procesos", type=int, default=1, help="reparte los trabajos entre N procesos")
+    parser.add_argument("--tiempo-limite", type=float, help="segundos por trabajo (solo con --procesos > 1)")
+    parser.add_argument("--cache", metavar="RUTA", help="resuelve a través de una cache de soluciones SQLite")
+    parser.add_argument("--guardar-linea-base", metavar="RUTA", help="guarda los resultados como línea base (JSON)")
+    parser.add_argument("--linea-base", metavar="RUTA", help="compara contra una línea base guardada")
+    parser.add_argument("--umbral", type=float, default=0.25, help="ralentización relativa tolerada (0.25 = 25%%)")
+    parser.add_argument("--tolerancia", type=float, default=0.002, help="ralentización absoluta tolerada en segundos")
+    args = parser.parse_args(argumentos)
+
+    if args.procesos > 1:
+        filas = ejecutar_en_paralelo(args.mundos, args.algoritmos.split(","), args.repeticiones, args.procesos, args.tiempo_limite, args.cache, args.preanalisis)
+    else:
+        filas = ejecutar(args.mundos, args.algoritmos.split(","), args.repeticiones, not args.sin_memoria, args.preanalisis, args.cache)
+
+    if args.salida:
+        with open(args.salida, "w", newline="") as salida:
+            escribir(filas, args.formato, salida)
+    else:
+        escribir(filas, args.formato, sys.stdout)
+
+    if args.guardar_linea_base:
+        with open(args.guardar_linea_base, "w") as archivo:
+            json.dump(filas, archivo, indent=2)
+
+    if args.linea_base:
+        with open(args.linea_base) as archivo:
+            regresiones = comparar_con_linea_base(filas, json.load(archivo), args.umbral, args.tolerancia)
+        if regresiones:
+            print("\n=== REGRESIONES ===", file=sys.stderr)
+            for regresion in regresiones:
+                print(regresion, file=sys.stderr)
+            return 1
+        print("\nSin regresiones respecto a la línea base.", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
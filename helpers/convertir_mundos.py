@@ -0,0 +1,47 @@
+"""
+Conversión de mundos del formato de texto de `mundos/` al formato binario
+(ver `escribir_mundo_binario`), que se carga con un memmap sin analizar texto.
+
+Ejemplos:
+    python -m helpers.convertir_mundos mundos/Prueba1.txt
+    python -m helpers.convertir_mundos mundos mundos_generados --destino mundos_bin
+"""
+import argparse
+import os
+from typing import List, Optional
+
+from helpers.mundo import leer_mundo_desde_archivo, escribir_mundo_binario, EXTENSION_BINARIA
+
+
+def convertir_a_binario(ruta_texto: str, ruta_binaria: Optional[str] = None) -> str:
+    """Convierte un mundo de texto; por defecto lo escribe junto al original con extensión .bin."""
+    if ruta_binaria is None:
+        ruta_binaria = os.path.splitext(ruta_texto)[0] + EXTENSION_BINARIA
+    escribir_mundo_binario(ruta_binaria, leer_mundo_desde_archivo(ruta_texto))
+    return ruta_binaria
+
+
+def main(argumentos=None) -> None:
+    parser = argparse.ArgumentParser(description="Convierte mundos de texto al formato binario")
+    parser.add_argument("rutas", nargs="+", help="archivos .txt o carpetas con archivos .txt")
+    parser.add_argument("--destino", help="carpeta de salida (por defecto, junto a cada original)")
+    args = parser.parse_args(argumentos)
+
+    archivos: List[str] = []
+    for ruta in args.rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(os.path.join(ruta, f) for f in sorted(os.listdir(ruta)) if f.endswith(".txt"))
+        else:
+            archivos.append(ruta)
+
+    if args.destino:
+        os.makedirs(args.destino, exist_ok=True)
+    for archivo in archivos:
+        destino = None
+        if args.destino:
+            destino = os.path.join(args.destino, os.path.splitext(os.path.basename(archivo))[0] + EXTENSION_BINARIA)
+        print(convertir_a_binario(archivo, destino))
+
+
+if __name__ == "__main__":
+    main()
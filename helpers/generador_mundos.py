@@ -0,0 +1,170 @@
+"""
+Generador procedural y reproducible de mundos en el formato de texto de `mundos/`.
+
+Ejemplo (familia de mundos de tamaño y número de muestras crecientes):
+    python -m helpers.generador_mundos --carpeta mundos_generados --tamanos 20,50,100 --muestras 2,4,8 --semilla 7
+"""
+import argparse
+import os
+from typing import List, Set, Tuple, Union
+
+import numpy as np
+
+from helpers.mundo import (
+    Grid,
+    Pos,
+    CASILLA_LIBRE,
+    CASILLA_OBSTACULO,
+    CASILLA_ROCA,
+    CASILLA_VOLCAN,
+    CASILLA_NAVE,
+    CASILLA_MUESTRA,
+    ASTRONAUTA,
+    celdas_alcanzables,
+)
+
+
+def abrir_pasillo(mapa: Grid, desde: Pos, hasta: Pos, generador: np.random.Generator) -> None:
+    """Convierte en terreno libre los obstáculos de un camino en L entre dos celdas."""
+    (fila_a, col_a), (fila_b, col_b) = desde, hasta
+    # El orden del codo (primero filas o primero columnas) se decide con la semilla
+    if generador.random() < 0.5:
+        recorrido = [(f, col_a) for f in range(min(fila_a, fila_b), max(fila_a, fila_b) + 1)]
+        recorrido += [(fila_b, c) for c in range(min(col_a, col_b), max(col_a, col_b) + 1)]
+    else:
+        recorrido = [(fila_a, c) for c in range(min(col_a, col_b), max(col_a, col_b) + 1)]
+        recorrido += [(f, col_b) for f in range(min(fila_a, fila_b), max(fila_a, fila_b) + 1)]
+    for fila, col in recorrido:
+        if mapa[fila, col] == CASILLA_OBSTACULO:
+            mapa[fila, col] = CASILLA_LIBRE
+
+
+def generar_mundo(
+    alto: int,
+    ancho: int,
+    densidad_obstaculos: float = 0.2,
+    densidad_rocas: float = 0.05,
+    densidad_volcanes: float = 0.05,
+    cantidad_muestras: int = 3,
+    nave: Union[str, Pos, None] = "aleatoria",
+    garantizar_solucion: bool = True,
+    semilla: Union[int, List[int], None] = None,
+) -> dict:
+    """
+    Genera un mundo aleatorio con el mismo formato que devuelve `leer_mundo_desde_archivo`.
+
+    - densidad_*: fracción esperada de celdas de cada tipo de terreno
+    - nave: "aleatoria", None (sin nave) o una posición fija (fila, col)
+    - garantizar_solucion: abre pasillos para que todas las muestras y la nave
+      sean alcanzables desde el inicio
+    - semilla: con la misma semilla y parámetros se obtiene siempre el mismo mundo
+    """
+    if densidad_obstaculos + densidad_rocas + densidad_volcanes > 1:
+        raise ValueError("La suma de las densidades no puede superar 1")
+    cantidad_especiales = 1 + cantidad_muestras + (1 if nave == "aleatoria" else 0)
+    if cantidad_especiales > alto * ancho:
+        raise ValueError(f"Un mapa de {alto}x{ancho} no tiene sitio para {cantidad_especiales} elementos")
+
+    generador = np.random.default_rng(semilla)
+    tipos = np.array([CASILLA_LIBRE, CASILLA_OBSTACULO, CASILLA_ROCA, CASILLA_VOLCAN], dtype=np.uint8)
+    probabilidades = [
+        1 - densidad_obstaculos - densidad_rocas - densidad_volcanes,
+        densidad_obstaculos,
+        densidad_rocas,
+        densidad_volcanes,
+    ]
+    mapa: Grid = generador.choice(tipos, size=(alto, ancho), p=probabilidades)
+
+    # Celdas distintas para el astronauta, la nave y las muestras
+    ocupadas = set()
+    if isinstance(nave, tuple):
+        ocupadas.add(nave[0] * ancho + nave[1])
+    celdas = [int(c) for c in generador.permutation(alto * ancho) if int(c) not in ocupadas][:cantidad_especiales]
+    inicio = divmod(celdas.pop(0), ancho)
+    posicion_nave = divmod(celdas.pop(0), ancho) if nave == "aleatoria" else nave
+    muestras: Set[Pos] = {divmod(c, ancho) for c in celdas}
+
+    mapa[inicio] = ASTRONAUTA
+    if posicion_nave is not None:
+        mapa[posicion_nave] = CASILLA_NAVE
+    for muestra in muestras:
+        mapa[muestra] = CASILLA_MUESTRA
+
+    if garantizar_solucion:
+        objetivos: List[Pos] = sorted(muestras) + ([posicion_nave] if posicion_nave is not None else [])
+        alcanzable = celdas_alcanzables(mapa, inicio)
+        for objetivo in objetivos:
+            if not alcanzable[objetivo]:
+                abrir_pasillo(mapa, inicio, objetivo, generador)
+                alcanzable = celdas_alcanzables(mapa, inicio)
+
+    return {"mapa": mapa, "inicio": inicio, "nave": posicion_nave, "muestras": muestras}
+
+
+def escribir_mundo(ruta: str, mapa: Grid) -> None:
+    """Escribe el mapa en el formato de texto de `mundos/` (una fila por línea)."""
+    np.savetxt(ruta, mapa, fmt="%d", delimiter=" ")
+
+
+def generar_familia(
+    carpeta: str,
+    tamanos: List[Tuple[int, int]],
+    cantidades_muestras: List[int],
+    semilla: int = 0,
+    **opciones,
+) -> List[str]:
+    """
+    Escribe un mundo por cada combinación de tamaño y cantidad de muestras.
+    Cada mundo usa una semilla derivada de `semilla`, de modo que la familia
+    completa es reproducible. Devuelve las rutas escritas.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for alto, ancho in tamanos:
+        for cantidad in cantidades_muestras:
+            semilla_mundo = [semilla, alto, ancho, cantidad]
+            mundo = generar_mundo(alto, ancho, cantidad_muestras=cantidad, semilla=semilla_mundo, **opciones)
+            ruta = os.path.join(carpeta, f"gen_{alto}x{ancho}_m{cantidad}_s{semilla}.txt")
+            escribir_mundo(ruta, mundo["mapa"])
+            rutas.append(ruta)
+    return rutas
+
+
+def _lista_tamanos(texto: str) -> List[Tuple[int, int]]:
+    tamanos = []
+    for parte in texto.split(","):
+        alto, _, ancho = parte.partition("x")
+        tamanos.append((int(alto), int(ancho or alto)))
+    return tamanos
+
+
+def main(argumentos=None) -> None:
+    parser = argparse.ArgumentParser(description="Generador de mundos para Smart Astronaut")
+    parser.add_argument("--carpeta", default="mundos_generados")
+    parser.add_argument("--tamanos", default="20,50,100", help="lista de tamaños: 50 (50x50) o 40x80")
+    parser.add_argument("--muestras", default="3", help="lista de cantidades de muestras")
+    parser.add_argument("--obstaculos", type=float, default=0.2)
+    parser.add_argument("--rocas", type=float, default=0.05)
+    parser.add_argument("--volcanes", type=float, default=0.05)
+    parser.add_argument("--sin-nave", action="store_true")
+    parser.add_argument("--sin-garantia", action="store_true", help="no abrir pasillos hacia muestras inalcanzables")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argumentos)
+
+    rutas = generar_familia(
+        args.carpeta,
+        _lista_tamanos(args.tamanos),
+        [int(m) for m in args.muestras.split(",")],
+        semilla=args.semilla,
+        densidad_obstaculos=args.obstaculos,
+        densidad_rocas=args.rocas,
+        densidad_volcanes=args.volcanes,
+        nave=None if args.sin_nave else "aleatoria",
+        garantizar_solucion=not args.sin_garantia,
+    )
+    for ruta in rutas:
+        print(ruta)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
-from typing import List, Tuple, Set
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Tuple, Set, Optional
 import os
+import struct
+
+import numpy as np
 
 
 Pos = Tuple[int, int]
-Grid = List[List[int]]
+# El mapa es un arreglo NumPy de forma (alto, ancho) y tipo uint8
+Grid = np.ndarray
 
 
 CASILLA_LIBRE = 0
@@ -13,39 +20,127 @@ CASILLA_VOLCAN = 4
 CASILLA_NAVE = 5
 CASILLA_MUESTRA = 6
 ASTRONAUTA = 2
+# Mayor valor de casilla admitido en los archivos de mundo
+VALOR_MAXIMO_CASILLA = 6
+
+# Orden de los movimientos (abajo, arriba, derecha, izquierda) usado por todos los algoritmos
+MOVIMIENTOS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Costo de entrar a pie en cada tipo de casilla, indexado por su valor
+COSTOS_TERRENO = np.ones(256, dtype=np.float64)
+COSTOS_TERRENO[CASILLA_ROCA] = 3.0
+COSTOS_TERRENO[CASILLA_VOLCAN] = 5.0
+
+# Formato binario de mundos: encabezado (firma, versión, alto, ancho, inicio,
+# nave, cantidad de muestras; -1 en las posiciones ausentes), las muestras como
+# pares (fila, col) uint32 y, desde un desplazamiento múltiplo de ALINEACION_BINARIA,
+# las alto x ancho celdas uint8 por filas
+FIRMA_BINARIA = b"SAMW"
+VERSION_BINARIA = 1
+ENCABEZADO_BINARIO = struct.Struct("<4sHHIIiiiiI")
+ALINEACION_BINARIA = 64
+EXTENSION_BINARIA = ".bin"
 
 def leer_mundo_desde_archivo(ruta: str) -> dict:
     """
-    Lee un archivo de texto con 10 líneas y devuelve un diccionario:
-      - 'mapa': Grid 10x10 (lista de listas de int)
+    Lee un archivo de texto con una fila del mapa por línea (enteros separados por
+    espacios) y devuelve un diccionario:
+      - 'mapa': Grid alto x ancho (np.ndarray uint8); las dimensiones salen del archivo
       - 'inicio': Pos (fila,col) del astronauta
       - 'nave': Pos (fila,col) de la nave o None
       - 'muestras': set de Pos con las muestras
+    Los archivos en formato binario (ver `escribir_mundo_binario`) se
+    reconocen por su firma y se cargan con `leer_mundo_binario`. Lanza
+    ValueError si el archivo no tiene filas o astronauta, si alguna fila tiene
+    otro número de columnas que la primera o si hay valores que no son
+    casillas válidas.
     """
     assert os.path.exists(ruta), f"No existe el archivo: {ruta}"
+    if es_mundo_binario(ruta):
+        return leer_mundo_binario(ruta)
     with open(ruta, "r") as f:
-        lineas = [ln.strip() for ln in f if ln.strip()]
-    mapa: Grid = []
-    inicio = None
-    nave = None
-    muestras: Set[Pos] = set()
-    for fila_idx, linea in enumerate(lineas):
-        partes = linea.split()
-        fila = [int(x) for x in partes]
-        mapa.append(fila)
-        for col_idx, valor in enumerate(fila):
-            if valor == ASTRONAUTA:
-                inicio = (fila_idx, col_idx)
-            elif valor == CASILLA_NAVE:
-                nave = (fila_idx, col_idx)
-            elif valor == CASILLA_MUESTRA:
-                muestras.add((fila_idx, col_idx))
-    return {"mapa": mapa, "inicio": inicio, "nave": nave, "muestras": muestras}
-
-def dentro_de_limites(pos: Pos) -> bool:
-    """Devuelve True si la posición está dentro del mapa 10x10."""
+        lineas = [(numero, ln.split()) for numero, ln in enumerate(f.read().splitlines(), 1) if ln.strip()]
+    if not lineas:
+        raise ValueError(f"{ruta}: el archivo no tiene filas")
+    alto = len(lineas)
+    ancho = len(lineas[0][1])
+    for numero, celdas in lineas:
+        if len(celdas) != ancho:
+            raise ValueError(f"{ruta}, línea {numero}: {len(celdas)} columnas en lugar de {ancho}")
+    try:
+        valores = np.array([valor for _, celdas in lineas for valor in celdas], dtype=np.int64)
+    except ValueError as error:
+        raise ValueError(f"{ruta}: valor no entero ({error})") from None
+    fuera = np.flatnonzero((valores < 0) | (valores > VALOR_MAXIMO_CASILLA))
+    if fuera.size:
+        fila, col = divmod(int(fuera[0]), ancho)
+        raise ValueError(f"{ruta}, línea {lineas[fila][0]}: valor {valores[fuera[0]]} fuera de rango (0-{VALOR_MAXIMO_CASILLA}) en la columna {col + 1}")
+    mapa: Grid = valores.astype(np.uint8).reshape(alto, ancho)
+    elementos = ubicar_elementos(mapa)
+    if elementos["inicio"] is None:
+        raise ValueError(f"{ruta}: el mapa no tiene astronauta (casilla {ASTRONAUTA})")
+    return {"mapa": mapa, **elementos}
+
+def es_mundo_binario(ruta: str) -> bool:
+    with open(ruta, "rb") as archivo:
+        return archivo.read(len(FIRMA_BINARIA)) == FIRMA_BINARIA
+
+def escribir_mundo_binario(ruta: str, mundo: dict) -> None:
+    """Escribe un mundo (como el de `leer_mundo_desde_archivo`) en el formato binario."""
+    mapa = np.ascontiguousarray(mundo["mapa"], dtype=np.uint8)
+    alto, ancho = mapa.shape
+    inicio = mundo["inicio"] or (-1, -1)
+    nave = mundo["nave"] or (-1, -1)
+    muestras = np.array(sorted(mundo["muestras"]), dtype="<u4").reshape(-1, 2)
+    encabezado = ENCABEZADO_BINARIO.pack(FIRMA_BINARIA, VERSION_BINARIA, 0, alto, ancho, *inicio, *nave, len(muestras))
+    cabecera = encabezado + muestras.tobytes()
+    relleno = -len(cabecera) % ALINEACION_BINARIA
+    with open(ruta, "wb") as archivo:
+        archivo.write(cabecera + bytes(relleno))
+        archivo.write(mapa.tobytes())
+
+def leer_mundo_binario(ruta: str) -> dict:
+    """
+    Carga un mundo en formato binario sin leer las celdas: el mapa es un memmap
+    de solo lectura, así que la carga no depende del tamaño del mapa y varios
+    procesos que abren el mismo archivo comparten sus páginas. Para modificar
+    el mapa hay que copiarlo (`np.array(mundo["mapa"])`). El diccionario incluye
+    además la `ruta` del archivo.
+    """
+    with open(ruta, "rb") as archivo:
+        datos = archivo.read(ENCABEZADO_BINARIO.size)
+        if len(datos) < ENCABEZADO_BINARIO.size:
+            raise ValueError(f"{ruta} no es un mundo binario: archivo truncado")
+        firma, version, _, alto, ancho, inicio_fila, inicio_col, nave_fila, nave_col, cantidad = ENCABEZADO_BINARIO.unpack(datos)
+        if firma != FIRMA_BINARIA or version != VERSION_BINARIA:
+            raise ValueError(f"{ruta} no es un mundo binario compatible (firma {firma!r}, versión {version})")
+        muestras = np.frombuffer(archivo.read(8 * cantidad), dtype="<u4").reshape(-1, 2)
+    if inicio_fila < 0:
+        raise ValueError(f"{ruta}: el mapa no tiene astronauta")
+    desplazamiento = ENCABEZADO_BINARIO.size + 8 * cantidad
+    desplazamiento += -desplazamiento % ALINEACION_BINARIA
+    mapa: Grid = np.memmap(ruta, dtype=np.uint8, mode="r", offset=desplazamiento, shape=(alto, ancho))
+    return {
+        "mapa": mapa,
+        "inicio": (inicio_fila, inicio_col) if inicio_fila >= 0 else None,
+        "nave": (nave_fila, nave_col) if nave_fila >= 0 else None,
+        "muestras": {(int(fila), int(col)) for fila, col in muestras},
+        "ruta": ruta,
+    }
+
+def ubicar_elementos(mapa: Grid) -> dict:
+    """Busca en el mapa la posición del astronauta, de la nave y de las muestras."""
+    astronautas = np.argwhere(mapa == ASTRONAUTA)
+    naves = np.argwhere(mapa == CASILLA_NAVE)
+    inicio = tuple(int(v) for v in astronautas[-1]) if len(astronautas) else None
+    nave = tuple(int(v) for v in naves[-1]) if len(naves) else None
+    muestras: Set[Pos] = {(int(fila), int(col)) for fila, col in np.argwhere(mapa == CASILLA_MUESTRA)}
+    return {"inicio": inicio, "nave": nave, "muestras": muestras}
+
+def dentro_de_limites(mapa: Grid, pos: Pos) -> bool:
+    """Devuelve True si la posición está dentro del mapa."""
     fila, col = pos
-    return 0 <= fila < 10 and 0 <= col < 10
+    return 0 <= fila < len(mapa) and 0 <= col < len(mapa[0])
 
 def es_obstaculo(mapa: Grid, pos: Pos) -> bool:
     """True si la celda es obstáculo (valor 1)."""
@@ -64,3 +159,114 @@ def costo_de_entrada_terreno(mapa: Grid, pos: Pos) -> float:
     if valor == CASILLA_VOLCAN:
         return 5.0
     return 1.0
+
+def celdas_alcanzables(mapa: Grid, inicio: Pos) -> np.ndarray:
+    """Máscara booleana de las celdas a las que se llega desde `inicio` sin atravesar obstáculos."""
+    alto, ancho = mapa.shape
+    transitable = (mapa != CASILLA_OBSTACULO).ravel().tolist()
+    alcanzable = [False] * (alto * ancho)
+    origen = inicio[0] * ancho + inicio[1]
+    alcanzable[origen] = True
+    pendientes = deque([origen])
+    while pendientes:
+        celda = pendientes.popleft()
+        fila, col = divmod(celda, ancho)
+        for desplazamiento_fila, desplazamiento_columna in MOVIMIENTOS:
+            nueva_fila, nueva_col = fila + desplazamiento_fila, col + desplazamiento_columna
+            if 0 <= nueva_fila < alto and 0 <= nueva_col < ancho:
+                vecino = nueva_fila * ancho + nueva_col
+                if transitable[vecino] and not alcanzable[vecino]:
+                    alcanzable[vecino] = True
+                    pendientes.append(vecino)
+    return np.array(alcanzable, dtype=bool).reshape(alto, ancho)
+
+
+@dataclass
+class MundoCompilado:
+    """
+    Tablas planas de un mundo, calculadas una sola vez, para que la generación de
+    sucesores no repita comprobaciones de límites, obstáculos y costos.
+
+    Las celdas se indexan como `fila * ancho + columna`.
+      - vecinos: 4 entradas por celda (en el orden de MOVIMIENTOS) con el índice
+        de la celda vecina o -1 si el movimiento no es válido
+      - costo_entrada: costo de entrar a pie en cada celda
+      - indice_muestra: índice de la muestra en cada celda o -1
+      - celda_nave: índice de la celda de la nave o -1 si no hay nave
+      - muestras: posiciones de las muestras, en el orden de sus índices
+    """
+    mapa: Grid
+    alto: int
+    ancho: int
+    vecinos: array
+    costo_entrada: array
+    indice_muestra: array
+    celda_nave: int
+    muestras: List[Pos]
+
+    def celda(self, pos: Pos) -> int:
+        return pos[0] * self.ancho + pos[1]
+
+    def posicion(self, celda: int) -> Pos:
+        return divmod(celda, self.ancho)
+
+    def actualizar_celda(self, pos: Pos, valor: int) -> None:
+        """
+        Cambia el tipo de terreno de una celda y corrige las tablas afectadas: su
+        costo de entrada y las entradas de `vecinos` de las cuatro celdas
+        adyacentes que apuntan a ella. No actualiza las tablas de muestras ni de
+        la nave, así que `valor` debe ser un terreno (libre, obstáculo, roca o volcán).
+        """
+        fila, col = pos
+        celda = fila * self.ancho + col
+        self.mapa[fila, col] = valor
+        self.costo_entrada[celda] = COSTOS_TERRENO[valor]
+        destino = -1 if valor == CASILLA_OBSTACULO else celda
+        for direccion, (desplazamiento_fila, desplazamiento_columna) in enumerate(MOVIMIENTOS):
+            vecina_fila, vecina_col = fila - desplazamiento_fila, col - desplazamiento_columna
+            if 0 <= vecina_fila < self.alto and 0 <= vecina_col < self.ancho:
+                self.vecinos[4 * (vecina_fila * self.ancho + vecina_col) + direccion] = destino
+
+
+def compilar_mundo(mapa: Grid, posicion_nave: Optional[Pos], muestras: Set[Pos]) -> MundoCompilado:
+    """
+    Precalcula las tablas de vecinos y costos de un mundo leído con
+    `leer_mundo_desde_archivo`. El cálculo es vectorizado sobre todo el mapa.
+    """
+    mapa = np.asarray(mapa, dtype=np.uint8)
+    alto, ancho = mapa.shape
+    total_celdas = alto * ancho
+
+    transitable = mapa != CASILLA_OBSTACULO
+    indices = np.arange(total_celdas, dtype=np.int32).reshape(alto, ancho)
+    tabla_vecinos = np.full((alto, ancho, 4), -1, dtype=np.int32)
+    for direccion, (desplazamiento_fila, desplazamiento_columna) in enumerate(MOVIMIENTOS):
+        origen = (
+            slice(max(0, -desplazamiento_fila), alto - max(0, desplazamiento_fila)),
+            slice(max(0, -desplazamiento_columna), ancho - max(0, desplazamiento_columna)),
+        )
+        destino = (
+            slice(max(0, desplazamiento_fila), alto - max(0, -desplazamiento_fila)),
+            slice(max(0, desplazamiento_columna), ancho - max(0, -desplazamiento_columna)),
+        )
+        tabla_vecinos[origen + (direccion,)] = np.where(transitable[destino], indices[destino], -1)
+
+    muestras_ordenadas = sorted(muestras)
+    tabla_muestras = np.full(total_celdas, -1, dtype=np.int32)
+    for indice, (fila, col) in enumerate(muestras_ordenadas):
+        tabla_muestras[fila * ancho + col] = indice
+
+    celda_nave = -1
+    if posicion_nave and mapa[posicion_nave] == CASILLA_NAVE:
+        celda_nave = posicion_nave[0] * ancho + posicion_nave[1]
+
+    return MundoCompilado(
+        mapa=mapa,
+        alto=alto,
+        ancho=ancho,
+        vecinos=array("i", tabla_vecinos.tobytes()),
+        costo_entrada=array("d", COSTOS_TERRENO[mapa].tobytes()),
+        indice_muestra=array("i", tabla_muestras.tobytes()),
+        celda_nave=celda_nave,
+        muestras=muestras_ordenadas,
+    )
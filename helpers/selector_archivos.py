@@ -3,7 +3,7 @@ import sys
 
 def elegir_archivo(carpeta="mundos"):
     """
-    Lista los archivos .txt disponibles en la carpeta especificada
+    Lista los archivos de mundo (.txt o .bin) disponibles en la carpeta especificada
     y permite al usuario seleccionar uno mediante un número.
     
     Args:
@@ -16,10 +16,10 @@ def elegir_archivo(carpeta="mundos"):
         print(f"Error: La carpeta '{carpeta}' no existe.")
         sys.exit(1)
     
-    archivos = [f for f in os.listdir(carpeta) if f.endswith('.txt')]
+    archivos = [f for f in os.listdir(carpeta) if f.endswith(('.txt', '.bin'))]
     
     if not archivos:
-        print(f"No se encontraron archivos .txt en '{carpeta}'.")
+        print(f"No se encontraron archivos de mundo en '{carpeta}'.")
         sys.exit(1)
     
     print("\n=== Archivos de mundo disponibles ===")
@@ -1,6 +1,11 @@
+import os
+
 import pygame
-import time
-from typing import List, Tuple, Set
+from typing import List, Optional, Tuple, Set
+
+import numpy as np
+
+from helpers.mundo import Grid
 
 # Colores RGB
 BLANCO = (255,255,255)
@@ -15,18 +20,127 @@ AMARILLO = (255,255,0) # camino
 
 TAM_CELDA = 50
 MARGEN = 2
+# Tamaño máximo (en píxeles) del lado mayor de la cuadrícula
+LADO_MAXIMO = 900
+# Duración de cada paso de la animación del camino
+SEGUNDOS_POR_PASO = 0.08
+
+# Color de cada valor de casilla, para dibujar el mapa entero como una imagen
+PALETA = np.zeros((256, 3), dtype=np.uint8)
+PALETA[:] = BLANCO
+PALETA[1] = GRIS
+PALETA[3] = MARRON
+PALETA[4] = ROJO
+PALETA[5] = AZUL
+PALETA[6] = VERDE
+CIAN = (0,255,255)     # últimas expansiones en la reproducción de una traza
+
+
+def tamano_celda(filas: int, columnas: int) -> int:
+    """Lado en píxeles de cada celda: para mapas grandes se reduce hasta caber en LADO_MAXIMO."""
+    return max(1, min(TAM_CELDA, LADO_MAXIMO // max(filas, columnas)))
+
+def geometria(filas: int, columnas: int) -> Tuple[float, int]:
+    """
+    (lado de celda en píxeles, margen) para dibujar un mapa. Hasta LADO_MAXIMO
+    píxeles el lado es entero (ver `tamano_celda`); en mapas con más celdas que
+    LADO_MAXIMO por lado es fraccionario y varias celdas comparten píxel.
+    """
+    lado_mayor = max(filas, columnas)
+    if lado_mayor > LADO_MAXIMO:
+        return LADO_MAXIMO / lado_mayor, 0
+    tam_celda = tamano_celda(filas, columnas)
+    return tam_celda, MARGEN if tam_celda >= 10 else 0
+
+
+def tamano_lienzo(filas: int, columnas: int, tam_celda: float, margen: int) -> Tuple[int, int]:
+    """(ancho, alto) en píxeles de la cuadrícula."""
+    return round(columnas * (tam_celda + margen) + margen), round(filas * (tam_celda + margen) + margen)
+
+
+def rect_celda(fila: int, col: int, tam_celda: float, margen: int) -> pygame.Rect:
+    """Rectángulo de una celda (al menos un píxel aunque el lado sea fraccionario)."""
+    paso = tam_celda + margen
+    x, y = int(margen + col * paso), int(margen + fila * paso)
+    ancho = max(1, int(margen + col * paso + tam_celda) - x)
+    alto = max(1, int(margen + fila * paso + tam_celda) - y)
+    return pygame.Rect(x, y, ancho, alto)
+
+
+def imagen_mundo(mapa: Grid, posicion_inicio: Tuple[int,int], posicion_nave: Optional[Tuple[int,int]],
+                 muestras: Set[Tuple[int,int]], tam_celda: float, margen: int) -> np.ndarray:
+    """
+    Imagen RGB (alto, ancho, 3) en píxeles del terreno con el inicio, la nave y
+    las muestras, calculada de una vez con la PALETA: cada píxel toma el color
+    de la celda que cae debajo (negro en los márgenes).
+    """
+    mapa = np.asarray(mapa)
+    filas, columnas = mapa.shape
+    colores = PALETA[mapa]
+    colores[posicion_inicio] = NARANJA
+    if posicion_nave:
+        colores[posicion_nave] = AZUL
+    for muestra in muestras:
+        colores[muestra] = VERDE
+
+    ancho, alto = tamano_lienzo(filas, columnas, tam_celda, margen)
+    paso = tam_celda + margen
 
-def dibujar_mundo(mapa: List[List[int]], camino: List[Tuple[int,int]],
+    def celdas_de_pixeles(pixeles: int, celdas: int):
+        desplazamiento = np.arange(pixeles) - margen
+        indices = np.floor(desplazamiento / paso).astype(np.int64)
+        dentro = (desplazamiento >= 0) & (desplazamiento - indices * paso < tam_celda) & (indices < celdas)
+        return np.clip(indices, 0, celdas - 1), dentro
+
+    indices_filas, dentro_filas = celdas_de_pixeles(alto, filas)
+    indices_columnas, dentro_columnas = celdas_de_pixeles(ancho, columnas)
+    imagen = colores[indices_filas[:, None], indices_columnas[None, :]]
+    imagen[~(dentro_filas[:, None] & dentro_columnas[None, :])] = NEGRO
+    return imagen
+
+
+def superficie_mundo(mapa: Grid, posicion_inicio: Tuple[int,int], posicion_nave: Optional[Tuple[int,int]],
+                     muestras: Set[Tuple[int,int]], tam_celda: float, margen: int) -> pygame.Surface:
+    """Superficie con el terreno dibujado (ver `imagen_mundo`), para renderizarlo una sola vez."""
+    return pygame.surfarray.make_surface(imagen_mundo(mapa, posicion_inicio, posicion_nave, muestras, tam_celda, margen).transpose(1, 0, 2))
+
+
+def pintar_camino(superficie: pygame.Surface, camino: List[Tuple[int,int]], desde: int, hasta: int,
+                  fijas: Set[Tuple[int,int]], tam_celda: float, margen: int) -> List[pygame.Rect]:
+    """
+    Pinta de amarillo los pasos `desde`..`hasta` (incluido) del camino, salvo
+    las celdas `fijas` (inicio, nave y muestras, que conservan su color), y
+    devuelve los rectángulos modificados.
+    """
+    rects = []
+    for fila, col in camino[desde:hasta + 1]:
+        if (fila, col) in fijas:
+            continue
+        rect = rect_celda(fila, col, tam_celda, margen)
+        superficie.fill(AMARILLO, rect)
+        rects.append(rect)
+    return rects
+
+
+def dibujar_mundo(mapa: Grid, camino: List[Tuple[int,int]],
                   posicion_inicio: Tuple[int,int], posicion_nave: Tuple[int,int],
                   muestras: Set[Tuple[int,int]]):
     """
     Dibuja el mapa y anima el camino encontrado.
     Presiona el botón para iniciar la animación del camino.
     Cierra la ventana para terminar.
+
+    El terreno se dibuja una sola vez; en cada cuadro solo se pintan las celdas
+    del camino que avanzaron (un paso cada SEGUNDOS_POR_PASO, según el reloj) y
+    se actualizan sus rectángulos, sin bloquear el bucle de eventos.
     """
     pygame.init()
-    ancho = TAM_CELDA*10 + MARGEN*(10+1)
-    alto  = TAM_CELDA*10 + MARGEN*(10+1) + 80 
+    filas, columnas = len(mapa), len(mapa[0])
+    # Para mapas grandes se reduce el tamaño de celda y se eliminan los márgenes
+    tam_celda, margen = geometria(filas, columnas)
+    ancho_cuadricula, alto_cuadricula = tamano_lienzo(filas, columnas, tam_celda, margen)
+    ancho = max(ancho_cuadricula, 220)
+    alto  = alto_cuadricula + 80
     pantalla = pygame.display.set_mode((ancho, alto))
     pygame.display.set_caption("Smart Astronaut - Trayectoria")
     
@@ -36,79 +150,211 @@ def dibujar_mundo(mapa: List[List[int]], camino: List[Tuple[int,int]],
     boton_hover_color = (0, 255, 0)
     boton_texto = "Mostrar Camino"
     
-    def dibujar_celda(fila, col, color):
-        x = col*(TAM_CELDA+MARGEN)+MARGEN
-        y = fila*(TAM_CELDA+MARGEN)+MARGEN
-        pygame.draw.rect(pantalla, color, (x,y,TAM_CELDA,TAM_CELDA))
-    
-    def dibujar_boton(mouse_pos):
-        color = boton_hover_color if boton_rect.collidepoint(mouse_pos) else boton_color
+    def dibujar_boton(resaltado):
+        pygame.draw.rect(pantalla, NEGRO, boton_rect.inflate(6, 6))
+        color = boton_hover_color if resaltado else boton_color
         pygame.draw.rect(pantalla, color, boton_rect, border_radius=10)
         pygame.draw.rect(pantalla, NEGRO, boton_rect, 3, border_radius=10)
         
         texto_surface = fuente.render(boton_texto, True, NEGRO)
         texto_rect = texto_surface.get_rect(center=boton_rect.center)
         pantalla.blit(texto_surface, texto_rect)
+        return boton_rect.inflate(6, 6)
+
+    fijas = {tuple(posicion_inicio), *map(tuple, muestras)}
+    if posicion_nave:
+        fijas.add(tuple(posicion_nave))
+    cuadricula = superficie_mundo(mapa, posicion_inicio, posicion_nave, muestras, tam_celda, margen)
+    pantalla.fill(NEGRO)
+    pantalla.blit(cuadricula, (0, 0))
+    resaltado = boton_rect.collidepoint(pygame.mouse.get_pos())
+    dibujar_boton(resaltado)
+    pygame.display.flip()
 
     reloj = pygame.time.Clock()
     ejecutando = True
-    paso = 0
-    mostrar_camino = False  
+    paso = -1
+    inicio_animacion = None
     
     while ejecutando:
-        mouse_pos = pygame.mouse.get_pos()
-        
+        sucios = []
         for evento in pygame.event.get():
             if evento.type == pygame.QUIT:
                 ejecutando = False
             elif evento.type == pygame.MOUSEBUTTONDOWN:
-                if boton_rect.collidepoint(evento.pos):
-                    mostrar_camino = True  
-
-        pantalla.fill(NEGRO)
-
-
-        for r in range(10):
-            for c in range(10):
-                val = mapa[r][c]
-                color = BLANCO
-                if val == 1:
-                    color = GRIS
-                elif val == 3:
-                    color = MARRON
-                elif val == 4:
-                    color = ROJO
-                elif val == 5:
-                    color = AZUL
-                elif val == 6:
-                    color = VERDE
-                dibujar_celda(r, c, color)
-
-
-        if mostrar_camino:
-            for i, (r,c) in enumerate(camino[:paso+1]):
-                x = c*(TAM_CELDA+MARGEN)+MARGEN
-                y = r*(TAM_CELDA+MARGEN)+MARGEN
-                pygame.draw.rect(pantalla, AMARILLO, (x,y,TAM_CELDA,TAM_CELDA))
-
-
-        sr, sc = posicion_inicio
-        dibujar_celda(sr, sc, NARANJA)
+                if boton_rect.collidepoint(evento.pos) and inicio_animacion is None:
+                    inicio_animacion = pygame.time.get_ticks()
+
+        sobre_boton = boton_rect.collidepoint(pygame.mouse.get_pos())
+        if sobre_boton != resaltado:
+            resaltado = sobre_boton
+            sucios.append(dibujar_boton(resaltado))
+
+        if inicio_animacion is not None and paso < len(camino) - 1:
+            objetivo = min(len(camino) - 1, int((pygame.time.get_ticks() - inicio_animacion) / (1000 * SEGUNDOS_POR_PASO)))
+            if objetivo > paso:
+                rects = pintar_camino(pantalla, camino, paso + 1, objetivo, fijas, tam_celda, margen)
+                sucios.extend(rects if len(rects) < 256 else [pygame.Rect(0, 0, ancho_cuadricula, alto_cuadricula)])
+                paso = objetivo
+
+        if sucios:
+            pygame.display.update(sucios)
+        reloj.tick(60)
+
+    pygame.quit()
+
+
+def exportar_cuadros(mapa: Grid, camino: List[Tuple[int,int]],
+                     posicion_inicio: Tuple[int,int], posicion_nave: Optional[Tuple[int,int]],
+                     muestras: Set[Tuple[int,int]], directorio: str,
+                     pasos_por_cuadro: int = 1, hoja: bool = False, columnas_hoja: int = 10,
+                     lado_cuadro_hoja: int = 200) -> List[str]:
+    """
+    Renderiza la animación del camino sin pantalla (driver de vídeo "dummy" de
+    SDL) y la guarda en `directorio` como PNG:
+
+    - hoja=False: un archivo por cuadro (`cuadro_00000.png`, ...), avanzando
+      `pasos_por_cuadro` pasos del camino en cada uno
+    - hoja=True: una sola imagen `hoja.png` con los cuadros en una cuadrícula de
+      `columnas_hoja` columnas, cada uno reducido a `lado_cuadro_hoja` píxeles
+      de lado mayor
+
+    El cuadro 0 es el mapa sin camino y el último, el camino completo. El
+    terreno se renderiza una vez y cada cuadro solo pinta los pasos nuevos.
+    Devuelve las rutas escritas; al terminar, `SDL_VIDEODRIVER` vuelve a su
+    valor anterior.
+    """
+    driver_anterior = os.environ.get("SDL_VIDEODRIVER")
+    iniciada = pygame.display.get_init()
+    if not iniciada:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+    try:
+        os.makedirs(directorio, exist_ok=True)
+
+        filas, columnas = len(mapa), len(mapa[0])
+        tam_celda, margen = geometria(filas, columnas)
+        fijas = {tuple(posicion_inicio), *map(tuple, muestras)}
         if posicion_nave:
-            dibujar_celda(posicion_nave[0], posicion_nave[1], AZUL)
-        for s in muestras:
-            dibujar_celda(s[0], s[1], VERDE)
-        
+            fijas.add(tuple(posicion_nave))
+        lienzo = superficie_mundo(mapa, posicion_inicio, posicion_nave, muestras, tam_celda, margen)
+
+        # Último paso pintado en cada cuadro: -1 (sin camino) y luego de pasos_por_cuadro en pasos_por_cuadro
+        finales = [-1] + list(range(pasos_por_cuadro - 1, len(camino) - 1, pasos_por_cuadro))
+        if len(camino) and finales[-1] != len(camino) - 1:
+            finales.append(len(camino) - 1)
+
+        rutas = []
+        if hoja:
+            ancho, alto = lienzo.get_size()
+            escala = min(1.0, lado_cuadro_hoja / max(ancho, alto))
+            cuadro = (max(1, round(ancho * escala)), max(1, round(alto * escala)))
+            columnas_hoja = max(1, min(columnas_hoja, len(finales)))
+            filas_hoja = -(-len(finales) // columnas_hoja)
+            lamina = pygame.Surface((cuadro[0] * columnas_hoja, cuadro[1] * filas_hoja))
+            lamina.fill(NEGRO)
+
+        anterior = -1
+        for numero, final in enumerate(finales):
+            pintar_camino(lienzo, camino, anterior + 1, final, fijas, tam_celda, margen)
+            anterior = final
+            if hoja:
+                fila_hoja, col_hoja = divmod(numero, columnas_hoja)
+                lamina.blit(pygame.transform.smoothscale(lienzo, cuadro), (col_hoja * cuadro[0], fila_hoja * cuadro[1]))
+            else:
+                ruta = os.path.join(directorio, f"cuadro_{numero:05d}.png")
+                pygame.image.save(lienzo, ruta)
+                rutas.append(ruta)
+
+        if hoja:
+            ruta = os.path.join(directorio, "hoja.png")
+            pygame.image.save(lamina, ruta)
+            rutas.append(ruta)
+    finally:
+        if not iniciada:
+            pygame.display.quit()
+        if driver_anterior is None:
+            os.environ.pop("SDL_VIDEODRIVER", None)
+        else:
+            os.environ["SDL_VIDEODRIVER"] = driver_anterior
+    return rutas
+
+
+def colorear_calor(mapa: Grid, conteo: np.ndarray, recientes: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Imagen RGB (alto, ancho, 3) del mapa con las celdas expandidas coloreadas de
+    amarillo (pocas expansiones) a rojo (muchas), en escala logarítmica. Las
+    celdas de `recientes` (máscara booleana) se resaltan en cian.
+    """
+    imagen = PALETA[mapa]
+    expandidas = conteo > 0
+    if expandidas.any():
+        intensidad = np.log1p(conteo[expandidas].astype(np.float64)) / np.log1p(float(conteo.max()))
+        imagen[expandidas, 0] = 255
+        imagen[expandidas, 1] = (255 * (1 - intensidad)).astype(np.uint8)
+        imagen[expandidas, 2] = 0
+    if recientes is not None:
+        imagen[recientes] = CIAN
+    return imagen
 
-        dibujar_boton(mouse_pos)
 
+def reproducir_traza(mapa: Grid, ruta: str, modo: str = "calor", expansiones_por_cuadro: Optional[int] = None):
+    """
+    Muestra una traza grabada con `GrabadorTraza` sobre `mapa`.
+
+    - modo "calor": mapa de calor final con el número de expansiones por celda
+    - modo "pasos": anima la búsqueda; en cada cuadro se añaden
+      `expansiones_por_cuadro` expansiones (por defecto, las necesarias para
+      unos 20 s) y las recién expandidas se resaltan en cian
+
+    La traza se lee por bloques desde el disco (ver `bloques_traza`), de modo
+    que la memoria no depende de su longitud. Cierra la ventana para terminar.
+    """
+    from algoritmos.traza import leer_encabezado, bloques_traza, mapa_calor
+
+    encabezado = leer_encabezado(ruta)
+    filas, columnas = mapa.shape
+    if (encabezado["alto"], encabezado["ancho"]) != (filas, columnas):
+        raise ValueError(f"La traza es de un mapa {encabezado['alto']}x{encabezado['ancho']}, no {filas}x{columnas}")
+
+    pygame.init()
+    # La imagen de la traza no tiene líneas de cuadrícula: mismo lado de celda que el mapa, sin margen
+    tam_celda, _ = geometria(filas, columnas)
+    pantalla = pygame.display.set_mode(tamano_lienzo(filas, columnas, tam_celda, 0))
+    reloj = pygame.time.Clock()
+
+    def mostrar(imagen: np.ndarray, titulo: str):
+        superficie = pygame.surfarray.make_surface(imagen.transpose(1, 0, 2))
+        pantalla.blit(pygame.transform.scale(superficie, pantalla.get_size()), (0, 0))
+        pygame.display.set_caption(titulo)
         pygame.display.flip()
 
+    if modo == "calor":
+        conteo = mapa_calor(ruta)
+        mostrar(colorear_calor(mapa, conteo), f"Traza: {encabezado['registros']} expansiones")
+        bloques = iter(())
+    elif modo == "pasos":
+        por_cuadro = expansiones_por_cuadro or max(1, encabezado["registros"] // 600)
+        conteo = np.zeros((filas, columnas), dtype=np.uint64)
+        bloques = bloques_traza(ruta, por_cuadro)
+    else:
+        raise ValueError(f"Modo de reproducción desconocido: {modo}")
+
+    ejecutando = True
+    reproducidas = 0
+    while ejecutando:
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                ejecutando = False
+
+        bloque = next(bloques, None)
+        if bloque is not None:
+            recientes = np.zeros((filas, columnas), dtype=bool)
+            recientes[bloque["fila"], bloque["col"]] = True
+            np.add.at(conteo, (bloque["fila"], bloque["col"]), 1)
+            reproducidas += len(bloque)
+            mostrar(colorear_calor(mapa, conteo, recientes), f"Traza: {reproducidas}/{encabezado['registros']} expansiones")
 
-        if mostrar_camino and paso < len(camino)-1:
-            paso += 1
-            time.sleep(0.08)
-        
         reloj.tick(30)
 
     pygame.quit()
@@ -1,11 +1,144 @@
+"""
+Smart Astronaut.
+
+Sin argumentos se muestra el menú interactivo. Con la ruta de un mundo se
+resuelve sin preguntas, que es lo adecuado para scripts y procesos en lote:
+
+    python main.py mundos/Prueba1.txt
+    python main.py mundos/Prueba1.txt --algoritmo costo_uniforme --formato json
+    python main.py mundos/Prueba1.txt --opcion modo_heuristica=terreno --opcion limite_nodos=100000
+    python main.py mundos/Prueba1.txt --visualizar
+    python main.py mundos/Prueba1.txt --cuadros cuadros/ --hoja
+
+pygame solo se importa con --visualizar, --cuadros o desde el menú, así que la
+resolución por línea de comandos solo carga NumPy y los algoritmos.
+
+Códigos de salida: 0 si se encontró un plan, 1 si no lo hay y 2 si los
+argumentos no son válidos (archivo inexistente o ilegible, opción desconocida
+o con un valor no admitido).
+"""
+import argparse
+import ast
+import inspect
+import json
+import os
+import sys
+from typing import Optional
+
 from helpers.mundo import leer_mundo_desde_archivo
 from helpers.selector_archivos import elegir_archivo
 import algoritmos.astar as busqueda_a_estrella
 import algoritmos.avara as busqueda_avara
-from algoritmos import busqueda_amplitud, busqueda_costo_uniforme, busqueda_profundidad_sin_ciclos
-from helpers import visualizador
+from algoritmos import ALGORITMOS, busqueda_amplitud, busqueda_costo_uniforme, busqueda_profundidad_sin_ciclos
+from algoritmos.astar import MODOS_HEURISTICA
+from algoritmos.avara import MODOS_HAZ
+from algoritmos.frontera import FRONTERAS
+
+# Valores admitidos de las opciones de algoritmo que eligen un modo
+VALORES_OPCIONES = {"frontera": tuple(FRONTERAS), "modo_heuristica": MODOS_HEURISTICA, "modo_haz": MODOS_HAZ}
+# Opciones de algoritmo que deben ser enteros positivos
+OPCIONES_ENTERAS = ("ancho_haz",)
+
+
+def interpretar_opcion(texto: str):
+    """Convierte "clave=valor" en (clave, valor); el valor se interpreta como literal de Python si se puede."""
+    clave, separador, valor = texto.partition("=")
+    if not separador:
+        raise argparse.ArgumentTypeError(f"Se esperaba CLAVE=VALOR: {texto}")
+    try:
+        return clave, ast.literal_eval(valor)
+    except (ValueError, SyntaxError):
+        return clave, valor
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Smart Astronaut: planificación de la recogida de muestras")
+    parser.add_argument("mundo", nargs="?", help="archivo del mundo; sin él se muestra el menú interactivo")
+    parser.add_argument("--algoritmo", choices=list(ALGORITMOS), default="a_estrella")
+    parser.add_argument("--opcion", type=interpretar_opcion, action="append", default=[], metavar="CLAVE=VALOR",
+                        help="opción del algoritmo (se puede repetir), p. ej. modo_heuristica=terreno")
+    parser.add_argument("--formato", choices=("texto", "json"), default="texto")
+    parser.add_argument("--visualizar", action="store_true", help="anima el camino en una ventana de pygame")
+    parser.add_argument("--cuadros", metavar="DIRECTORIO", help="guarda la animación como PNG sin pantalla")
+    parser.add_argument("--hoja", action="store_true", help="con --cuadros, una sola imagen con todos los cuadros")
+    parser.add_argument("--pasos-por-cuadro", type=int, default=1, help="con --cuadros, pasos del camino por cuadro")
+    return parser
+
+
+def imprimir_resultado(resultado: dict) -> None:
+    print("\n=== RESULTADOS ===")
+    print("Costo total (g):", resultado["costo_total"])
+    print("Nodos expandidos:", resultado["nodos_expandidos"])
+    print("Profundidad (movimientos):", resultado["profundidad"])
+    print("Tiempo (s):", resultado["tiempo"])
+    print("Trayectoria:", resultado["camino con costo"])
+
+
+def validar_opciones(algoritmo: str, opciones: dict) -> Optional[str]:
+    """Descripción del primer problema de `opciones` para `algoritmo`, o None si son válidas."""
+    admitidas = inspect.signature(ALGORITMOS[algoritmo]).parameters
+    desconocidas = [clave for clave in opciones if clave not in admitidas]
+    if desconocidas:
+        return f"Opciones desconocidas para {algoritmo}: {', '.join(desconocidas)}"
+    for clave, valor in opciones.items():
+        if clave in VALORES_OPCIONES and valor not in VALORES_OPCIONES[clave]:
+            return f"Valor no válido para {clave}: {valor!r} (admitidos: {', '.join(VALORES_OPCIONES[clave])})"
+        if clave in OPCIONES_ENTERAS and not (isinstance(valor, int) and valor >= 1):
+            return f"{clave} debe ser un entero positivo: {valor!r}"
+    return None
+
+
+def resolver_por_argumentos(args, parser: argparse.ArgumentParser) -> int:
+    """
+    Modo no interactivo: resuelve el mundo de `args.mundo` y devuelve el código
+    de salida. Los errores de entrada terminan con `parser.error` (código 2).
+    """
+    if not os.path.isfile(args.mundo):
+        parser.error(f"No existe el archivo: {args.mundo}")
+    try:
+        mundo = leer_mundo_desde_archivo(args.mundo)
+    except (OSError, ValueError) as error:
+        parser.error(f"No se pudo leer el mundo: {error}")
+    mapa, inicio, nave, muestras = mundo["mapa"], mundo["inicio"], mundo["nave"], mundo["muestras"]
+
+    opciones = dict(args.opcion)
+    problema = validar_opciones(args.algoritmo, opciones)
+    if problema:
+        parser.error(problema)
+    resultado = ALGORITMOS[args.algoritmo](mapa, inicio, nave, muestras, **opciones)
+
+    if args.formato == "json":
+        json.dump(resultado, sys.stdout, default=sorted)
+        sys.stdout.write("\n")
+    elif resultado["exito"]:
+        imprimir_resultado(resultado)
+    else:
+        print("No se encontró solución:", resultado["motivo"])
+
+    if resultado["exito"] and (args.visualizar or args.cuadros):
+        # El saludo de pygame se imprime en la salida estándar y mezclaría el JSON
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        from helpers import visualizador
+        if args.cuadros:
+            visualizador.exportar_cuadros(mapa, resultado["camino"], inicio, nave, muestras, args.cuadros,
+                                          pasos_por_cuadro=args.pasos_por_cuadro, hoja=args.hoja)
+        if args.visualizar:
+            visualizador.dibujar_mundo(mapa, resultado["camino"], inicio, nave, muestras)
+    return 0 if resultado["exito"] else 1
+
+
+def main(argumentos=None) -> int:
+    parser = crear_parser()
+    args = parser.parse_args(argumentos)
+    if args.mundo is not None:
+        return resolver_por_argumentos(args, parser)
+    menu_interactivo()
+    return 0
+
+
+def menu_interactivo():
+    from helpers import visualizador
 
-def main():
     print("=== Smart Astronaut - Selección de búsqueda ===")
     print("1) Búsqueda NO informada")
     print("2) Búsqueda INFORMADA")
@@ -46,22 +179,9 @@ def main():
             print("No se encontró solución.")
             return
 
-        print("\n=== RESULTADOS ===")
-        # Algunos algoritmos retornan "camino con costo" y otros solo "camino"
-        costo_total = resultado.get("costo_total", resultado.get("costo", resultado.get("costo_total", 0)))
-        print("Costo total (g):", costo_total)
-        print("Nodos expandidos:", resultado.get("nodos_expandidos"))
-        print("Profundidad (movimientos):", resultado.get("profundidad"))
-        print("Tiempo (s):", resultado.get("tiempo"))
-        if "camino con costo" in resultado:
-            print("Trayectoria:", resultado["camino con costo"])
-            camino_a_visualizar = resultado["camino"]
-        else:
-            print("Trayectoria:", resultado.get("camino"))
-            camino_a_visualizar = resultado.get("camino")
-
+        imprimir_resultado(resultado)
         print("\nSe mostrará la animación en pygame (cierra la ventana para terminar).")
-        visualizador.dibujar_mundo(mapa, camino_a_visualizar, inicio, nave, muestras)
+        visualizador.dibujar_mundo(mapa, resultado["camino"], inicio, nave, muestras)
     
     elif opcion == "2":
         print("\n=== BÚSQUEDA INFORMADA ===")
@@ -95,12 +215,7 @@ def main():
             print("No se encontró solución.")
             return
 
-        print("\n=== RESULTADOS ===")
-        print("Costo total (g):", resultado["costo_total"])
-        print("Nodos expandidos:", resultado["nodos_expandidos"])
-        print("Trayectoria:", resultado["camino con costo"])
-        print("Profundidad (movimientos):", resultado["profundidad"])
-        print("Tiempo (s):", resultado["tiempo"])
+        imprimir_resultado(resultado)
         print("\nSe mostrará la animación en pygame (cierra la ventana para terminar).")
         visualizador.dibujar_mundo(mapa, resultado["camino"], inicio, nave, muestras)
     else:
@@ -108,4 +223,4 @@ def main():
         return
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file